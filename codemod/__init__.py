@@ -0,0 +1,31 @@
+# Public API. Names are imported from their modules on first use, so
+# `import codemod` (and every CLI run) only loads what it actually touches;
+# rules are compiled from codemod/rules/ by get_rules() the same way.
+
+import importlib
+
+_EXPORTS = {
+    'engine': (
+        'RULES', 'FileReport', 'Rule', 'RuleStat', 'apply_edits', 'apply_rules', 'format_report', 'get_rules',
+        'register', 'run_file', 'run_file_streaming', 'run_plan', 'stream_edits',
+    ),
+    'cache': ('Cache', 'rules_key', 'run_cached'),
+    'checkpoint': ('Checkpoint',),
+    'journal': ('Transaction', 'recover', 'rollback'),
+    'plan': ('Plan', 'compose', 'load_plans', 'save_plans', 'unified_diff'),
+    'profiling': ('Profiling', 'write_trace'),
+    'rulefiles': ('catalog', 'load_rules'),
+    'tree': ('DEFAULT_GLOBS', 'TreeReport', 'expand_globs', 'format_tree_report', 'run_tree'),
+    'watch': ('WatchedFile', 'watch'),
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module 'codemod' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'codemod.{module}'), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,198 @@
+# python3 -m codemod [--rule NAME ...] [--stream] [PATH ...]
+# python3 -m codemod --tree [--jobs N] [--restart] [GLOB ...]
+# python3 -m codemod --rollback [ID]
+# python3 -m codemod --apply PLAN.json
+# python3 -m codemod --watch [--poll] [--rule NAME ...] [PATH ...]
+#
+# --profile / --trace-memory / --trace FILE.{json,csv} work in both modes.
+# --dry-run prints a unified diff of every change; --plan FILE saves the edits
+# so they can be reviewed and applied later with --apply FILE. --schedule
+# shows which rules are planned together and which wait for which. A tree
+# run that writes keeps a checkpoint, and run again after an interruption it
+# resumes with the files it had left (--restart starts over).
+#
+# Without --rule every declared rule runs except the ones declared
+# default = false (see codemod/rulefiles.py), which only run when named.
+# Either way rules apply in the order codemod/rules/*.toml declares them.
+#
+# Loop over files by passing them all to one run (or --files-from FILE, '-'
+# for stdin) rather than starting one run per file. Modes are imported only
+# when used and only the rules a run applies are compiled.
+
+import argparse
+import sys
+
+from codemod.activity import PIPELINE
+from codemod.engine import format_report, get_rules, run_file, run_file_streaming, run_plan
+from codemod.journal import StaleError, Transaction, recover, rollback
+from codemod.rulefiles import catalog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod', description='Apply registered rewrite rules in one pass per file.')
+    parser.add_argument('paths', nargs='*', help=f'files to rewrite (default: {PIPELINE}), or globs with --tree')
+    parser.add_argument('--files-from', metavar='FILE', help="read more paths from FILE, one per line ('-' for stdin)")
+    parser.add_argument('--rule', action='append', dest='rules', choices=list(catalog()), help='rule to apply (repeatable, applied in declared order; default: every rule not declared default = false)')
+    parser.add_argument('--dry-run', action='store_true', help='print the diff of every change without writing')
+    parser.add_argument('--plan', metavar='FILE', help='save the planned edits to FILE (JSON) for --apply')
+    parser.add_argument('--apply', metavar='FILE', help='apply the edits saved with --plan, without matching again, and exit')
+    parser.add_argument('--tree', action='store_true', help='treat paths as globs and run them on a process pool')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes for --tree (default: one per core)')
+    parser.add_argument('--restart', action='store_true', help='with --tree, drop the checkpoint of an interrupted run and start over')
+    parser.add_argument('--no-cache', action='store_true', help='ignore and do not update .codemod-cache/')
+    parser.add_argument('--stream', action='store_true', help='plan on an mmap of each file and stream the rewrite to disk (the scanner index still takes about 5x the file size)')
+    parser.add_argument('--profile', action='store_true', help='cProfile every rule on every file (dumps in .codemod-cache/profiles/)')
+    parser.add_argument('--trace-memory', action='store_true', help='record the tracemalloc peak of every rule')
+    parser.add_argument('--trace', metavar='FILE', help='write per-file, per-phase timings to FILE (.json or .csv)')
+    parser.add_argument('--rollback', nargs='?', const='', metavar='ID', help='undo a committed run (default: the latest) and exit')
+    parser.add_argument('--watch', action='store_true', help='keep running and reapply the rules whenever a file is saved')
+    parser.add_argument('--poll', action='store_true', help='with --watch, poll for changes instead of using inotify')
+    parser.add_argument('--schedule', action='store_true', help='print the waves the rules run in and why, and exit')
+    args = parser.parse_args(argv)
+    if args.files_from:
+        with (sys.stdin if args.files_from == '-' else open(args.files_from)) as f:
+            args.paths += [line.rstrip('\n') for line in f if line.strip()]
+
+    # Undo whatever an interrupted run left half-committed, unless this run
+    # only looks
+    if not (args.dry_run or args.schedule):
+        for txid in recover():
+            print(f"⚠️  Rolled back interrupted transaction {txid}")
+
+    if args.rollback is not None:
+        try:
+            txid, results = rollback(args.rollback or None)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            sys.exit(1)
+        print(f"↩️  Rolled back transaction {txid}")
+        for path, error in results.items():
+            print(f"   {'❌' if error else '✅'} {path}{f': {error}' if error else ''}")
+        if any(results.values()):
+            sys.exit(1)
+        return
+
+    if args.watch:
+        from codemod.watch import watch
+        watch(args.paths or [PIPELINE], args.rules, poll=args.poll)
+        return
+
+    if args.apply:
+        apply_saved(args.apply, write=not args.dry_run)
+        return
+
+    if args.no_cache:
+        cache = None
+    else:
+        from codemod.cache import Cache, run_cached
+        cache = Cache()
+    profiling = None
+    if args.profile or args.trace_memory or args.trace:
+        from codemod.profiling import Profiling, write_trace
+        profiling = Profiling(args.profile, args.trace_memory) if args.profile or args.trace_memory else None
+    # Compile the rules once, up front, and report order conflicts before
+    # any file is touched
+    from codemod.schedule import format_conflicts, format_schedule, schedule_for
+    rules_schedule = schedule_for(get_rules(args.rules))
+    if args.schedule:
+        print(format_schedule(rules_schedule))
+        return
+    for line in format_conflicts(rules_schedule):
+        print(line)
+
+    if args.tree:
+        from codemod.checkpoint import Checkpoint
+        from codemod.tree import DEFAULT_GLOBS, format_tree_report, run_tree
+        checkpoint = None
+        if not args.dry_run:
+            checkpoint = Checkpoint()
+            if args.restart:
+                checkpoint.discard()
+        report = run_tree(args.paths or DEFAULT_GLOBS, args.rules, write=not args.dry_run, workers=args.jobs,
+                          cache=cache, stream=args.stream, profiling=profiling, checkpoint=checkpoint)
+        print(format_tree_report(report))
+        finish_plans(report.files, args)
+        if args.trace:
+            write_trace(report.files, args.trace, report.errors)
+            print(f"📄 Trace written to {args.trace}")
+        return
+
+    # Every path is staged first and all of them are committed together
+    transaction = Transaction()
+    reports = []
+    try:
+        for path in args.paths or [PIPELINE]:
+            if cache is None:
+                run = run_file_streaming if args.stream else run_file
+                report = run(path, args.rules, write=not args.dry_run, commit=False, profiling=profiling)
+            else:
+                report = run_cached(path, args.rules, write=not args.dry_run, cache=cache, stream=args.stream,
+                                    commit=False, profiling=profiling)
+            transaction.add(report.staged)
+            reports.append(report)
+            print(format_report(report))
+    except BaseException:
+        transaction.abort()
+        raise
+    finish_plans(reports, args)
+    txid = commit(transaction)
+    if txid:
+        print(f"💾 transaction {txid} (roll back with: python3 -m codemod --rollback {txid})")
+    if cache is not None:
+        cache.save()
+    if args.trace:
+        write_trace(reports, args.trace)
+        print(f"📄 Trace written to {args.trace}")
+
+
+def finish_plans(reports, args):
+    # Diffs for a dry run (against the files as they still are) and the
+    # saved plan, if asked for
+    from codemod.plan import diff_file, save_plans
+
+    plans = [report.plan for report in reports if report.plan is not None]
+    if args.dry_run:
+        for plan in plans:
+            sys.stdout.write(diff_file(plan))
+    if args.plan:
+        save_plans(plans, args.plan)
+        print(f"📄 {len(plans)} plan(s) written to {args.plan} (apply with: python3 -m codemod --apply {args.plan})")
+
+
+def apply_saved(path, write=True):
+    # All or nothing, like a tree run: one stale file and nothing is written
+    from codemod.plan import diff_file, load_plans
+
+    transaction = Transaction()
+    errors = {}
+    for plan in load_plans(path):
+        try:
+            report = run_plan(plan, write=write, commit=False)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            errors[plan.path] = str(e)
+            print(f"❌ {plan.path}: {e}")
+            continue
+        transaction.add(report.staged)
+        print(format_report(report))
+        if not write:
+            sys.stdout.write(diff_file(plan))
+    if errors:
+        transaction.abort()
+        print("❌ nothing written: every planned file must still match its plan")
+        sys.exit(1)
+    txid = commit(transaction)
+    if txid:
+        print(f"💾 transaction {txid} (roll back with: python3 -m codemod --rollback {txid})")
+
+
+def commit(transaction):
+    # Exits, having written nothing, if a file was edited while it was staged
+    try:
+        return transaction.commit()
+    except StaleError as e:
+        print(f"❌ nothing written: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
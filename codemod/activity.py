@@ -0,0 +1,8 @@
+# Activity timeline rewrites for app/(tabs)/pipeline.tsx.
+#
+# The rules themselves (anchors, templates and the StyleSheet keys they
+# extend) are declared in codemod/rules/activity.toml; this module keeps the
+# file they were written for, which is the default target of the CLI and the
+# wrapper scripts.
+
+PIPELINE = 'app/(tabs)/pipeline.tsx'
@@ -0,0 +1,244 @@
+# Benchmarks for the registered rules on synthetic pipeline-style TSX.
+#
+# python3 -m codemod.bench [--sizes 1000,10000,100000] [--nesting 200]
+#
+# Each size runs in a fresh interpreter so peak RSS is per case. For every
+# rule the plan (matching, with empty scanner/anchor caches) and applying the
+# planned edits to the text (rewrite) are timed separately. The whole rule
+# chain is also timed through run_file_streaming() on a temp copy.
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+
+DEFAULT_SIZES = (1000, 10000, 50000, 100000)
+DEFAULT_OUTPUT = os.path.join('.codemod-cache', 'bench.json')
+
+_HEADER = '''import { ArrowRight, Calendar, Eye, FileText, Mail, Phone } from 'lucide-react-native';
+import React, { useState } from 'react';
+import { ScrollView, StyleSheet, Text, TouchableOpacity, View } from 'react-native';
+
+export default function Pipeline() {
+  const [activeTab, setActiveTab] = useState('Overview');
+  const [activityFilter, setActivityFilter] = useState('all');
+
+  const renderTabContent = () => {
+    switch (activeTab) {
+'''
+
+_CASE = '''      case 'Tab{n}':
+        return (
+          <View style={{styles.section{n}}}>
+            <Text style={{styles.sectionTitle}}>Section {n} isn't empty</Text>
+            {{items{n}.filter(item => item.visible).map((item, index) => (
+              <TouchableOpacity key={{index}} style={{[styles.row{n}, {{ marginTop: index * 2 }}]}} onPress={{() => setActiveTab(`Tab${{item.id}}`)}}>
+                <Text style={{styles.rowText{n}}}>{{item.label}} / {{item.count > 1 ? 'items' : 'item'}}</Text>
+              </TouchableOpacity>
+            ))}}
+          </View>
+        );
+'''
+
+_FOOTER = '''      default:
+        return null;
+    }
+  };
+
+  return <View style={styles.container}>{renderTabContent()}</View>;
+}
+
+const styles = StyleSheet.create({
+'''
+
+_STYLE = '''  section{n}: {{
+    marginBottom: {n},
+    padding: 16,
+  }},
+'''
+
+_ACTIVITY_STYLES = '''  activityDate: {
+    fontSize: 12,
+    color: '#9CA3AF',
+  },
+  activityDescription: {
+    fontSize: 13,
+    color: '#6B7280',
+    lineHeight: 18,
+  },
+'''
+
+
+def _adversarial_case(nesting):
+    # Deeply nested JSX expressions and object literals, plus a long run of
+    # closing braces: worst cases for `[^}]+}`-style patterns
+    opens = ''.join('{flag && (<View>' for _ in range(nesting))
+    closes = ''.join('</View>)}' for _ in range(nesting))
+    deep = 'x: {' * nesting + '1' + '}' * nesting
+    return (
+        "      case 'Nested':\n"
+        "        return (\n"
+        f"          <View style={{[styles.section0, {{ {deep} }}]}}>\n"
+        f"            {opens}<Text>deep</Text>{closes}\n"
+        "          </View>\n"
+        "        );\n"
+    )
+
+
+def generate_tsx(lines, nesting=0):
+    from codemod.rulefiles import rule_table
+
+    parts = [_HEADER, rule_table('fix_activity_section')['edit'][0]['anchor'], '\n']
+    if nesting:
+        parts.append(_adversarial_case(nesting))
+    body = sum(part.count('\n') for part in parts) + _FOOTER.count('\n')
+    case_lines = _CASE.count('\n')
+    style_lines = _STYLE.count('\n')
+
+    # ~60% switch cases, ~40% StyleSheet entries
+    budget = max(lines - body - _ACTIVITY_STYLES.count('\n') - 1, 0)
+    cases = int(budget * 0.6) // case_lines
+    styles = (budget - cases * case_lines) // style_lines
+    parts.extend(_CASE.format(n=n) for n in range(cases))
+    parts.append(_FOOTER)
+    parts.extend(_STYLE.format(n=n) for n in range(styles // 2))
+    parts.append(_ACTIVITY_STYLES)
+    parts.extend(_STYLE.format(n=n) for n in range(styles // 2, styles))
+    parts.append('});\n')
+    return ''.join(parts)
+
+
+def _clear_caches():
+    from codemod import matcher, scanner
+    scanner.scan.cache_clear()
+    matcher._find_all.cache_clear()
+
+
+def _time_rule(rule, text, repeat):
+    from codemod.engine import apply_edits
+
+    best_match = best_rewrite = float('inf')
+    edits = []
+    for _ in range(repeat):
+        _clear_caches()
+        start = time.perf_counter()
+        edits = rule.plan(text)
+        match = time.perf_counter() - start
+
+        start = time.perf_counter()
+        apply_edits(text, edits)
+        rewrite = time.perf_counter() - start
+        best_match, best_rewrite = min(best_match, match), min(best_rewrite, rewrite)
+
+    # Allocation peak on a separate cold run; tracemalloc skews the timings
+    _clear_caches()
+    tracemalloc.start()
+    rule.apply(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'matches': len(edits),
+        'total_ms': (best_match + best_rewrite) * 1000,
+        'match_ms': best_match * 1000,
+        'rewrite_ms': best_rewrite * 1000,
+        'peak_alloc_kb': peak // 1024,
+    }
+
+
+def _time_call(func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        _clear_caches()
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _time_stream(text, repeat):
+    from codemod.engine import run_file_streaming
+
+    best = float('inf')
+    with tempfile.TemporaryDirectory(prefix='codemod-bench-') as directory:
+        path = os.path.join(directory, 'bench.tsx')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        for _ in range(repeat):
+            _clear_caches()
+            start = time.perf_counter()
+            run_file_streaming(path, write=False)
+            best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run_case(lines, nesting, repeat):
+    from codemod import get_rules, matcher, scanner
+
+    # Compiling the rules registers their anchors with the matcher
+    rules = get_rules()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    text = generate_tsx(lines, nesting)
+    result = {
+        'lines': text.count('\n'),
+        'bytes': len(text.encode('utf-8')),
+        'nesting': nesting,
+        'scan_ms': _time_call(scanner.scan, text, repeat),
+        'anchors_ms': _time_call(matcher._find_all, text, repeat),
+        'rules': {rule.name: _time_rule(rule, text, repeat) for rule in rules},
+        'stream_ms': _time_stream(text, repeat),
+    }
+    # ru_maxrss is in KiB on Linux
+    result['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result['rss_growth_kb'] = result['peak_rss_kb'] - baseline
+    return result
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, nesting=200, repeat=3):
+    # One fresh interpreter per case keeps peak RSS from leaking across sizes
+    context = multiprocessing.get_context('spawn')
+    cases = [(lines, 0) for lines in sizes] + ([(lines, nesting) for lines in sizes] if nesting else [])
+    results = []
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for lines, depth in cases:
+            results.append(pool.apply(run_case, (lines, depth, repeat)))
+    return results
+
+
+def format_results(results):
+    lines = [f"{'lines':>8} {'nest':>5} {'rss MB':>7}  {'scan':>8} {'anchors':>8} {'stream':>8}  rule (match / rewrite ms)"]
+    for result in results:
+        rules = '  '.join(
+            f"{name} {stats['match_ms']:.1f}/{stats['rewrite_ms']:.1f}"
+            for name, stats in result['rules'].items()
+        )
+        lines.append(
+            f"{result['lines']:>8} {result['nesting']:>5} {result['peak_rss_kb'] / 1024:>7.1f}  "
+            f"{result['scan_ms']:>8.1f} {result['anchors_ms']:>8.1f} {result['stream_ms']:>8.1f}  {rules}"
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='codemod.bench', description='Benchmark codemod rules on synthetic TSX.')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='comma-separated line counts')
+    parser.add_argument('--nesting', type=int, default=200, help='depth of the adversarial nested-brace case (0 to skip)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, best is kept')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'JSON results file (default: {DEFAULT_OUTPUT})')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = run_benchmarks(sizes, args.nesting, args.repeat)
+    print(format_results(results))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'created': time.time(), 'results': results}, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# Helpers that let rules plan edits on either decoded text (str) or the raw
+# bytes of a file (bytes / mmap, used by the streaming path). Offsets are
+# always in the buffer's own units: characters for str, bytes otherwise.
+
+import re
+import sys
+import weakref
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+
+def is_text(buf):
+    return isinstance(buf, str)
+
+
+def literal(buf, s):
+    # `s` in the same type as `buf`
+    return s if isinstance(buf, str) else s.encode('utf-8')
+
+
+def find(buf, s, start=0, end=None):
+    return buf.find(literal(buf, s), start, len(buf) if end is None else end)
+
+
+def contains(buf, s):
+    # mmap's `in` only tests single bytes, so go through find()
+    return find(buf, s) >= 0
+
+
+def decode(chunk):
+    return chunk if isinstance(chunk, str) else bytes(chunk).decode('utf-8')
+
+
+def text_slice(buf, start, end):
+    return decode(buf[start:end])
+
+
+def char(buf, pos):
+    # One character (str) or byte (latin-1 decoded) as a str, '' out of range
+    c = buf[pos:pos + 1]
+    return c if isinstance(c, str) else c.decode('latin-1')
+
+
+@lru_cache(maxsize=256)
+def _compile(pattern, flags, binary):
+    return re.compile(pattern.encode('utf-8') if binary else pattern, flags)
+
+
+def compile_for(buf, pattern, flags=0):
+    # `pattern` compiled for str or bytes depending on `buf`
+    return _compile(pattern, flags, not isinstance(buf, str))
+
+
+def memoize_buffer(maxsize=16, maxbytes=8 << 20):
+    # LRU cache for str/bytes arguments, bounded both by entry count and by
+    # the total size of the buffers it keeps alive (results such as a scanner
+    # index hold on to their text, so a content hash as the key would not
+    # free it). The most recent entry is always kept, however large. Mutable
+    # buffers such as mmap are remembered by identity in a single weakly
+    # referenced slot, so an index never outlives the mapping it was built
+    # from. wrapper.prime(buf, result) stores a result computed elsewhere
+    # (e.g. updated incrementally).
+    def decorator(func):
+        entries = OrderedDict()
+        held = [0]
+        last = [None, None]
+
+        @wraps(func)
+        def wrapper(buf):
+            if isinstance(buf, (str, bytes)):
+                if buf in entries:
+                    entries.move_to_end(buf)
+                    return entries[buf]
+                result = func(buf)
+                store(buf, result)
+                return result
+            if last[0] is not None and last[0]() is buf:
+                return last[1]
+            result = func(buf)
+            remember(buf, result)
+            return result
+
+        def store(buf, result):
+            if buf in entries:
+                entries.move_to_end(buf)
+            else:
+                held[0] += sys.getsizeof(buf)
+            entries[buf] = result
+            while len(entries) > 1 and (len(entries) > maxsize or held[0] > maxbytes):
+                old, _ = entries.popitem(last=False)
+                held[0] -= sys.getsizeof(old)
+
+        def remember(buf, result):
+            try:
+                last[0], last[1] = weakref.ref(buf, lambda ref: last.__setitem__(slice(0, 2), [None, None])), result
+            except TypeError:
+                pass
+
+        def prime(buf, result):
+            if isinstance(buf, (str, bytes)):
+                store(buf, result)
+            else:
+                remember(buf, result)
+
+        def cache_info():
+            # (entries, bytes held)
+            return len(entries), held[0]
+
+        def cache_clear():
+            entries.clear()
+            held[0] = 0
+            last[0] = last[1] = None
+
+        wrapper.prime = prime
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
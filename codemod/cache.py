@@ -0,0 +1,129 @@
+# Persistent result cache under .codemod-cache/.
+#
+# A file is recorded once a run leaves it unchanged, i.e. it is a fixed point
+# of the rule chain. Entries are keyed by a hash of the rule versions and the
+# path: if the file's size and mtime still match, the file is not even read,
+# and if only the stat changed, its content hash decides. The rule versions
+# include the source of the whole codemod package (modules and rule files):
+# rules run through helpers shared with other rules, and editing any of
+# them may change what a rule produces.
+
+import hashlib
+import json
+import os
+import sys
+
+from codemod.engine import FileReport, get_rules, run_file, run_file_streaming
+
+CACHE_DIR = '.codemod-cache'
+INDEX_NAME = 'index.json'
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_versions = {}
+_package = {}
+
+
+def _source_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def package_hash(directory=PACKAGE_DIR):
+    # Hash of every .py and .toml file under `directory`, by relative path
+    if directory not in _package:
+        hasher = hashlib.sha256()
+        for parent, dirs, names in os.walk(directory):
+            dirs[:] = sorted(name for name in dirs if name != '__pycache__')
+            for name in sorted(names):
+                if name.endswith(('.py', '.toml')):
+                    path = os.path.join(parent, name)
+                    hasher.update(f'{os.path.relpath(path, directory)}\0{_source_hash(path)}\0'.encode())
+        _package[directory] = hasher.hexdigest()
+    return _package[directory]
+
+
+def rule_version(rule):
+    # Hash of the rule's name, explicit version and the module it lives in
+    # (which may be outside the package), so editing a template or the
+    # rule's logic invalidates its entries
+    if rule.name not in _versions:
+        module = sys.modules[rule.func.__module__]
+        parts = [rule.name, rule.version, _source_hash(module.__file__)]
+        _versions[rule.name] = hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+    return _versions[rule.name]
+
+
+def rules_key(rules):
+    parts = [package_hash()]
+    parts.extend(rule_version(rule) for rule in rules)
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()[:16]
+
+
+class Cache:
+    def __init__(self, root='.'):
+        self.dir = os.path.join(root, CACHE_DIR)
+        self.path = os.path.join(self.dir, INDEX_NAME)
+        self.entries = self._load()
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def entry(self, path, key):
+        return self.entries.get(key, {}).get(os.path.normpath(path))
+
+    def is_fresh(self, path, key):
+        entry = self.entry(path, key)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+
+    def known_digest(self, path, key):
+        entry = self.entry(path, key)
+        return entry['sha256'] if entry else None
+
+    def record(self, report, key):
+        files = self.entries.setdefault(key, {})
+        path = os.path.normpath(report.path)
+        if report.changed:
+            # Rules are not guaranteed to be idempotent, so only fixed points
+            # are remembered
+            if files.pop(path, None) is not None:
+                self.dirty = True
+        elif report.digest:
+            files[path] = {'sha256': report.digest, 'size': report.size, 'mtime_ns': report.mtime_ns}
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def run_cached(path, names=None, write=True, cache=None, stream=False, commit=True, profiling=None):
+    own_cache = cache is None
+    cache = cache or Cache()
+    key = rules_key(get_rules(names))
+
+    if cache.is_fresh(path, key):
+        return FileReport(path, cached=True)
+
+    run = run_file_streaming if stream else run_file
+    report = run(path, names, write=write, known_digest=cache.known_digest(path, key), commit=commit, profiling=profiling)
+    cache.record(report, key)
+    if own_cache:
+        cache.save()
+    return report
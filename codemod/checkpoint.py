@@ -0,0 +1,155 @@
+# Checkpoint of a tree run in progress, so an interrupted run can resume.
+#
+# A tree run stages every rewrite in a temp file and commits them all at the
+# end (codemod.tree); killed half-way, it used to lose the work of every
+# file it had finished. The checkpoint, .codemod-cache/checkpoint.jsonl, is
+# appended to as each file finishes: its hash and stat as it was read, and
+# for a rewrite the staged temp file with the hash of the output and the
+# undo steps the journal needs. The first line names the run (rules key,
+# globs, mode); the next run with the same name takes the finished files
+# from it instead of running them again, as long as
+#
+#   - the file still has the stat it was read with, or else the same hash
+#     (touched but not edited), and
+#   - its temp file still holds the output.
+#
+# A file edited by hand since is queued again and its stale output dropped.
+# One flushed line per file keeps the checkpoint compact and a crash loses at
+# most the files in flight; it is removed once the run commits.
+
+import json
+import os
+from dataclasses import asdict
+
+from codemod.cache import CACHE_DIR
+from codemod.engine import FileReport
+from codemod.journal import Staged, _digest_file
+
+CHECKPOINT_NAME = 'checkpoint.jsonl'
+# Bumped when what is recorded per file changes
+FORMAT = 2
+
+
+class Checkpoint:
+    def __init__(self, root='.'):
+        self.path = os.path.join(root, CACHE_DIR, CHECKPOINT_NAME)
+        self.header = None
+        # {path: entry} of the files the checkpoint has finished
+        self.entries = {}
+        self._file = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.read().split('\n')
+        except OSError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by the interruption
+                continue
+            if self.header is None:
+                self.header = record
+            else:
+                self.entries[record['path']] = record
+
+    def start(self, key, patterns, stream):
+        # Resume the checkpointed run if it was the same one, else drop it
+        # and start a new one
+        header = {'format': FORMAT, 'key': key, 'patterns': sorted(patterns), 'stream': stream}
+        if self.header != header:
+            self.discard()
+            self.header = header
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'a')
+        if not self.entries:
+            self._file.truncate(0)
+            self._write(header)
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _drop(self, path):
+        staged = self.entries.pop(path)['staged']
+        if staged is not None:
+            try:
+                os.unlink(staged['temp'])
+            except FileNotFoundError:
+                pass
+
+    def resume(self, paths):
+        # (reports of the files among `paths` the checkpoint finished, paths
+        # edited since it finished them); everything else it had is dropped
+        finished = []
+        edited = []
+        wanted = set(paths)
+        for path in list(self.entries):
+            entry = self.entries[path]
+            if path not in wanted:
+                self._drop(path)
+            elif not _unchanged(entry):
+                edited.append(path)
+                self._drop(path)
+            elif entry['staged'] is not None and not _holds(entry['staged']):
+                self._drop(path)
+            else:
+                staged = Staged(**entry['staged']) if entry['staged'] is not None else None
+                finished.append(FileReport(
+                    path, changed=entry['changed'], digest=staged.after if staged is not None else entry['digest'], size=entry['size'],
+                    mtime_ns=entry['mtime_ns'], staged=staged, resumed=True,
+                ))
+        return finished, sorted(edited)
+
+    def record(self, report):
+        # The hash of the file as it was read: for a rewrite report.digest
+        # is already that of the output
+        entry = {
+            'path': report.path, 'digest': report.staged.before if report.staged is not None else report.digest,
+            'size': report.size, 'mtime_ns': report.mtime_ns,
+            'changed': report.changed, 'staged': asdict(report.staged) if report.staged is not None else None,
+        }
+        self.entries[report.path] = entry
+        self._write(entry)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        # The run committed (or aborted) its staged files: nothing to resume
+        self.close()
+        self.entries = {}
+        self.header = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def discard(self):
+        # Forget the checkpointed run and the output it staged
+        for path in list(self.entries):
+            self._drop(path)
+        self.finish()
+
+
+def _unchanged(entry):
+    try:
+        stat = os.stat(entry['path'])
+        if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+        return _digest_file(entry['path']) == entry['digest']
+    except OSError:
+        return False
+
+
+def _holds(staged):
+    try:
+        return _digest_file(staged['temp']) == staged['after']
+    except OSError:
+        return False
@@ -0,0 +1,13 @@
+# Cleanup planners that apply to any file, not tied to one screen; declared
+# as rules in codemod/rules/cleanup.toml.
+
+from codemod.buffers import contains
+from codemod.styles import dedupe_styles
+
+
+def dedupe_style_keys(buf):
+    # Duplicate StyleSheet keys: only the last one ever took effect, so the
+    # earlier ones are dropped
+    if not contains(buf, 'StyleSheet.create'):
+        return []
+    return dedupe_styles(buf)
@@ -0,0 +1,702 @@
+# Copy-pasted JSX subtrees, and their extraction into components.
+#
+# Every JSX element is fingerprinted from its normalized tokens: whitespace
+# and comments are dropped, and what typically differs between copies of the
+# same block becomes a hole that only records its kind: string and number
+# literals, JSX text, the whole value of a style attribute and the tag of a
+# self-closing component (the icon of a row). One pass per file tokenizes the
+# text and keeps polynomial prefix hashes of the token stream, so the hash of
+# any element's token range is O(1) (Rabin-Karp): the whole tree is
+# fingerprinted in time linear in its size. Elements of at least MIN_BYTES
+# and MIN_ELEMENTS tags with the same fingerprint form a cluster; clusters
+# implied by a bigger one (each copy is the child of a copy of the bigger
+# cluster) are not reported, and the rest are ranked by the bytes extracting
+# them would save.
+#
+# The extract_duplicate_subtrees rule handles the common case: MIN_RUN or
+# more copies next to each other in one parent (comments between them
+# allowed). The run becomes
+#
+#     {ACTIVITY_ITEMS.map((item, index) => <ActivityItem key={index} {...item} />)}
+#
+# with the holes that differ between the copies as props: the component and
+# the ACTIVITY_ITEMS array are added at the end of the file, where `styles`
+# is defined. Runs that refer to anything but module-level names (imports,
+# top-level declarations) are left alone.
+#
+# python3 -m codemod.duplicates [--top N] [-j N] [GLOB ...] ranks the clusters
+# across the tree and marks the ones the rule extracts.
+
+import argparse
+import os
+import re
+import time
+import zlib
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from codemod.buffers import char, compile_for, contains, decode, text_slice
+from codemod.hoist import _attribute_pairs
+from codemod.imports import find_imports
+from codemod.matcher import indent_at, reindent
+from codemod.scanner import scan
+from codemod.symbols import _DECLARATION, PRUNED_MODULES
+
+MIN_BYTES = 160
+MIN_ELEMENTS = 3
+MIN_RUN = 3
+# Polynomial hash of the token stream, modulo a Mersenne prime
+_MOD = (1 << 61) - 1
+_BASE = 1_000_003
+_HOLES = ('string', 'number', 'text', 'style', 'tag')
+_HOLE_HASH = {kind: zlib.crc32(f'\0{kind}'.encode()) for kind in _HOLES}
+
+_CODE_TOKEN = r'[A-Za-z_$][\w$]*|\d[\w.]*|\.\d\w*|\.\.\.|\?\.|=>|[=!]==?|\S'
+_IDENT = re.compile(r'[A-Za-z_$][\w$]*')
+_STYLE_KEY = re.compile(r'styles\.([\w$]+)')
+_BASE_STYLE = r'(?<![\w$.])style\s*=\s*\{\s*\[?\s*styles\.([\w$]+)'
+_ATTRIBUTE_BEFORE = re.compile(r'([\w$]+)\s*=\s*\{?\s*$')
+_KEY_BEFORE = re.compile(r'([\w$]+)\s*:\s*$')
+_COMMENT_ONLY = re.compile(r'\s*(/\*.*?\*/)\s*', re.DOTALL)
+_KEY_ATTRIBUTE = r'(?<![\w$.-])key\s*='
+# Names a moved subtree may use besides the module's own
+_GLOBALS = {
+    'true', 'false', 'null', 'undefined', 'NaN', 'Infinity', 'typeof', 'new', 'void', 'in', 'of', 'instanceof',
+    'Math', 'String', 'Number', 'Boolean', 'Date', 'JSON', 'Object', 'Array', 'console', 'parseInt', 'parseFloat',
+}
+_RESERVED = {'key', 'item', 'index', 'default', 'new', 'class', 'function', 'return', 'delete', 'in', 'this'}
+
+_powers = [1]
+
+
+def _power(n):
+    while len(_powers) <= n:
+        _powers.append(_powers[-1] * _BASE % _MOD)
+    return _powers[n]
+
+
+def _crc(chunk):
+    return zlib.crc32(chunk.encode() if isinstance(chunk, str) else bytes(chunk))
+
+
+def _jsx_text(raw):
+    # What JSX renders for a text child: lines trimmed, blank ones dropped
+    return ' '.join(line.strip() for line in raw.split('\n') if line.strip())
+
+
+def _squash(text):
+    return ' '.join(text.split())
+
+
+class Fingerprints:
+    # Normalized tokens of a file (or of the `spans` of it), (kind, start,
+    # end), and their prefix hashes
+    def __init__(self, text, index=None, spans=None):
+        self.text = text
+        self.index = scan(text) if index is None else index
+        index = self.index
+        self.elem_starts = [elem.start for elem in index.elements]
+        # Where JSX text may start: after an opening tag, a child element or
+        # a child expression
+        self._text_starts = {elem.open_end for elem in index.elements if elem.open_end >= 0 and not elem.self_closing}
+        self._text_starts.update(elem.end for elem in index.elements if elem.parent >= 0 and elem.end >= 0)
+        self._text_starts.update(pair.close + 1 for pair in index.pairs if pair.close >= 0)
+        self._closes = {pair.close: pair for pair in index.pairs if pair.close >= 0}
+        # Style attribute values and self-closing component tags are holes
+        self._styles = {pair.open: pair.close for pair in _attribute_pairs(text, index)}
+        self._tags = {elem.start for elem in index.elements
+                      if elem.self_closing and elem.name[:1].isupper() and '.' not in elem.name}
+        self.tokens = [token for start, end in spans or [(0, len(text))] for token in self._normalized(start, end)]
+        self.starts = [token[1] for token in self.tokens]
+        self.prefix = [0]
+        for kind, start, end in self.tokens:
+            value = _crc(text[start:end]) if kind == 'code' else _HOLE_HASH[kind]
+            self.prefix.append((self.prefix[-1] * _BASE + value) % _MOD)
+
+    def _mask_kind(self, start):
+        text = self.text
+        if start in self._text_starts:
+            pair = self._closes.get(start - 1)
+            # After `${...}` the chunk is still the template literal's
+            if pair is None or char(text, pair.open - 1) != '$' or self.index.is_code(pair.open - 1):
+                return 'text'
+        c = char(text, start)
+        if c in ('"', "'"):
+            return 'string'
+        if c == '/' and char(text, start + 1) in ('/', '*'):
+            return 'comment'
+        return 'code'
+
+    def raw(self, start=0, end=None):
+        # Tokens of text[start:end] before holes are merged: code tokens
+        # (numbers apart), strings, JSX text and comments
+        text = self.text
+        end = len(text) if end is None else end
+        masked = self.index.masked
+        token = compile_for(text, _CODE_TOKEN)
+        k = max(0, bisect_right(masked, (start, float('inf'))) - 1)
+        pos = start
+        while pos < end:
+            while k < len(masked) and masked[k][1] <= pos:
+                k += 1
+            mask_start, mask_end = masked[k] if k < len(masked) else (end, end)
+            for m in token.finditer(text, pos, min(mask_start, end)):
+                c = char(text, m.start())
+                number = c.isdigit() or c == '.' and char(text, m.start() + 1).isdigit()
+                yield 'number' if number else 'code', m.start(), m.end()
+            if mask_start >= end:
+                return
+            yield self._mask_kind(mask_start), mask_start, mask_end
+            pos = mask_end
+
+    def _normalized(self, start, end):
+        skip = -1
+        tag = False
+        for kind, first, last in self.raw(start, end):
+            if first < skip or kind == 'comment':
+                continue
+            if kind == 'code' and tag:
+                kind = 'tag'
+            tag = kind == 'code' and first in self._tags
+            yield kind, first, last
+            if first in self._styles:
+                skip = self._styles[first]
+                yield 'style', first + 1, skip
+
+    def span(self, elem):
+        return bisect_left(self.starts, elem.start), bisect_left(self.starts, elem.end)
+
+    def key(self, elem):
+        i, j = self.span(elem)
+        return (self.prefix[j] - self.prefix[i] * _power(j - i)) % _MOD, j - i
+
+    def shape(self, elem):
+        # Exact normalized token sequence, to rule out hash collisions
+        i, j = self.span(elem)
+        return tuple((kind, text_slice(self.text, start, end) if kind == 'code' else '') for kind, start, end in self.tokens[i:j])
+
+    def value(self, token):
+        kind, start, end = token
+        raw = text_slice(self.text, start, end)
+        if kind == 'text':
+            return _jsx_text(raw)
+        return _squash(raw) if kind == 'style' else raw
+
+    def holes(self, elem):
+        i, j = self.span(elem)
+        return [token for token in self.tokens[i:j] if token[0] != 'code']
+
+    def descendants(self, elem):
+        return bisect_left(self.elem_starts, elem.end) - bisect_right(self.elem_starts, elem.start)
+
+
+@dataclass
+class Subtree:
+    path: str
+    key: tuple
+    start: int
+    end: int
+    line: int
+    name: str
+    # Start of the parent element when it is a subtree too, else -1
+    parent: int = -1
+    # (crc32, length) of every hole's value, in order
+    holes: tuple = ()
+
+
+def _lines(text):
+    return [m.start() for m in compile_for(text, r'\n').finditer(text)]
+
+
+def subtrees(text, path='', prints=None):
+    # The elements of `text` big enough to be worth extracting
+    prints = Fingerprints(text) if prints is None else prints
+    elements = prints.index.elements
+    newlines = _lines(text)
+    big = {}
+    for elem in elements:
+        if elem.end >= 0 and elem.end - elem.start >= MIN_BYTES and prints.descendants(elem) >= MIN_ELEMENTS - 1:
+            values = [prints.value(token) for token in prints.holes(elem)]
+            holes = tuple((_crc(value), len(value)) for value in values)
+            big[elem.start] = Subtree(path, prints.key(elem), elem.start, elem.end, bisect_left(newlines, elem.start) + 1, elem.name, holes=holes)
+    for elem in elements:
+        if elem.start in big and elem.parent >= 0 and elements[elem.parent].start in big:
+            big[elem.start].parent = elements[elem.parent].start
+    return list(big.values())
+
+
+@dataclass
+class Cluster:
+    subtrees: list
+    # Indexes of the holes whose value differs between the copies
+    params: list = field(default_factory=list)
+    saved: int = 0
+
+    @property
+    def size(self):
+        return self.subtrees[0].end - self.subtrees[0].start
+
+    @property
+    def files(self):
+        return sorted({tree.path for tree in self.subtrees})
+
+
+def _estimate(cluster):
+    # Bytes saved by one component plus a data array and a map() per file:
+    # each copy is replaced by an item holding its varying values
+    trees = cluster.subtrees
+    total = sum(tree.end - tree.start for tree in trees)
+    component = total // len(trees) + 60 + 24 * len(cluster.params)
+    items = sum(6 + sum(12 + tree.holes[k][1] for k in cluster.params) for tree in trees)
+    return total - component - items - 70 * len(cluster.files)
+
+
+def find_clusters(found):
+    # Clusters of the subtrees in `found` (from any number of files), biggest
+    # saving first
+    groups = {}
+    for tree in found:
+        groups.setdefault(tree.key, []).append(tree)
+    keys = {(tree.path, tree.start): tree.key for tree in found}
+    clusters = []
+    for key, trees in groups.items():
+        if len(trees) < 2:
+            continue
+        parents = {keys.get((tree.path, tree.parent)) for tree in trees}
+        if len(parents) == 1 and None not in parents and len(groups[parents.pop()]) == len(trees):
+            continue
+        cluster = Cluster(sorted(trees, key=lambda tree: (tree.path, tree.start)))
+        cluster.params = [k for k in range(len(trees[0].holes)) if len({tree.holes[k][0] for tree in trees}) > 1]
+        cluster.saved = _estimate(cluster)
+        if cluster.saved > 0:
+            clusters.append(cluster)
+    clusters.sort(key=lambda cluster: -cluster.saved)
+    return clusters
+
+
+@dataclass
+class Extraction:
+    component: str
+    data: str
+    line: int
+    copies: int
+    props: list
+    # Exact bytes the edits remove
+    saved: int = 0
+    start: int = 0
+    end: int = 0
+
+
+@dataclass
+class DuplicateReport:
+    path: str
+    extracted: list = field(default_factory=list)
+    # (line, copies, reason) of runs left alone
+    skipped: list = field(default_factory=list)
+
+
+def _separator(text, index, start, end):
+    # The comments between two sibling elements, or None if anything but
+    # whitespace and {/* comments */} separates them
+    comments = []
+    pos = start
+    while pos < end:
+        c = char(text, pos)
+        if c.isspace():
+            pos += 1
+            continue
+        pair = index.pair_at(pos) if c == '{' else None
+        if pair is None or pair.close < 0 or pair.close >= end:
+            return None
+        m = _COMMENT_ONLY.fullmatch(text_slice(text, pos + 1, pair.close))
+        if m is None or '*/' in m.group(1)[:-2]:
+            return None
+        comments.append(m.group(1))
+        pos = pair.close + 1
+    return comments
+
+
+def _leading_comments(text, index, elem):
+    # {/* comments */} right before the first copy, which describe it
+    pos = elem.start
+    comments = []
+    while True:
+        prev = pos - 1
+        while prev >= 0 and char(text, prev).isspace():
+            prev -= 1
+        pair = index.enclosing_pair(prev, '{') if char(text, prev) == '}' else None
+        if pair is None or pair.close != prev:
+            return pos, comments
+        m = _COMMENT_ONLY.fullmatch(text_slice(text, pair.open + 1, pair.close))
+        if m is None or '*/' in m.group(1)[:-2]:
+            return pos, comments
+        comments.insert(0, m.group(1))
+        pos = pair.open
+
+
+def _split(text, index, elements, same):
+    # Runs of MIN_RUN or more of `elements` that sit next to each other and
+    # match the first of the run: ([element], [comments before each])
+    run, notes = [], []
+    for elem in elements + [None]:
+        comments = _separator(text, index, run[-1].end, elem.start) if run and elem is not None else None
+        if comments is not None and same(run[0], elem):
+            run.append(elem)
+            notes.append(comments)
+            continue
+        if len(run) >= MIN_RUN:
+            yield run, notes
+        run, notes = ([elem], [[]]) if elem is not None else ([], [])
+
+
+def _runs(text, index):
+    # Runs of big siblings with the same tag and as many descendants: the
+    # only places where same-shaped copies can sit next to each other
+    starts = [elem.start for elem in index.elements]
+
+    def descendants(elem):
+        return bisect_left(starts, elem.end) - bisect_right(starts, elem.start)
+
+    children = {}
+    for elem in index.elements:
+        if elem.parent >= 0 and elem.end - elem.start >= MIN_BYTES and descendants(elem) >= MIN_ELEMENTS - 1:
+            children.setdefault(elem.parent, []).append(elem)
+    for siblings in children.values():
+        yield from _split(text, index, siblings, lambda a, b: a.name == b.name and descendants(a) == descendants(b))
+
+
+def _merged(spans):
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _module_names(text, index, imports):
+    names = {found.default for found in imports if found.default}
+    names.update(spec.local for found in imports for spec in found.names)
+    for m in compile_for(text, _DECLARATION).finditer(text):
+        if index.is_code(m.start()) and index.enclosing_pair(m.start()) is None:
+            names.add(decode(m.group(1)))
+    return names
+
+
+def _free_names(text, prints, elem):
+    # Identifiers the element refers to that are not properties, object keys
+    # or attribute names
+    tokens = [(kind, text_slice(text, start, end)) for kind, start, end in prints.raw(elem.start, elem.end) if kind != 'comment']
+    names = set()
+    for k, (kind, value) in enumerate(tokens):
+        if kind != 'code' or not _IDENT.fullmatch(value) or value in _GLOBALS:
+            continue
+        before = tokens[k - 1][1] if k else ''
+        after = tokens[k + 1][1] if k + 1 < len(tokens) else ''
+        if before in ('.', '?.') or after == '=' or after == ':' and before in ('{', ','):
+            continue
+        names.add(value)
+    return names
+
+
+def _camel_words(name):
+    return re.findall(r'[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])', name)
+
+
+def _pascal(name):
+    return name[:1].upper() + name[1:]
+
+
+def _element_at(prints, pos):
+    # Innermost element whose children hold `pos`
+    elements = prints.index.elements
+    k = bisect_right(prints.elem_starts, pos) - 1
+    while k >= 0:
+        elem = elements[k]
+        if elem.open_end <= pos and (elem.close_start < 0 or pos < elem.close_start):
+            return elem
+        k = elem.parent
+    return None
+
+
+def _base_style(text, elem):
+    m = compile_for(text, _BASE_STYLE).search(text, elem.start, elem.open_end)
+    return decode(m.group(1)) if m else ''
+
+
+def _prop_name(text, prints, token, values, icons):
+    kind, start, end = token
+    before = text_slice(text, max(0, start - 64), start)
+    if kind == 'tag':
+        return 'icon' if all(value in icons for value in values) else 'component'
+    if kind == 'text':
+        elem = _element_at(prints, start)
+        base = _base_style(text, elem) if elem is not None else ''
+        return base or (f'{elem.name[:1].lower()}{elem.name[1:]}Text' if elem is not None else 'text')
+    if kind == 'style':
+        m = _STYLE_KEY.match(values[0].lstrip('[ '))
+        attribute = _ATTRIBUTE_BEFORE.search(before)
+        return f'{m.group(1)}Style' if m else attribute.group(1) if attribute else 'style'
+    m = _ATTRIBUTE_BEFORE.search(before) or _KEY_BEFORE.search(before)
+    return m.group(1) if m else 'value'
+
+
+def _strip_prefix(name, root):
+    # activityTime -> time in an activityItem: drop the words the name
+    # shares with the start of the root's style key
+    words, shared = _camel_words(name), _camel_words(root)
+    k = 0
+    while k < min(len(shared), len(words) - 1) and words[k].lower() == shared[k].lower():
+        k += 1
+    rest = ''.join(words[k:])
+    return rest[:1].lower() + rest[1:] if k and rest == name[-len(rest):] else name
+
+
+def _js_string(value):
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def _data_value(text, prints, token):
+    # The value of a hole as a JS expression for the data array
+    kind, start, end = token
+    value = prints.value(token)
+    if kind == 'text':
+        return _js_string(value) if '&' not in value else None
+    if kind == 'string' and _is_attribute(prints, start):
+        inner = value[1:-1]
+        return _js_string(inner) if '&' not in inner and '\n' not in inner else None
+    return value
+
+
+def _is_attribute(prints, pos):
+    # Whether the string at `pos` is an attribute value in an opening tag
+    elements = prints.index.elements
+    k = bisect_right(prints.elem_starts, pos) - 1
+    while k >= 0:
+        elem = elements[k]
+        if elem.start < pos < elem.open_end:
+            pair = prints.index.enclosing_pair(pos)
+            return pair is None or pair.open < elem.start
+        k = elem.parent
+    return False
+
+
+def _placeholder(text, prints, token, name):
+    kind, start, end = token
+    if kind == 'text':
+        raw = text[start:end]
+        lead = len(raw) - len(raw.lstrip())
+        return start + lead, start + len(raw.rstrip()), '{' + name + '}'
+    if kind == 'string' and _is_attribute(prints, start):
+        return start, end, '{' + name + '}'
+    if kind == 'tag':
+        return start, end, _pascal(name)
+    return start, end, name
+
+
+def _names(base, taken):
+    # Component and data array names not `taken` yet: ActivityItem /
+    # ACTIVITY_ITEMS, then ActivityItem2 / ACTIVITY_ITEMS_2
+    data = '_'.join(word.upper() for word in _camel_words(base)) + 'S'
+    n = 1
+    while True:
+        names = (base, data) if n == 1 else (f'{base}{n}', f'{data}_{n}')
+        if not any(name in taken for name in names):
+            return names
+        n += 1
+
+
+def _indent_unit(text, elem):
+    # How much the element's children are indented relative to it
+    base = indent_at(text, elem.start)
+    children = text[elem.open_end:elem.end]
+    nested = indent_at(text, elem.open_end + len(children) - len(children.lstrip()))
+    unit = nested[len(base):] if nested.startswith(base) else ''
+    return unit if unit.strip() == '' and unit else '  '
+
+
+def _extract(text, prints, run, notes, names, icons, report, taken, newlines):
+    # (edits, definitions) that replace `run` by a map over a data array
+    first = run[0]
+    line = bisect_left(newlines, first.start) + 1
+    if any(compile_for(text, _KEY_ATTRIBUTE).search(text, elem.start, elem.open_end) for elem in run):
+        report.skipped.append((line, len(run), 'copies already have a key'))
+        return None
+    free = set().union(*(_free_names(text, prints, elem) for elem in run)) - names
+    if free:
+        report.skipped.append((line, len(run), f"refers to {', '.join(sorted(free)[:3])} from the enclosing code"))
+        return None
+    holes = [prints.holes(elem) for elem in run]
+    comments = [[text_slice(text, start, end) for kind, start, end in prints.raw(elem.start, elem.end) if kind == 'comment'] for elem in run]
+    if any(found != comments[0] for found in comments):
+        report.skipped.append((line, len(run), 'copies carry different comments'))
+        return None
+
+    root = _base_style(text, first)
+    props, values, used = [], [], set()
+    for k, token in enumerate(holes[0]):
+        column = [prints.value(found[k]) for found in holes]
+        if len(set(column)) == 1:
+            continue
+        items = [_data_value(text, prints, found[k]) for found in holes]
+        if None in items:
+            report.skipped.append((line, len(run), 'a varying text uses HTML entities or spans lines'))
+            return None
+        name = _strip_prefix(_prop_name(text, prints, token, column, icons), root)
+        if name in _RESERVED:
+            name += 'Value'
+        candidate, n = name, 2
+        while candidate in used:
+            candidate, n = f'{name}{n}', n + 1
+        used.add(candidate)
+        props.append((k, candidate))
+        values.append(items)
+    if not props:
+        report.skipped.append((line, len(run), 'copies are identical'))
+        return None
+
+    component, data = _names(_pascal(root) if root else f'{first.name}Item', taken)
+
+    # The first copy with its varying holes replaced by the props
+    body = []
+    pos = first.start
+    for start, end, replacement in sorted(_placeholder(text, prints, holes[0][k], name) for k, name in props):
+        body.append(text_slice(text, pos, start))
+        body.append(replacement)
+        pos = end
+    body.append(text_slice(text, pos, first.end))
+    unit = _indent_unit(text, first)
+    template = unit + reindent(indent_at(text, first.start) + ''.join(body), unit)
+    start, leading = _leading_comments(text, prints.index, first)
+    notes[0][:0] = leading
+    params = ', '.join(f'{name}: {_pascal(name)}' if holes[0][k][0] == 'tag' else name for k, name in props)
+    items = []
+    for j, elem in enumerate(run):
+        items.extend(f'{unit}{comment}' for comment in notes[j])
+        items.append(unit + '{ ' + ', '.join(f'{name}: {values[p][j]}' for p, (_, name) in enumerate(props)) + ' },')
+    definitions = (f'const {data} = [\n' + '\n'.join(items) + '\n];\n\n'
+                   f'const {component} = ({{ {params} }}: (typeof {data})[number]) => (\n{template}\n);\n')
+
+    replacement = f'{{{data}.map((item, index) => <{component} key={{index}} {{...item}} />)}}'
+    found = Extraction(component, data, line, len(run), [name for _, name in props], start=start, end=run[-1].end)
+    found.saved = (found.end - start) - len(replacement) - len(definitions) - 1
+    if found.saved < MIN_BYTES:
+        report.skipped.append((line, len(run), f'extracting would save {max(found.saved, 0)} B only'))
+        return None
+    taken.update((component, data))
+    report.extracted.append(found)
+    return (start, run[-1].end, replacement), definitions
+
+
+def plan_duplicates(text, path=''):
+    # (edits, DuplicateReport)
+    report = DuplicateReport(path)
+    index = scan(text)
+    candidates = list(_runs(text, index)) if not index.errors else []
+    if not candidates:
+        return [], report
+    # Only the candidate runs are tokenized
+    prints = Fingerprints(text, index, _merged((run[0].start, run[-1].end) for run, _ in candidates))
+
+    def same(a, b):
+        return prints.key(a) == prints.key(b) and prints.shape(a) == prints.shape(b)
+
+    runs = sorted((exact for run, _ in candidates for exact in _split(text, index, run, same)), key=lambda run: run[0][0].start)
+    imports = find_imports(text)
+    names = _module_names(text, index, imports)
+    icons = {spec.local for found in imports if found.module in PRUNED_MODULES for spec in found.names}
+    # Every word of the file, so new names shadow nothing
+    taken = {decode(word) for word in compile_for(text, _IDENT.pattern).findall(text)}
+    newlines = _lines(text)
+    edits, definitions = [], []
+    covered = -1
+    for run, notes in runs:
+        if run[0].start < covered:
+            continue
+        planned = _extract(text, prints, run, notes, names, icons, report, taken, newlines)
+        if planned is None:
+            continue
+        edit, block = planned
+        edits.append(edit)
+        definitions.append(block)
+        covered = edit[1]
+    if definitions:
+        end = len(text)
+        newline = '' if text_slice(text, end - 1, end) == '\n' else '\n'
+        edits.append((end, end, newline + '\n' + '\n'.join(definitions)))
+    return edits, report
+
+
+def extract_duplicate_subtrees(buf):
+    if not contains(buf, '</'):
+        return []
+    return plan_duplicates(buf)[0]
+
+
+def format_duplicate_report(report):
+    lines = []
+    for found in report.extracted:
+        lines.append(f"✅ {report.path}:{found.line}: {found.copies} copies -> {found.data}.map(<{found.component} />),"
+                     f" {len(found.props)} prop(s), {found.saved} B saved")
+    for line, copies, reason in report.skipped:
+        lines.append(f"➖ {report.path}:{line}: {copies} copies left, {reason}")
+    return '\n'.join(lines)
+
+
+def _file_subtrees(path):
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError):
+        return []
+    return subtrees(text, path)
+
+
+def _extracted(paths):
+    # {(path, start)} of the copies extract_duplicate_subtrees takes
+    found = set()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            _, report = plan_duplicates(f.read(), path)
+        found.update((path, extraction.start, extraction.end) for extraction in report.extracted)
+    return found
+
+
+def main(argv=None):
+    from codemod.tree import DEFAULT_GLOBS, expand_globs
+
+    parser = argparse.ArgumentParser(prog='codemod.duplicates', description='Rank duplicated JSX subtrees by the bytes extracting them saves.')
+    parser.add_argument('globs', nargs='*', help='files to analyse (default: the tree globs)')
+    parser.add_argument('--top', type=int, default=20, help='clusters to list (default: 20)')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes (default: one per core)')
+    args = parser.parse_args(argv)
+
+    paths = sorted(expand_globs(args.globs or DEFAULT_GLOBS))
+    start = time.perf_counter()
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(paths) or 1))
+    if workers == 1:
+        results = list(map(_file_subtrees, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_file_subtrees, paths, chunksize=8))
+    found = [tree for trees in results for tree in trees]
+    clusters = find_clusters(found)
+    print(f"🔎 {len(found)} subtree(s) fingerprinted in {len(paths)} file(s), {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    top = clusters[:args.top]
+    extracted = _extracted(sorted({path for cluster in top for path in cluster.files}))
+    for rank, cluster in enumerate(top, 1):
+        first = cluster.subtrees[0]
+        taken = all(any(path == tree.path and start <= tree.start < end for path, start, end in extracted) for tree in cluster.subtrees)
+        where = ', '.join(f'{tree.path}:{tree.line}' for tree in cluster.subtrees[:3])
+        more = f' (+{len(cluster.subtrees) - 3})' if len(cluster.subtrees) > 3 else ''
+        print(f"{rank:3}. {'✅' if taken else '➖'} ~{cluster.saved} B: {len(cluster.subtrees)} × <{first.name}>"
+              f" ({cluster.size} B, {len(cluster.params)} varying) {where}{more}")
+    print(f"🌲 {len(clusters)} duplicate cluster(s), ~{sum(cluster.saved for cluster in clusters)} B to save;"
+          f" ✅ extracted by extract_duplicate_subtrees")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,511 @@
+# Codemod engine: rules are registered once and applied in order to the
+# in-memory text of a file, so each file is read once and written once no
+# matter how many rules are chained. Rules that do not depend on each other
+# (see codemod.schedule) are planned on the same text and their edits merged
+# into one rewrite.
+#
+# Rules only plan (start, end, replacement) edits. run_file() applies them to
+# the decoded text; run_file_streaming() plans on an mmap of the file and
+# streams the unchanged byte ranges and the replacements to a temp file, so
+# neither the file nor its rewrite is held in memory. The scanner index the
+# rules plan with still is: it grows with the brackets, elements, strings
+# and comments of the file, about five times the file's size for screen code
+# even with slotted records (some 20 MB for a 3.7 MB file). Either way the new
+# content is staged in a temp file and committed through codemod.journal.
+# The edits of every rule are kept on the report as a codemod.plan.Plan, so a
+# dry run can show them as a diff and a saved plan can be applied with
+# run_plan() later without matching again. Every rewrite is checked with
+# codemod.validate first; a rule whose edits break the syntax is dropped
+# from the wave and reported.
+
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+from codemod.journal import Staged, Transaction, stage, undo_step, write_temp
+from codemod.plan import Plan, _size, read_planned
+from codemod.scanner import scan
+from codemod.schedule import overlaps, schedule_for
+from codemod.validate import check
+
+# Rules compiled so far by name; get_rules() gives the application order
+RULES = {}
+
+
+@dataclass
+class Rule:
+    name: str
+    func: object
+    # Bump to invalidate cached results when behaviour changes outside the
+    # rule's own module
+    version: str = ''
+    # schedule.Access: what the rule reads and writes (None: anything)
+    access: object = None
+
+    def plan(self, buf):
+        # Non-overlapping (start, end, replacement) edits in `buf`'s units
+        return self.func(buf)
+
+    def apply(self, content):
+        # The rewritten text and how many places the rule matched
+        edits = self.plan(content)
+        if not edits:
+            return content, 0
+        return apply_edits(content, edits), len(edits)
+
+
+@dataclass
+class RuleStat:
+    name: str
+    matches: int = 0
+    # Planning the edits / applying them to the text (or streaming them out)
+    match_seconds: float = 0.0
+    rewrite_seconds: float = 0.0
+    # Filled in by codemod.profiling when enabled
+    peak_kb: int = -1
+    profile: str = ''
+    hotspots: list = field(default_factory=list)
+
+    @property
+    def seconds(self):
+        return self.match_seconds + self.rewrite_seconds
+
+
+@dataclass
+class FileReport:
+    path: str
+    rules: list = field(default_factory=list)
+    changed: bool = False
+    read_seconds: float = 0.0
+    write_seconds: float = 0.0
+    # Set when the content hash showed the file was already processed
+    cached: bool = False
+    # sha256 and stat of the file as left on disk, for the result cache
+    digest: str = ''
+    size: int = -1
+    mtime_ns: int = -1
+    # journal.Staged rewrite waiting for the caller's Transaction (commit=False)
+    staged: object = None
+    # Id of the transaction that wrote the file (commit=True)
+    transaction: str = ''
+    # plan.Plan of the edits, when the file changed
+    plan: object = None
+    # (rule, rule) pairs whose edits overlapped when planned on the same
+    # text; the first was re-planned after the second
+    conflicts: list = field(default_factory=list)
+    # (rule, line, message) of the rules whose edits left a syntax error;
+    # the rest of their wave was applied without them
+    rejected: list = field(default_factory=list)
+    # Finished by an interrupted tree run and taken from its checkpoint
+    resumed: bool = False
+
+    @property
+    def matches(self):
+        return sum(stat.matches for stat in self.rules)
+
+    @property
+    def seconds(self):
+        return self.read_seconds + self.write_seconds + sum(stat.seconds for stat in self.rules)
+
+
+def register(name, version=''):
+    def decorator(func):
+        if name in RULES:
+            raise ValueError(f"Rule '{name}' is already registered")
+        RULES[name] = Rule(name, func, version)
+        return func
+    return decorator
+
+
+def get_rules(names=None):
+    # Declared rules (codemod/rules/*.toml) are compiled on first use, so a
+    # run only pays for the rules it applies; without `names`, the ones
+    # declared with default = false are left out. Declared rules apply in
+    # the order they are declared in, whatever order they are named in: the
+    # rule files put every rule after the ones whose output it rewrites
+    # (virtualize_scroll_lists after extract_duplicate_subtrees)
+    from codemod.rulefiles import default_rules, load_rules
+
+    declared = load_rules(names)
+    if names is None:
+        return [RULES[name] for name in default_rules()] + [rule for name, rule in RULES.items() if name not in declared]
+    missing = [name for name in names if name not in RULES]
+    if missing:
+        raise KeyError(f"Unknown rule(s): {', '.join(missing)}")
+    order = {name: k for k, name in enumerate(declared)}
+    return sorted((RULES[name] for name in names), key=lambda rule: order.get(rule.name, len(order)))
+
+
+def _sorted_edits(edits):
+    pos = 0
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+        if start < pos:
+            raise ValueError(f'Overlapping edit at offset {start}')
+        yield start, end, replacement
+        pos = end
+
+
+def apply_edits(content, edits):
+    # Edits are non-overlapping (start, end, replacement) spans of `content`
+    parts = []
+    pos = 0
+    for start, end, replacement in _sorted_edits(edits):
+        parts.append(content[pos:start])
+        parts.append(replacement)
+        pos = end
+    parts.append(content[pos:])
+    return ''.join(parts)
+
+
+def stream_edits(buf, edits, out, hasher=None):
+    # Write `buf` (bytes or mmap) with byte-offset edits applied to the binary
+    # file `out`; unchanged ranges are copied through a memoryview, never
+    # joined in memory. Returns True if any byte differs from `buf`.
+    changed = False
+    view = memoryview(buf)
+    pos = 0
+    try:
+        for start, end, replacement in _sorted_edits(edits):
+            data = replacement.encode('utf-8')
+            changed = changed or data != view[start:end]
+            for chunk in (view[pos:start], data):
+                out.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+            pos = end
+        out.write(view[pos:])
+        if hasher is not None:
+            hasher.update(view[pos:])
+    finally:
+        view.release()
+    return changed
+
+
+def _measure(profiling, stat, path):
+    return profiling.measure(stat, path) if profiling is not None else nullcontext()
+
+
+def _plan_wave(buf, wave, stats, profiling, path, conflicts):
+    # Plan the rules of `wave` on the same `buf`. Returns [(rule, edits)] of
+    # the rules planned, and the rest of the wave from the first rule whose
+    # edits overlap an earlier one's: those are planned again on the merged
+    # text, in order.
+    kept = []
+    for k, rule in enumerate(wave):
+        stat = stats.setdefault(rule.name, RuleStat(rule.name))
+        with _measure(profiling, stat, path):
+            start = time.perf_counter()
+            edits = rule.plan(buf)
+            stat.match_seconds += time.perf_counter() - start
+        stat.matches = len(edits)
+        other = next((name for name, planned in kept for a in edits for b in planned if overlaps(a, b)), None)
+        if other is not None:
+            if conflicts is not None:
+                conflicts.append((rule.name, other))
+            return kept, wave[k:]
+        if edits:
+            kept.append((rule.name, edits))
+    return kept, []
+
+
+def _sequential(kept, binary):
+    # The merged edits of a wave as [rule, edits] steps, each in the offsets
+    # of the text the rules before it left (see plan.Plan.steps)
+    steps = []
+    earlier = []
+    for name, edits in kept:
+        shifted = []
+        for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+            delta = sum(size - (e - s) for s, e, size in earlier if e <= start)
+            shifted.append((start + delta, end + delta, replacement))
+        steps.append([name, shifted])
+        earlier.extend((start, end, _size(replacement, binary)) for start, end, replacement in edits)
+    return steps
+
+
+def _checked(buf, kept, rejected, rewrite):
+    # Rewrite `buf` with the edits of `kept` through `rewrite(edits)` and
+    # check the result; rejected rules are recorded in `rejected` and the
+    # rest rewritten again. Returns the rules kept, the new buffer and its
+    # index (None, None if no rule is left)
+    while kept:
+        new = rewrite([edit for _, edits in kept for edit in edits])
+        index, problems = check(buf, new, kept)
+        if not problems:
+            return kept, new, index
+        rejected.extend((name, line, message) for name, (line, message) in sorted(problems.items()))
+        kept = [(name, edits) for name, edits in kept if name not in problems]
+    return kept, None, None
+
+
+def _share(stats, kept, seconds):
+    # Time spent rewriting a wave, split over its rules by their edits
+    total = sum(len(edits) for _, edits in kept)
+    for name, edits in kept:
+        stats[name].rewrite_seconds += seconds * len(edits) / total
+
+
+def apply_rules(content, rules, steps=None, profiling=None, path='', reindex=None, planned=None, conflicts=None, rejected=None):
+    # Rules run in the waves of codemod.schedule: each wave is planned on one
+    # snapshot and its edits applied in one rewrite. With `steps`, the undo
+    # record of every rewrite is appended to it (see journal.undo_step), with
+    # `planned` each rule's [rule, edits] (see plan.Plan.steps) and with
+    # `conflicts` the (rule, rule) pairs whose edits overlapped in a wave,
+    # with `rejected` the (rule, line, message) of rules whose edits broke
+    # the syntax (see codemod.validate); `profiling` is an optional codemod.profiling.Profiling;
+    # `reindex(content)` is called after every rewrite so the next wave finds
+    # its indexes primed (watch mode)
+    stats = {}
+    rejected = [] if rejected is None else rejected
+    for wave in schedule_for(rules).waves:
+        while wave:
+            kept, wave = _plan_wave(content, wave, stats, profiling, path, conflicts)
+            if not kept:
+                continue
+            start = time.perf_counter()
+            kept, new, index = _checked(content, kept, rejected, lambda edits: apply_edits(content, edits))
+            if not kept:
+                continue
+            edits = [edit for _, rule_edits in kept for edit in rule_edits]
+            if steps is not None:
+                steps.append(undo_step(edits, content))
+            if planned is not None:
+                planned.extend(_sequential(kept, False))
+            content = new
+            scan.prime(content, index)
+            if reindex is not None:
+                reindex(content)
+            _share(stats, kept, time.perf_counter() - start)
+    return content, [stats[rule.name] for rule in rules]
+
+
+def digest(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _finish(report, staged, commit):
+    # Commit the staged rewrite on its own, or hand it to the caller
+    if commit:
+        transaction = Transaction()
+        transaction.add(staged)
+        report.transaction = transaction.commit()
+    else:
+        report.staged = staged
+    report.digest = staged.after
+
+
+def run_file(path, names=None, write=True, known_digest=None, commit=True, profiling=None):
+    # known_digest is the hash of a previous run's fixed point for the same
+    # rules; if the file still hashes to it, matching is skipped entirely.
+    # With commit=False a rewrite is only staged (report.staged) so several
+    # files can go through one Transaction.
+    rules = get_rules(names)
+    report = FileReport(path)
+
+    # Read once (newline='' keeps CRLF files byte-identical)
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        original = f.read()
+    report.read_seconds = time.perf_counter() - start
+    report.digest = digest(original)
+
+    if report.digest == known_digest:
+        report.cached = True
+    else:
+        # Apply every rule to the in-memory text
+        steps = []
+        planned = []
+        content, report.rules = apply_rules(
+            original, rules, steps, profiling, path, planned=planned, conflicts=report.conflicts, rejected=report.rejected,
+        )
+        report.changed = content != original
+        if report.changed:
+            report.plan = Plan(path, report.digest, 'text', planned)
+
+        # Write once, and only if the bytes actually differ
+        if report.changed and write:
+            start = time.perf_counter()
+            staged = Staged(path, write_temp(path, content.encode('utf-8')), report.digest, digest(content), 'text', steps)
+            _finish(report, staged, commit)
+            report.write_seconds = time.perf_counter() - start
+
+    stat = os.stat(path)
+    report.size, report.mtime_ns = stat.st_size, stat.st_mtime_ns
+    return report
+
+
+def _map(f):
+    # mmap refuses empty files; an empty bytes object plans the same way
+    if os.fstat(f.fileno()).st_size == 0:
+        return b''
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _unmap(buf):
+    if isinstance(buf, mmap.mmap):
+        buf.close()
+
+
+def _hash_file(f):
+    hasher = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1 << 20), b''):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def run_file_streaming(path, names=None, write=True, known_digest=None, commit=True, profiling=None):
+    # Same contract as run_file(). Each wave of rules plans on a read-only
+    # mapping of the current bytes; when it has edits the result is streamed
+    # to a temp file next to `path`, which the following waves map in turn.
+    # The last temp file is what gets staged.
+    rules = get_rules(names)
+    report = FileReport(path)
+    directory = os.path.dirname(path) or '.'
+    temps = []
+    current = path
+    new_digest = None
+    steps = []
+    planned = []
+
+    try:
+        start = time.perf_counter()
+        with open(path, 'rb') as f:
+            report.digest = _hash_file(f)
+        report.read_seconds = time.perf_counter() - start
+
+        if report.digest == known_digest:
+            report.cached = True
+        else:
+            stats = {}
+            # (mapping, temp file, digest, whether it differs) per rewrite of
+            # the current wave
+            attempts = []
+
+            def rewrite(edits):
+                fd, temp = tempfile.mkstemp(prefix='.codemod-', suffix='.tmp', dir=directory)
+                temps.append(temp)
+                hasher = hashlib.sha256()
+                with os.fdopen(fd, 'wb') as out:
+                    changed = stream_edits(buf, edits, out, hasher)
+                with open(temp, 'rb') as f:
+                    attempts.append((_map(f), temp, hasher.hexdigest(), changed))
+                return attempts[-1][0]
+
+            with open(path, 'rb') as f:
+                buf = _map(f)
+            try:
+                for wave in schedule_for(rules).waves:
+                    while wave:
+                        kept, wave = _plan_wave(buf, wave, stats, profiling, path, report.conflicts)
+                        if not kept:
+                            continue
+                        start = time.perf_counter()
+                        attempts.clear()
+                        kept, new, index = _checked(buf, kept, report.rejected, rewrite)
+                        # The accepted rewrite is the last one; the mapping
+                        # of the new bytes is what the next wave plans on
+                        for mapped, *_ in attempts[:-1] if kept else attempts:
+                            _unmap(mapped)
+                        if not kept:
+                            continue
+                        _, temp, new_hash, changed = attempts[-1]
+                        if changed:
+                            edits = [edit for _, rule_edits in kept for edit in rule_edits]
+                            steps.append(undo_step(edits, buf))
+                            planned.extend(_sequential(kept, True))
+                            current = temp
+                            report.changed = True
+                            new_digest = new_hash
+                            scan.prime(new, index)
+                            _unmap(buf)
+                            buf = new
+                        else:
+                            _unmap(new)
+                        _share(stats, kept, time.perf_counter() - start)
+            finally:
+                _unmap(buf)
+            report.rules = [stats[rule.name] for rule in rules]
+
+            if report.changed:
+                report.plan = Plan(path, report.digest, 'bytes', planned)
+            if report.changed and write:
+                start = time.perf_counter()
+                staged = stage(path, current, report.digest, new_digest, 'bytes', steps)
+                temps.remove(current)
+                _finish(report, staged, commit)
+                report.write_seconds = time.perf_counter() - start
+    finally:
+        for temp in temps:
+            try:
+                os.unlink(temp)
+            except FileNotFoundError:
+                pass
+
+    stat = os.stat(path)
+    report.size, report.mtime_ns = stat.st_size, stat.st_mtime_ns
+    return report
+
+
+def run_plan(plan, write=True, commit=True):
+    # Apply a saved plan.Plan without running any rule; the file must still
+    # have the content the plan was made against (ValueError otherwise)
+    report = FileReport(plan.path, plan=plan)
+    start = time.perf_counter()
+    original = read_planned(plan)
+    report.read_seconds = time.perf_counter() - start
+    report.digest = plan.digest
+
+    start = time.perf_counter()
+    edits = plan.edits(original)
+    if plan.units == 'text':
+        content = apply_edits(original, edits)
+        report.changed = content != original
+        data = content.encode('utf-8')
+    else:
+        parts = []
+        pos = 0
+        for edit_start, end, replacement in _sorted_edits(edits):
+            parts += [original[pos:edit_start], replacement.encode('utf-8', 'surrogateescape')]
+            pos = end
+        parts.append(original[pos:])
+        data = b''.join(parts)
+        report.changed = data != original
+    report.rules = [RuleStat(rule, len(rule_edits)) for rule, rule_edits in plan.steps]
+    if report.rules:
+        # Nothing is matched; composing and applying the plan counts as
+        # rewriting
+        report.rules[-1].rewrite_seconds = time.perf_counter() - start
+
+    if report.changed and write:
+        start = time.perf_counter()
+        after = hashlib.sha256(data).hexdigest()
+        staged = Staged(plan.path, write_temp(plan.path, data), plan.digest, after, plan.units, [undo_step(edits, original)])
+        _finish(report, staged, commit)
+        report.write_seconds = time.perf_counter() - start
+
+    stat = os.stat(plan.path)
+    report.size, report.mtime_ns = stat.st_size, stat.st_mtime_ns
+    return report
+
+
+def format_report(report):
+    if report.cached:
+        return f"💾 {report.path} (cached, {report.seconds * 1000:.1f} ms)"
+    lines = [f"{'✅' if report.changed else '➖'} {report.path} ({report.seconds * 1000:.1f} ms)"]
+    lines.append(f"   read   {report.read_seconds * 1000:8.2f} ms")
+    for stat in report.rules:
+        line = (f"   {stat.name:<28} {stat.seconds * 1000:8.2f} ms  {stat.matches} match(es)"
+                f"  [match {stat.match_seconds * 1000:.2f} / rewrite {stat.rewrite_seconds * 1000:.2f} ms]")
+        if stat.peak_kb >= 0:
+            line += f"  peak {stat.peak_kb} KB"
+        lines.append(line)
+    for name, other in report.conflicts:
+        lines.append(f"   ⚠️  {name} overlapped {other}; planned again after it")
+    for name, line, message in report.rejected:
+        lines.append(f"   ❌ {name} rejected: line {line}: {message}")
+    lines.append(f"   write  {report.write_seconds * 1000:8.2f} ms")
+    return '\n'.join(lines)
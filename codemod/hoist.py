@@ -0,0 +1,324 @@
+# Hoist constant inline style objects into StyleSheet entries.
+#
+# `style={[styles.activityBadge, { backgroundColor: '#D1FAE5' }]}` builds a
+# new object on every render of the element, and of every row when it sits in
+# a .map() callback. An object literal in a style attribute whose values are
+# all constants (strings without ${}, numbers, booleans, nested constant
+# objects and arrays) is moved to the file's top-level `styles` sheet and
+# referenced as `styles.<name>`. Identical literals share one entry, and so
+# do literals with the entry an earlier run added for the same content (its
+# key is the name the rule gives those properties). A hand-written entry
+# with the same content is not reused: it belongs to an unrelated component.
+#
+# python3 -m codemod.hoist [GLOB ...] reports, per file, how many per-render
+# allocations the rule removes without writing anything.
+
+import argparse
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+
+from codemod.buffers import compile_for, contains, decode, text_slice
+from codemod.scanner import _EXPR_PREV, _prev_significant, _starts_expression, scan
+from codemod.styles import insert_styles, style_index
+
+# Attributes that take a style: style, contentContainerStyle, ...
+_ATTRIBUTE = r'(?<![\w$.])(?:style|[\w$]+Style)\s*=\s*\{'
+_TOP_LEVEL_STYLES = r'(?<![\w$.])(?:const|let|var)\s+styles\b'
+_BASE = re.compile(r'\s*styles\.([\w$]+)')
+_MAP_CALL = re.compile(r'\.map\s*$')
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"|`(?:[^`\\$]|\\.|\$(?!\{))*`)
+  | (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}\[\],:])
+)''', re.VERBOSE)
+# Brackets that may sit between a style literal and the attribute braces;
+# parentheses only when they group, not when they call something that might
+# mutate its argument
+_CONTAINERS = {'[', '('}
+# Tokens that may come before a style literal (`cond && {...}`, `[a, {...}]`)
+_BEFORE = set('[(,?:&|{')
+
+
+def _tokens(source):
+    pos = 0
+    tokens = []
+    while pos < len(source):
+        if not source[pos:].strip():
+            break
+        m = _TOKEN.match(source, pos)
+        if m is None:
+            return None
+        tokens.append((m.lastgroup, m.group(m.lastgroup)))
+        pos = m.end()
+    return tokens
+
+
+def _parse(tokens, k):
+    # (canonical text, next token) of the constant value at tokens[k], or
+    # (None, k) if it is not a constant
+    kind, value = tokens[k] if k < len(tokens) else (None, None)
+    if kind in ('string', 'number') or (kind == 'word' and value in ('true', 'false', 'null')):
+        return value, k + 1
+    if value == '[':
+        items = []
+        k += 1
+        while k < len(tokens) and tokens[k][1] != ']':
+            item, k = _parse(tokens, k)
+            if item is None:
+                return None, k
+            items.append(item)
+            if k < len(tokens) and tokens[k][1] == ',':
+                k += 1
+            elif k < len(tokens) and tokens[k][1] != ']':
+                return None, k
+        return ('[' + ', '.join(items) + ']', k + 1) if k < len(tokens) else (None, k)
+    if value == '{':
+        props, k = _properties(tokens, k)
+        return ('{ ' + ', '.join(f'{key}: {item}' for key, item in props) + ' }' if props else '{}', k) if props is not None else (None, k)
+    return None, k
+
+
+def _properties(tokens, k):
+    # [(key, canonical value)] of the object literal opening at tokens[k]
+    props = []
+    k += 1
+    while k < len(tokens) and tokens[k][1] != '}':
+        kind, key = tokens[k]
+        if kind not in ('word', 'string', 'number') or k + 1 >= len(tokens) or tokens[k + 1][1] != ':':
+            return None, k
+        item, k = _parse(tokens, k + 2)
+        if item is None:
+            return None, k
+        props.append((key, item))
+        if k < len(tokens) and tokens[k][1] == ',':
+            k += 1
+        elif k < len(tokens) and tokens[k][1] != '}':
+            return None, k
+    return (props, k + 1) if k < len(tokens) else (None, k)
+
+
+def constant_style(source):
+    # [(key, canonical value)] if `source` is a constant object literal
+    tokens = _tokens(source)
+    if not tokens or tokens[0][1] != '{':
+        return None
+    props, k = _properties(tokens, 0)
+    return props if props and k == len(tokens) else None
+
+
+def _signature(props):
+    return tuple(props)
+
+
+def _camel(*words):
+    parts = []
+    for word in words:
+        parts.extend(re.findall(r'[A-Za-z]+|\d+', word))
+    if not parts:
+        return 'inline'
+    name = parts[0][0].lower() + parts[0][1:]
+    name += ''.join(part[0].upper() + part[1:] for part in parts[1:])
+    return name if not name[0].isdigit() else 'style' + name
+
+
+def _prop_words(props):
+    words = []
+    for key, value in props[:2]:
+        words += [key.strip('\'"'), value.strip('\'"`')[:16]]
+    return words
+
+
+def _name(base, props, taken):
+    # activityBadge + backgroundColor '#D1FAE5' -> activityBadgeBackgroundColorD1FAE5
+    name = _camel(*([base] if base else []) + _prop_words(props))
+    candidate, n = name, 2
+    while candidate in taken:
+        candidate, n = f'{name}{n}', n + 1
+    return candidate
+
+
+def _generated(key, props):
+    # Whether `key` is a name _name() gives `props`, with or without a base
+    name = _camel(*_prop_words(props))
+    suffix = name[0].upper() + name[1:]
+    return re.fullmatch(rf'(?:[\w$]+{re.escape(suffix)}|{re.escape(name)})\d*', key) is not None
+
+
+@dataclass
+class InlineStyle:
+    start: int
+    end: int
+    # Constant literals only: its properties, and the `styles.X` it is
+    # combined with, if any
+    props: list = None
+    base: str = ''
+    # Inside a .map() callback, i.e. allocated once per row
+    in_list: bool = False
+
+
+@dataclass
+class HoistReport:
+    path: str
+    constant: list = field(default_factory=list)
+    dynamic: int = 0
+    # key -> properties of the entries the rule adds
+    added: dict = field(default_factory=dict)
+    reused: int = 0
+    # Why constant literals were left alone, if they were
+    skipped: str = ''
+
+
+def _attribute_pairs(text, index):
+    # An opening tag can hold other elements (render props), so the same
+    # attribute may turn up under more than one element
+    attribute = compile_for(text, _ATTRIBUTE)
+    seen = set()
+    for elem in index.elements:
+        for m in attribute.finditer(text, elem.start, elem.open_end):
+            pair = index.pair_at(m.end() - 1)
+            if pair is not None and pair.close >= 0 and pair.open not in seen and index.is_code(m.end() - 1):
+                seen.add(pair.open)
+                yield pair
+
+
+def _in_list(text, index, pair):
+    while pair.parent >= 0:
+        pair = index.pairs[pair.parent]
+        if pair.kind == '(' and _MAP_CALL.search(decode(text[max(0, pair.open - 32):pair.open])):
+            return True
+    return False
+
+
+def find_inline_styles(text):
+    # Every object literal directly in a style attribute (possibly inside an
+    # array, parentheses or a condition), constant or not
+    index = scan(text)
+    found = []
+    for attr in _attribute_pairs(text, index):
+        for pair in _pairs_within(index, attr):
+            if pair.kind != '{':
+                continue
+            chain = pair
+            nested = False
+            while chain.parent >= 0 and index.pairs[chain.parent] is not attr:
+                chain = index.pairs[chain.parent]
+                if chain.kind not in _CONTAINERS or chain.kind == '(' and not _starts_expression(text, chain.open, _EXPR_PREV):
+                    nested = True
+                    break
+            if nested or _prev_significant(text, pair.open)[0] not in _BEFORE:
+                continue
+            style = InlineStyle(pair.open, pair.close + 1, in_list=_in_list(text, index, pair))
+            style.props = constant_style(text_slice(text, pair.open, pair.close + 1))
+            parent = index.pairs[pair.parent]
+            if style.props is not None and parent.kind == '[':
+                m = _BASE.match(text_slice(text, parent.open + 1, pair.open))
+                style.base = m.group(1) if m else ''
+            found.append(style)
+    return found
+
+
+def _pairs_within(index, outer):
+    # Pairs opening inside `outer`, in source order
+    k = bisect_right(index._opens, outer.open)
+    while k < len(index.pairs) and index.pairs[k].open < outer.close:
+        yield index.pairs[k]
+        k += 1
+
+
+def _entry_indent(text, sheet):
+    if not sheet.entries:
+        return '  ', '    '
+    entry = sheet.entries[-1]
+    indent = decode(text[entry.start:entry.key_start])
+    indent = indent if not indent.strip() else '  '
+    return indent, indent * 2 or '  '
+
+
+def plan_hoist(text, path=''):
+    # (edits, HoistReport)
+    report = HoistReport(path)
+    styles = find_inline_styles(text)
+    report.dynamic = sum(1 for style in styles if style.props is None)
+    constant = [style for style in styles if style.props is not None]
+    if not constant:
+        return [], report
+    sheet = style_index(text).sheet()
+    if sheet is None or len(compile_for(text, _TOP_LEVEL_STYLES).findall(text)) != 1 or scan(text).enclosing_pair(sheet.open, '{'):
+        report.constant = constant
+        report.skipped = 'no single top-level `styles` StyleSheet to add entries to'
+        return [], report
+
+    # Entries earlier runs added, by content
+    existing = {}
+    for entry in sheet.entries:
+        props = constant_style(text_slice(text, entry.value_start, entry.value_end))
+        if props and _generated(entry.key, props):
+            existing.setdefault(_signature(props), entry.key)
+    taken = set(sheet.keys)
+    indent, inner = _entry_indent(text, sheet)
+
+    # A literal used with different base styles is named after its
+    # properties alone
+    bases = {}
+    for style in constant:
+        bases.setdefault(_signature(style.props), set()).add(style.base)
+
+    edits = []
+    block = []
+    for style in constant:
+        signature = _signature(style.props)
+        key = existing.get(signature)
+        if key is None:
+            key = _name(style.base if len(bases[signature]) == 1 else '', style.props, taken)
+            taken.add(key)
+            existing[signature] = key
+            report.added[key] = style.props
+            lines = ''.join(f'{inner}{prop}: {value},\n' for prop, value in style.props)
+            block.append(f'\n{indent}{key}: {{\n{lines}{indent}}},')
+        elif key not in report.added:
+            report.reused += 1
+        edits.append((style.start, style.end, f'styles.{key}'))
+        report.constant.append(style)
+    if block:
+        edits.extend(insert_styles(text, ''.join(block), fallback=True))
+    return edits, report
+
+
+def hoist_inline_styles(buf):
+    if not contains(buf, 'StyleSheet.create') or not contains(buf, 'tyle={'):
+        return []
+    return plan_hoist(buf)[0]
+
+
+def format_hoist_report(report):
+    if report.skipped:
+        return f"➖ {report.path}: {len(report.constant)} constant literal(s) left, {report.skipped}"
+    rows = sum(1 for style in report.constant if style.in_list)
+    return (f"{'✅' if report.constant else '⚪'} {report.path}: {len(report.constant)} allocation(s) per render removed"
+            f" ({rows} per list row), {len(report.added)} new entr{'y' if len(report.added) == 1 else 'ies'},"
+            f" {report.reused} reused, {report.dynamic} dynamic left")
+
+
+def main(argv=None):
+    from codemod.tree import DEFAULT_GLOBS, expand_globs
+
+    parser = argparse.ArgumentParser(prog='codemod.hoist', description='Report the inline style objects hoist_inline_styles would move.')
+    parser.add_argument('globs', nargs='*', help='files to analyse (default: the tree globs)')
+    args = parser.parse_args(argv)
+    total = 0
+    for path in sorted(expand_globs(args.globs or DEFAULT_GLOBS)):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+        if not contains(text, 'tyle={'):
+            continue
+        _, report = plan_hoist(text, path)
+        if report.constant or report.skipped or report.dynamic:
+            print(format_hoist_report(report))
+        total += 0 if report.skipped else len(report.constant)
+    print(f"🌲 {total} allocation(s) per render removed in total")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+# ES import declarations of a file.
+#
+# Rules that start using a component (FlatList, an icon) have to make sure it
+# is imported. The declarations are found with the scanner, so `import` in a
+# string or comment is ignored, and every named specifier keeps its bounds
+# for the edits that add names next to it.
+
+from dataclasses import dataclass, field
+
+from codemod.buffers import char, compile_for, decode, find, text_slice
+from codemod.scanner import scan
+
+_IMPORT = r'''(?<![\w$.])import\s+(type\s+)?(?:([A-Za-z_$][\w$]*)\s*,?\s*)?(?:(\{)|\*\s*as\s+[\w$]+\s*)?[^;'"]*?from\s*(['"])([^'"\n]+)\4[ \t]*;?'''
+_SIDE_EFFECT = r'''(?<![\w$.])import\s*(['"])([^'"\n]+)\1[ \t]*;?'''
+_SPECIFIER = r'(?:type\s+)?([A-Za-z_$][\w$]*)(?:\s+as\s+([A-Za-z_$][\w$]*))?'
+
+
+@dataclass
+class Specifier:
+    # Imported name and the local binding (`B as C` -> 'B', 'C')
+    name: str
+    local: str
+    start: int
+    end: int
+
+
+@dataclass
+class Import:
+    module: str
+    start: int
+    end: int
+    default: str = ''
+    # Bounds of the `{...}` of named specifiers, (-1, -1) if there is none
+    open: int = -1
+    close: int = -1
+    names: list = field(default_factory=list)
+    type_only: bool = False
+
+
+def find_imports(text):
+    index = scan(text)
+    imports = []
+    for pattern in (_IMPORT, _SIDE_EFFECT):
+        for m in compile_for(text, pattern).finditer(text):
+            if not index.is_code(m.start()) or index.enclosing_pair(m.start()) is not None:
+                continue
+            if pattern is _SIDE_EFFECT:
+                imports.append(Import(decode(m.group(2)), m.start(), m.end()))
+                continue
+            found = Import(decode(m.group(5)), m.start(), m.end(), default=decode(m.group(2) or ''), type_only=bool(m.group(1)))
+            if m.group(3):
+                pair = index.pair_at(m.start(3))
+                if pair is None or pair.close < 0:
+                    continue
+                found.open, found.close = pair.open, pair.close
+                for spec in compile_for(text, _SPECIFIER).finditer(text, pair.open + 1, pair.close):
+                    name = decode(spec.group(1))
+                    found.names.append(Specifier(name, decode(spec.group(2) or spec.group(1)), spec.start(), spec.end()))
+            imports.append(found)
+    imports.sort(key=lambda found: found.start)
+    return imports
+
+
+def imported_names(text):
+    # Every local name bound by an import
+    names = set()
+    for found in find_imports(text):
+        if found.default:
+            names.add(found.default)
+        names.update(spec.local for spec in found.names)
+    return names
+
+
+def _specifier_indent(text, found):
+    # Indent of a specifier on its own line in a multi-line `{...}`, or ''
+    first = found.names[0].start
+    line = text_slice(text, found.open + 1, first)
+    return line[line.rfind('\n') + 1:] if '\n' in line else ''
+
+
+def add_named_imports(text, module, names, imports=None):
+    # Edits that import `names` from `module`, skipping names the file already
+    # binds: next to the names a declaration of the module already has (in
+    # order if they are sorted), or as a new declaration after the last import
+    imports = find_imports(text) if imports is None else imports
+    bound = {found.default for found in imports} | {spec.local for found in imports for spec in found.names}
+    names = sorted({name for name in names if name not in bound}, key=str.lower)
+    if not names:
+        return []
+    for found in imports:
+        if found.module != module or found.open < 0 or found.type_only:
+            continue
+        if not found.names:
+            return [(found.open + 1, found.close, f" {', '.join(names)} ")]
+        return _merged(_insertions(text, found, names))
+    statement = f"import {{ {', '.join(names)} }} from '{module}';"
+    if not imports:
+        return [(0, 0, statement + '\n')]
+    return [(imports[-1].end, imports[-1].end, '\n' + statement)]
+
+
+def _insertions(text, found, names):
+    indent = _specifier_indent(text, found)
+    present = [spec.name for spec in found.names]
+    in_order = present == sorted(present, key=str.lower)
+    last = found.names[-1]
+    after = text_slice(text, last.end, found.close)
+    for name in names:
+        before = next((spec for spec in found.names if spec.name.lower() > name.lower()), None) if in_order else None
+        if before is not None:
+            yield before.start, f'{name},\n{indent}' if indent else f'{name}, '
+        elif indent and after.lstrip().startswith(','):
+            yield last.end + len(after) - len(after.lstrip()) + 1, f'\n{indent}{name},'
+        else:
+            yield last.end, f',\n{indent}{name}' if indent else f', {name}'
+
+
+def _merged(insertions):
+    # Names inserted at the same offset go in one edit, in order
+    merged = {}
+    for pos, piece in insertions:
+        merged[pos] = merged.get(pos, '') + piece
+    return [(pos, pos, piece) for pos, piece in sorted(merged.items())]
+
+
+def add_named_import(text, module, name, imports=None):
+    return add_named_imports(text, module, [name], imports)
+
+
+def remove_named_imports(text, found, removed, side_effects=False):
+    # Edits that drop the `removed` specifiers of `found`, with their commas;
+    # the whole declaration (and its line) goes when nothing is left, unless
+    # the module may have `side_effects`: then a bare `import '...'` stays
+    removed = {id(spec) for spec in removed}
+    kept = [spec for spec in found.names if id(spec) not in removed]
+    if not kept and not found.default and side_effects:
+        # `import { A } from './a';` -> `import './a';`
+        quote = find(text, found.module, found.close, found.end) - 1
+        return [(found.start, quote, 'import ')]
+    if not kept and not found.default:
+        end = found.end
+        while char(text, end) in (' ', '\t'):
+            end += 1
+        if char(text, end) == '\n':
+            end += 1
+        return [(found.start, end, '')]
+    if not kept:
+        # `import React, { A } from` -> `import React from`
+        comma = found.open
+        while comma > found.start and char(text, comma - 1) != ',':
+            comma -= 1
+        return [(comma - 1, found.close + 1, '')]
+    edits = []
+    run = []
+    for k, spec in enumerate(found.names + [None]):
+        if spec is not None and id(spec) in removed:
+            run.append(k)
+            continue
+        if run:
+            first, last = run[0], run[-1]
+            if spec is not None:
+                edits.append((found.names[first].start, spec.start, ''))
+            else:
+                edits.append((found.names[first - 1].end, found.names[last].end, ''))
+            run = []
+    return edits
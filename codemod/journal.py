@@ -0,0 +1,347 @@
+# Crash-safe writes with a rollback journal.
+#
+# Rewritten files are first staged: the new content goes to a temp file next
+# to the target and is fsynced. A Transaction then writes its journal, renames
+# every staged file into place and marks the journal committed, so a run that
+# touches many files either lands completely or not at all. The journal keeps
+# only the original text of each edited span (per rule, in that rule's
+# offsets), never a full copy of the file, and rollback() replays it
+# backwards.
+#
+# Journals live in .codemod-cache/journal/<id>.json; paths in them are as
+# given to the run, relative to the directory it was started from.
+#
+# Runs can overlap (a watch daemon and a tree run, two terminals), so a
+# journal records the pid of the process that owns it, and committing,
+# recovering and rolling back hold an exclusive flock on
+# .codemod-cache/journal/.lock. recover() only touches 'prepared' journals
+# whose owner is gone: a run still committing holds the lock and is alive.
+#
+# Commits are often deferred (a tree run commits once every worker is done),
+# so under the lock commit() first checks that every target still has the
+# hash it was read with; if one was edited in the meantime nothing is
+# written and StaleError names the edited files.
+
+import fcntl
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+# Next to the result cache (codemod.cache.CACHE_DIR)
+JOURNAL_DIR = os.path.join('.codemod-cache', 'journal')
+# Journals kept for rollback; older ones are pruned
+KEEP = 20
+LOCK_NAME = '.lock'
+
+_ids = itertools.count()
+
+
+class StaleError(ValueError):
+    # Files edited after they were read for a transaction
+    def __init__(self, paths):
+        super().__init__(f"edited since it was read: {', '.join(paths)}")
+        self.paths = paths
+
+
+@dataclass
+class Staged:
+    path: str
+    temp: str
+    # sha256 of the file before and after the rewrite
+    before: str
+    after: str
+    # 'text' (offsets in characters) or 'bytes'
+    units: str = 'text'
+    # One list per rule that edited the file, in application order:
+    # [start, length of the replacement, original text of the span]
+    steps: list = field(default_factory=list)
+
+
+def undo_step(edits, original):
+    # Undo record for `edits` applied to `original` (str or bytes buffer)
+    record = []
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+        span = original[start:end]
+        if not isinstance(span, str):
+            span = bytes(span).decode('utf-8', 'surrogateescape')
+            replacement = replacement.encode('utf-8')
+        record.append([start, len(replacement), span])
+    return record
+
+
+def revert(content, steps):
+    # Undo `steps` on the rewritten `content`; each step's edits are shifted
+    # by how much the earlier edits of the same step grew or shrank the text
+    for step in reversed(steps):
+        parts = []
+        pos = delta = 0
+        for start, length, original in step:
+            if not isinstance(content, str):
+                original = original.encode('utf-8', 'surrogateescape')
+            at = start + delta
+            parts.append(content[pos:at])
+            parts.append(original)
+            pos = at + length
+            delta += length - len(original)
+        parts.append(content[pos:])
+        content = content[:0].join(parts)
+    return content
+
+
+def _fsync_dir(directory):
+    fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_temp(path, data):
+    # Durable temp copy of `data` (bytes) next to `path`, same permissions
+    fd, temp = tempfile.mkstemp(prefix='.codemod-', suffix='.tmp', dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, temp)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return temp
+
+
+def stage(path, temp, before, after, units, steps):
+    # Make an already written temp file durable and describe it for commit
+    fd = os.open(temp, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    shutil.copymode(path, temp)
+    return Staged(path, temp, before, after, units, steps)
+
+
+def _digest_file(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _stale(staged):
+    try:
+        return _digest_file(staged.path) != staged.before
+    except OSError:
+        return True
+
+
+def _read(path, units):
+    if units == 'text':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _restore(entry):
+    # Put the original content of one journaled file back, atomically
+    content = revert(_read(entry['path'], entry['units']), entry['steps'])
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    if hashlib.sha256(data).hexdigest() != entry['before']:
+        raise ValueError('journal does not reproduce the original content')
+    temp = write_temp(entry['path'], data)
+    os.replace(temp, entry['path'])
+    _fsync_dir(os.path.dirname(entry['path']))
+
+
+def _save(root, journal):
+    directory = os.path.join(root, JOURNAL_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{journal['id']}.json")
+    with open(path + '.tmp', 'w') as f:
+        json.dump(journal, f, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+    _fsync_dir(directory)
+
+
+@contextmanager
+def locked(root='.'):
+    # Exclusive lock on the journal directory, released on exit (or when
+    # the process dies)
+    directory = os.path.join(root, JOURNAL_DIR)
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(os.path.join(directory, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Transaction:
+    def __init__(self, root='.'):
+        self.root = root
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_ids)}"
+        self.created = time.time()
+        self.staged = []
+
+    def add(self, staged):
+        if staged is not None:
+            self.staged.append(staged)
+
+    def _write(self, state):
+        _save(self.root, {
+            'id': self.id,
+            'created': self.created,
+            'pid': os.getpid(),
+            'state': state,
+            'files': [asdict(staged) for staged in self.staged],
+        })
+
+    def abort(self):
+        for staged in self.staged:
+            try:
+                os.unlink(staged.temp)
+            except FileNotFoundError:
+                pass
+        self.staged = []
+
+    def commit(self):
+        # Journal first, then the renames; returns the transaction id, or None
+        # if there was nothing to write. Raises StaleError, having written
+        # nothing, if a target changed since it was read
+        if not self.staged:
+            return None
+        with locked(self.root):
+            stale = [staged.path for staged in self.staged if _stale(staged)]
+            if stale:
+                self.abort()
+                raise StaleError(stale)
+            try:
+                self._write('prepared')
+            except BaseException:
+                self.abort()
+                raise
+            done = []
+            try:
+                for staged in self.staged:
+                    os.replace(staged.temp, staged.path)
+                    done.append(staged)
+                for directory in {os.path.dirname(staged.path) for staged in self.staged}:
+                    _fsync_dir(directory)
+            except BaseException:
+                # Put back what was already renamed, drop the rest
+                for staged in reversed(done):
+                    _restore(asdict(staged))
+                self.abort()
+                self._write('rolled-back')
+                raise
+            self._write('committed')
+        prune(self.root)
+        return self.id
+
+
+def _load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def transactions(root='.'):
+    # Journals, newest first
+    directory = os.path.join(root, JOURNAL_DIR)
+    try:
+        names = [name for name in os.listdir(directory) if name.endswith('.json')]
+    except FileNotFoundError:
+        return []
+    journals = [_load(os.path.join(directory, name)) for name in names]
+    return sorted(journals, key=lambda journal: journal['created'], reverse=True)
+
+
+def prune(root='.', keep=KEEP):
+    # Drop all but the newest `keep` finished journals
+    finished = [journal for journal in transactions(root) if journal['state'] != 'prepared']
+    for journal in finished[keep:]:
+        os.unlink(os.path.join(root, JOURNAL_DIR, f"{journal['id']}.json"))
+
+
+def rollback(txid=None, root='.'):
+    # Undo a committed transaction (default: the latest). Files edited since
+    # are left alone. Returns (id, {path: error or None}).
+    with locked(root):
+        return _rollback(txid, root)
+
+
+def _rollback(txid, root):
+    committed = [journal for journal in transactions(root) if journal['state'] == 'committed']
+    if txid is not None:
+        committed = [journal for journal in committed if journal['id'] == txid]
+    if not committed:
+        raise KeyError(f"No committed transaction{f' {txid}' if txid else ''} to roll back")
+    journal = committed[0]
+
+    results = {}
+    for entry in reversed(journal['files']):
+        try:
+            if _digest_file(entry['path']) != entry['after']:
+                raise ValueError('file changed since the transaction')
+            _restore(entry)
+            results[entry['path']] = None
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            results[entry['path']] = str(e)
+
+    journal['state'] = 'rolled-back'
+    _save(root, journal)
+    return journal['id'], results
+
+
+def recover(root='.'):
+    # Finish off transactions a crash left half-way: files that were already
+    # renamed into place are restored and leftover temp files removed.
+    # Journals whose owner is still running are left to it.
+    if not os.path.isdir(os.path.join(root, JOURNAL_DIR)):
+        return []
+    with locked(root):
+        return _recover(root)
+
+
+def _recover(root):
+    recovered = []
+    for journal in transactions(root):
+        if journal['state'] != 'prepared' or _alive(journal.get('pid')):
+            continue
+        for entry in journal['files']:
+            try:
+                if _digest_file(entry['path']) == entry['after']:
+                    _restore(entry)
+            except (OSError, UnicodeDecodeError, ValueError):
+                pass
+            try:
+                os.unlink(entry['temp'])
+            except FileNotFoundError:
+                pass
+        journal['state'] = 'rolled-back'
+        _save(root, journal)
+        recovered.append(journal['id'])
+    return recovered
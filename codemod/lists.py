@@ -0,0 +1,455 @@
+# Turn .map() lists inside a ScrollView into virtualized FlatLists.
+#
+# <ScrollView ...>{activities.map((activity, index) => <Row key={...} />)}</ScrollView>
+# mounts every row up front and keeps all of them mounted. When the map call is
+# the ScrollView's only child, the element becomes a FlatList over the same
+# array: the callback is the renderItem, the row's `key` the keyExtractor, and
+# windowing props bound how many rows are rendered ahead of the viewport. When
+# the row's style is a single StyleSheet entry with a constant height (and
+# the content container adds no gap or padding along the list), getItemLayout
+# spares the list from measuring rows. FlatList is added to the react-native
+# import.
+#
+# A list that would end up in a scroller of the same orientation is left
+# alone, which React Native warns about: one around it in the JSX, or around
+# a call of the render helper it is in (renderTabContent() inside a modal's
+# ScrollView). A helper whose calls cannot all be found is not trusted.
+#
+# python3 -m codemod.lists [GLOB ...] reports every list the rule converts
+# across the tree, and the ones it leaves alone with the reason.
+
+import argparse
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from codemod.buffers import char, compile_for, contains, decode, literal, text_slice
+from codemod.hoist import constant_style
+from codemod.imports import add_named_import
+from codemod.scanner import _prev_significant, scan
+from codemod.styles import style_index
+
+# Windowing props added unless the ScrollView already sets them
+WINDOWING = (
+    ('initialNumToRender', '{10}'),
+    ('maxToRenderPerBatch', '{10}'),
+    ('windowSize', '{5}'),
+    ('removeClippedSubviews', ''),
+)
+_SCROLLERS = {'ScrollView', 'FlatList', 'SectionList', 'Animated.ScrollView', 'Animated.FlatList'}
+# ScrollView props with no FlatList equivalent: a ref would end up on a
+# FlatList, whose methods differ
+_UNSUPPORTED = ('ref',)
+_IDENT = r'[A-Za-z_$][\w$]*'
+_MAP = re.compile(r'\??\.\s*map\s*$')
+# Identifiers, member access, indexing and calls: `deal.activities`,
+# `pipelines[selected].stages`, `getCurrentStageData()`
+_DATA = re.compile(rf'{_IDENT}(?:\s*(?:\??\.\s*{_IDENT}|(?:\?\.)?\[[^\[\]]*\]|\([^()]*\)))*')
+_PARAMS = rf'\s*(?:({_IDENT})|\(\s*(?:({_IDENT})\s*(?:,\s*({_IDENT})\s*)?)?\))\s*=>\s*'
+_RETURN = r'(?<![\w$.])return\s*\(?\s*<'
+_ATTRIBUTE = r'(?<![\w$.-]){}\s*=\s*\{{'
+_STYLE_REF = re.compile(r'\s*styles\.([\w$]+)\s*$')
+# What names the function starting where the match ends: `const renderTab =`,
+# `function renderTab`, or a method `renderTab(`
+_FUNCTION_NAME = rf'(?:(?<![\w$.])(?:const|let|var)\s+({_IDENT})\s*(?::[^=;]*)?=\s*(?:async\s*)?|(?<![\w$.])function\s*\*?\s*({_IDENT})?\s*(?:<[^>(]*>)?\s*)$'
+_CONTROL = {'if', 'for', 'while', 'switch', 'catch', 'with'}
+# Style properties that add to a row's extent, and the container properties
+# that offset rows, for vertical and horizontal lists
+_AXES = {
+    False: ('height', (('marginTop', 1), ('marginBottom', 1), ('marginVertical', 2), ('margin', 2)),
+            ('gap', 'rowGap', 'padding', 'paddingTop', 'paddingVertical')),
+    True: ('width', (('marginLeft', 1), ('marginRight', 1), ('marginHorizontal', 2), ('margin', 2)),
+           ('gap', 'columnGap', 'padding', 'paddingLeft', 'paddingHorizontal')),
+}
+
+
+@dataclass
+class ScrollList:
+    start: int
+    end: int
+    line: int
+    data: str = ''
+    # The row's constant extent along the list, if it has one
+    item_size: float = None
+    # Why the list was left alone, if it was
+    skipped: str = ''
+    edits: list = field(default_factory=list)
+
+
+@dataclass
+class ListReport:
+    path: str
+    lists: list = field(default_factory=list)
+
+    @property
+    def converted(self):
+        return [found for found in self.lists if not found.skipped]
+
+
+def _line_indent(text, pos):
+    line = text_slice(text, text.rfind(literal(text, '\n'), 0, pos) + 1, pos)
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _line(text, pos):
+    # mmap has no count()
+    return sum(1 for _ in compile_for(text, r'\n').finditer(text, 0, pos)) + 1
+
+
+def _group(m, k):
+    return decode(m.group(k)) if m.group(k) else ''
+
+
+def _strip(text, start, end):
+    # Bounds of text[start:end] without surrounding whitespace
+    while start < end and char(text, start).isspace():
+        start += 1
+    while end > start and char(text, end - 1).isspace():
+        end -= 1
+    return start, end
+
+
+def _attribute(text, index, elem, name):
+    # Source of `name={...}` in `elem`'s opening tag, or None
+    m = compile_for(text, _ATTRIBUTE.format(re.escape(name))).search(text, elem.start, elem.open_end)
+    if m is None or not index.is_code(m.start()):
+        return None
+    pair = index.pair_at(m.end() - 1)
+    return text_slice(text, pair.open + 1, pair.close) if pair is not None and pair.close >= 0 else None
+
+
+def _has_attribute(text, elem, name):
+    return compile_for(text, rf'(?<![\w$.-]){re.escape(name)}(?![\w$-])').search(text, elem.start + 1 + len(elem.name), elem.open_end) is not None
+
+
+def _number(props, key):
+    # Value of `key` in constant style `props`: 0 when absent, None when it is
+    # not a plain number (a percentage, say)
+    value = dict(props).get(key)
+    if value is None:
+        return 0
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _style_props(text, sheet, source):
+    # Properties of `styles.X` when `source` is exactly that, else None
+    m = _STYLE_REF.match(source or '')
+    entry = sheet.get(m.group(1)) if m and sheet is not None else None
+    return constant_style(text_slice(text, entry.value_start, entry.value_end)) if entry else None
+
+
+def _item_size(text, index, sheet, scroller, row, horizontal):
+    extent, margins, offsets = _AXES[horizontal]
+    row_props = _style_props(text, sheet, _attribute(text, index, row, 'style'))
+    if not row_props or _number(row_props, extent) in (0, None):
+        return None
+    size = _number(row_props, extent)
+    for key, times in margins:
+        margin = _number(row_props, key)
+        if margin is None:
+            return None
+        size += margin * times
+    container = _attribute(text, index, scroller, 'contentContainerStyle')
+    if container is not None:
+        container_props = _style_props(text, sheet, container)
+        if container_props is None or any(_number(container_props, key) != 0 for key in offsets):
+            return None
+    return size
+
+
+def _row(text, index, elements, body_start, body_end):
+    # The element the callback returns: its body, the expression in its
+    # parentheses, or the first `return <...>` of a block body
+    start = body_start
+    if char(text, start) == '{':
+        m = compile_for(text, _RETURN).search(text, start, body_end)
+        if m is None or not index.is_code(m.start()):
+            return None
+        start = m.end() - 1
+    while char(text, start) == '(' or char(text, start).isspace():
+        start += 1
+    return elements.get(start)
+
+
+def _render_params(item, position):
+    fields = [f'item: {item}' if item != 'item' else 'item'] if item else []
+    if position:
+        fields.append('index' if position == 'index' else f'index: {position}')
+    return f"({{ {', '.join(fields)} }})" if fields else '()'
+
+
+def _prev_code(text, pos):
+    j = pos - 1
+    while j >= 0 and char(text, j).isspace():
+        j -= 1
+    return j
+
+
+class _Renders:
+    # Where the JSX of a file ends up rendered: its JSX ancestors and, past
+    # the outermost one, the call sites of the function that returns it
+    def __init__(self, text, index):
+        self.text = text
+        self.index = index
+        self.closes = {pair.close: pair for pair in index.pairs}
+        self.starts = [elem.start for elem in index.elements]
+
+    def element_around(self, pos):
+        # Index of the innermost element holding `pos`, or -1
+        k = bisect_left(self.starts, pos) - 1
+        while k >= 0 and not (self.index.elements[k].end < 0 or pos < self.index.elements[k].end):
+            k = self.index.elements[k].parent
+        return k
+
+    def _params(self, j):
+        # The `(` pair of the parameters closing at or before `j` (past a
+        # return type), or None
+        text = self.text
+        if char(text, j) != ')':
+            m = compile_for(text, r'\)\s*:[^=;{}()]*$').search(text, max(0, j - 80), j + 1)
+            j = m.start() if m else -1
+        return self.closes.get(j) if j >= 0 else None
+
+    def _function_start(self, body, kind):
+        # Where the function whose body starts at `body` (a `kind` pair, or
+        # '' for an arrow's bare expression) starts, or -1 if it is none
+        text = self.text
+        j = _prev_code(text, body)
+        if j >= 1 and char(text, j) == '>' and char(text, j - 1) == '=':
+            k = _prev_code(text, j - 1)
+            params = self._params(k) if k >= 0 else None
+            if params is not None:
+                return params.open
+            m = compile_for(text, rf'{_IDENT}\s*$').search(text, max(0, k - 80), k + 1)
+            return m.start() if m else -1
+        if kind == '{' and j >= 0:
+            params = self._params(j)
+            if params is not None and _prev_significant(text, params.open)[1] not in _CONTROL:
+                return params.open
+        return -1
+
+    def function_around(self, pos):
+        # (start, name, name position) of the innermost function whose body
+        # holds `pos`, or None at module level; the name is '' for a
+        # function that has none (a callback, an IIFE)
+        index = self.index
+        body, kind = pos, ''
+        pair = index.enclosing_pair(pos)
+        while True:
+            start = self._function_start(body, kind)
+            if start >= 0:
+                return (start,) + self._name(start)
+            if pair is None:
+                return None
+            body, kind = pair.open, pair.kind
+            pair = index.pairs[pair.parent] if pair.parent >= 0 else None
+
+    def _name(self, start):
+        # (name, position) of the function starting at `start`
+        text = self.text
+        m = compile_for(text, _FUNCTION_NAME).search(text, max(0, start - 120), start)
+        k = 1 if m is not None and m.group(1) else 2
+        if m is not None and m.group(k):
+            return decode(m.group(k)), m.start(k)
+        c, word = _prev_significant(text, start)
+        if word and word not in ('function', 'async'):
+            # A method
+            return word, _prev_code(text, start) + 1 - len(word)
+        return '', -1
+
+    def same_orientation(self, parent, pos, horizontal, seen=None):
+        # Why JSX at `pos`, inside element number `parent`, may be rendered
+        # in a scroller of the given orientation, or '' if it is not
+        text, index = self.text, self.index
+        while parent >= 0:
+            outer = index.elements[parent]
+            if outer.name in _SCROLLERS and _has_attribute(text, outer, 'horizontal') == horizontal:
+                return f'inside a {outer.name} of the same orientation'
+            pos, parent = outer.start, outer.parent
+        function = self.function_around(pos)
+        if function is None:
+            return ''
+        start, name, name_pos = function
+        if not name:
+            return 'rendered by a function whose callers cannot be followed'
+        if name[0].isupper() and index.enclosing_pair(start) is None:
+            # A screen or component: where it is rendered is up to other files
+            return ''
+        seen = set() if seen is None else seen
+        if name in seen:
+            return ''
+        seen.add(name)
+        calls = []
+        for m in compile_for(text, rf'(?<![\w$.]){re.escape(name)}(?![\w$])').finditer(text):
+            use = m.start()
+            if use == name_pos or not index.is_code(use):
+                continue
+            if compile_for(text, r'\s*\(').match(text, m.end()):
+                calls.append(use)
+            elif use > 0 and char(text, use - 1) == '<':
+                calls.append(use - 1)
+            else:
+                return f'rendered by {name}, which is passed around rather than called'
+        if not calls:
+            return f'rendered by {name}(), which is never called in this file'
+        for call in calls:
+            reason = self.same_orientation(self.element_around(call), call, horizontal, seen)
+            if reason:
+                return f'rendered by {name}(), {reason}'
+        return ''
+
+
+def _convert(text, index, elements, sheet, scroller, found, renders):
+    # The FlatList source for `scroller`, or sets found.skipped
+    start, end = _strip(text, scroller.open_end, scroller.close_start)
+    if char(text, start) != '{' or index.pair_at(start) is None or index.pair_at(start).close != end - 1:
+        found.skipped = 'the map call is not its only child'
+        return
+    container = index.pair_at(start)
+    last = _strip(text, container.open + 1, container.close)[1] - 1
+    call = index.enclosing_pair(last, '(')
+    head = text_slice(text, container.open + 1, call.open) if call is not None and call.close == last else ''
+    m = _MAP.search(head)
+    data = head[:m.start()].strip() if m else ''
+    if not m or not _DATA.fullmatch(data):
+        found.skipped = 'the child is not a plain `array.map(...)` call'
+        return
+    found.data = data
+
+    params = compile_for(text, _PARAMS).match(text, call.open + 1, call.close)
+    if params is None:
+        found.skipped = 'the map callback is not an arrow function with plain (item, index) parameters'
+        return
+    for comma in compile_for(text, ',').finditer(text, params.end(), call.close):
+        if index.is_code(comma.start()) and index.enclosing_pair(comma.start()) is call:
+            found.skipped = 'map() is given more than the callback'
+            return
+    if any(_has_attribute(text, scroller, name) for name in _UNSUPPORTED):
+        found.skipped = f"the ScrollView has a {'/'.join(_UNSUPPORTED)} FlatList would not honour"
+        return
+    item, position = _group(params, 1) or _group(params, 2), _group(params, 3)
+    body_start, body_end = _strip(text, params.end(), call.close)
+
+    row = _row(text, index, elements, body_start, body_end)
+    key = _attribute(text, index, row, 'key') if row is not None else None
+    key = key.strip() if key else ''
+    index_name = position or 'index'
+    if key and (not position or key != position):
+        uses_item = bool(item) and re.search(rf'(?<![\w$.]){re.escape(item)}(?![\w$])', key)
+        uses_index = bool(position) and re.search(rf'(?<![\w$.]){re.escape(position)}(?![\w$])', key)
+        extractor = f"({item if uses_item else '_'}{', ' + position if uses_index else ''}) => String({key})"
+    else:
+        extractor = f'(_, {index_name}) => String({index_name})'
+
+    # A FlatList in a scroll container of the same orientation renders every
+    # row anyway, and React Native reports it as an error; the container may
+    # be around the call of the render helper the list is in
+    horizontal = _has_attribute(text, scroller, 'horizontal')
+    found.skipped = renders.same_orientation(scroller.parent, scroller.start, horizontal)
+    if found.skipped:
+        return
+    found.item_size = _item_size(text, index, sheet, scroller, row, horizontal) if row is not None else None
+
+    indent = _line_indent(text, scroller.start)
+    attributes = text_slice(text, scroller.start + 1 + len(scroller.name), scroller.open_end - 1).strip()
+    attr_indent = indent + '  '
+    if '\n' in attributes:
+        second = attributes.split('\n')[1]
+        attr_indent = second[:len(second) - len(second.lstrip())]
+    # The row source is left as it is; only what comes before and after it
+    # changes
+    if attributes:
+        attributes = '\n'.join(line.rstrip() for line in attributes.split('\n'))
+    props = [f'keyExtractor={{{extractor}}}'] + ([attributes] if attributes else [])
+    if found.item_size is not None:
+        size = f'{found.item_size:g}'
+        entry = 'index' if index_name == 'index' else f'index: {index_name}'
+        props.append(f'getItemLayout={{(_, {index_name}) => ({{ length: {size}, offset: {size} * {index_name}, {entry} }})}}')
+    for name, value in WINDOWING:
+        if not _has_attribute(text, scroller, name):
+            props.append(f'{name}={value}' if value else name)
+    close_indent = _line_indent(text, scroller.close_start)
+    found.edits = [
+        (scroller.start + 1, body_start, f'FlatList\n{attr_indent}data={{{data}}}\n{attr_indent}renderItem={{{_render_params(item, position)} => '),
+        (body_end, scroller.end, '}\n' + ''.join(f'{attr_indent}{prop}\n' for prop in props) + close_indent + '/>'),
+    ]
+
+
+def find_scroll_lists(text):
+    # Every ScrollView with a .map() call among its children, converted or
+    # with the reason it is not
+    index = scan(text)
+    elements = {elem.start: elem for elem in index.elements}
+    sheet = style_index(text).sheet()
+    renders = _Renders(text, index)
+    found = []
+    for scroller in index.elements:
+        if scroller.name != 'ScrollView' or scroller.close_start < 0:
+            continue
+        maps = [m for m in compile_for(text, r'\.\s*map\s*\(').finditer(text, scroller.open_end, scroller.close_start) if index.is_code(m.start())]
+        if not maps:
+            continue
+        scroll_list = ScrollList(scroller.start, scroller.end, _line(text, scroller.start))
+        _convert(text, index, elements, sheet, scroller, scroll_list, renders)
+        found.append(scroll_list)
+
+    # A list inside another one being converted waits for the next run
+    converted = [scroll_list for scroll_list in found if not scroll_list.skipped]
+    for scroll_list in converted:
+        if any(outer.start < scroll_list.start and scroll_list.end <= outer.end for outer in converted if outer is not scroll_list):
+            scroll_list.skipped = 'inside another list converted in this run'
+    return found
+
+
+def plan_lists(text, path=''):
+    # (edits, ListReport)
+    report = ListReport(path, find_scroll_lists(text))
+    edits = [edit for found in report.converted for edit in found.edits]
+    if edits:
+        edits.extend(add_named_import(text, 'react-native', 'FlatList'))
+    return edits, report
+
+
+def virtualize_scroll_lists(buf):
+    if not contains(buf, '<ScrollView') or not contains(buf, '.map'):
+        return []
+    return plan_lists(buf)[0]
+
+
+def format_list_report(report):
+    lines = []
+    for found in report.lists:
+        where = f'{report.path}:{found.line}'
+        if found.skipped:
+            lines.append(f'➖ {where}: {found.data or "ScrollView"} left as is, {found.skipped}')
+            continue
+        layout = f'getItemLayout ({found.item_size:g})' if found.item_size is not None else 'rows measured'
+        lines.append(f'✅ {where}: {found.data} -> FlatList, {layout}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    from codemod.tree import DEFAULT_GLOBS, expand_globs
+
+    parser = argparse.ArgumentParser(prog='codemod.lists', description='Report the ScrollView lists virtualize_scroll_lists converts.')
+    parser.add_argument('globs', nargs='*', help='files to analyse (default: the tree globs)')
+    args = parser.parse_args(argv)
+    converted = skipped = 0
+    for path in sorted(expand_globs(args.globs or DEFAULT_GLOBS)):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+        if not contains(text, '<ScrollView'):
+            continue
+        _, report = plan_lists(text, path)
+        if report.lists:
+            print(format_list_report(report))
+        converted += len(report.converted)
+        skipped += len(report.lists) - len(report.converted)
+    print(f'🌲 {converted} list(s) converted to FlatList, {skipped} left as ScrollView')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+# Multi-pattern matcher for the large literal anchors rules look for.
+#
+# Every registered needle is split into whitespace-insensitive tokens and added
+# to a single Aho-Corasick automaton, so one pass over a file's tokens finds
+# every rule's anchors at once, and indentation or line-wrapping drift in the
+# file no longer makes an exact-substring match fail.
+
+import re
+from collections import deque
+
+from codemod.buffers import literal, memoize_buffer
+
+# ASCII word runs, runs of non-ASCII characters, single punctuation. The bytes
+# pattern splits UTF-8 input into exactly the same tokens as the str one.
+_TOKEN = re.compile(r'[\w$]+|[^\x00-\x7f]+|\S', re.ASCII)
+_TOKEN_BYTES = re.compile(rb'[\w$]+|[\x80-\xff]+|\S')
+
+# Registered needles by name, in registration order
+ANCHORS = {}
+
+_automaton = None
+
+
+class Automaton:
+    def __init__(self, needles):
+        self.vocab = {}
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        self.lengths = {}
+
+        for name, needle in needles.items():
+            tokens = _TOKEN.findall(needle)
+            if not tokens:
+                raise ValueError(f"Anchor '{name}' has no tokens")
+            state = 0
+            for token in tokens:
+                token_id = self.vocab.setdefault(token, len(self.vocab))
+                nxt = self.goto[state].get(token_id)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                    self.goto[state][token_id] = nxt
+                state = nxt
+            self.out[state] += (name,)
+            self.lengths[name] = len(tokens)
+
+        # Breadth-first failure links; outputs are merged along them
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token_id, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fail = self.fail[state]
+                while fail and token_id not in self.goto[fail]:
+                    fail = self.fail[fail]
+                target = self.goto[fail].get(token_id, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+        self.vocab_bytes = {token.encode('utf-8'): token_id for token, token_id in self.vocab.items()}
+        self.longest = max(self.lengths.values(), default=0)
+
+        # Files without any needle's longest token cannot match anything
+        keys = sorted({max(_TOKEN.findall(needle), key=len) for needle in needles.values()}, key=len, reverse=True)
+        self.prefilter = re.compile('|'.join(map(re.escape, keys))) if keys else None
+        self.prefilter_bytes = re.compile('|'.join(map(re.escape, keys)).encode('utf-8')) if keys else None
+
+    def search(self, text, start=0, end=None, prefilter=True):
+        # {name: [(start, end), ...]} with offsets into `text` (str, bytes or
+        # mmap); memory is bounded by the longest needle, not the file
+        hits = {}
+        binary = not isinstance(text, str)
+        end = len(text) if end is None else end
+        check = self.prefilter_bytes if binary else self.prefilter
+        if check is None or (prefilter and not check.search(text, start, end)):
+            return hits
+        vocab = self.vocab_bytes if binary else self.vocab
+        goto, fail, out, lengths = self.goto, self.fail, self.out, self.lengths
+        # Start offsets of the last `longest` tokens
+        starts = deque(maxlen=self.longest)
+        state = 0
+        for m in (_TOKEN_BYTES if binary else _TOKEN).finditer(text, start, end):
+            starts.append(m.start())
+            token_id = vocab.get(m.group())
+            if token_id is None:
+                state = 0
+                continue
+            while state and token_id not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token_id, 0)
+            for name in out[state]:
+                hits.setdefault(name, []).append((starts[-lengths[name]], m.end()))
+        return hits
+
+
+def register_anchor(name, literal):
+    global _automaton
+    if name in ANCHORS:
+        raise ValueError(f"Anchor '{name}' is already registered")
+    ANCHORS[name] = literal
+    _automaton = None
+    _find_all.cache_clear()
+
+
+def automaton():
+    global _automaton
+    if _automaton is None:
+        _automaton = Automaton(ANCHORS)
+    return _automaton
+
+
+@memoize_buffer(maxsize=16)
+def _find_all(text):
+    return automaton().search(text)
+
+
+def _token_window(text, start, end, count):
+    # Offsets `count` whole tokens before `start` and after `end`
+    token = _TOKEN if isinstance(text, str) else _TOKEN_BYTES
+    lo, step = start, 256
+    while True:
+        lo = max(0, lo - step)
+        tokens = [m.start() for m in token.finditer(text, lo, start)]
+        # The first token may be cut off by `lo`, so it does not count
+        if lo == 0 or len(tokens) > count + 1:
+            lo = tokens[-count - 1] if len(tokens) > count + 1 else 0
+            break
+        step *= 2
+    hi, step = end, 256
+    while True:
+        hi = min(len(text), hi + step)
+        tokens = [m.end() for m in token.finditer(text, end, hi)]
+        if hi == len(text) or len(tokens) > count + 1:
+            hi = tokens[count] if len(tokens) > count + 1 else len(text)
+            break
+        step *= 2
+    return lo, hi
+
+
+def research(hits, text, span):
+    # Anchor hits for `text`, an edited version of the text `hits` was found
+    # in, given the scanner.changed_span() of the edit. A match needs at most
+    # the longest needle's token count on either side of the edit, so only
+    # that window is searched again; hits clear of the edit are kept or
+    # shifted.
+    start, old_end, new_end = span
+    delta = new_end - old_end
+    finder = automaton()
+    lo, hi = _token_window(text, start, new_end, finder.longest)
+    window = finder.search(text, lo, hi, prefilter=False)
+    result = {}
+    for name in finder.lengths:
+        spans = [hit for hit in hits.get(name, ()) if hit[1] < start]
+        spans.extend(hit for hit in window.get(name, ()) if hit[1] >= start and hit[0] <= new_end and hit[1] < hi)
+        spans.extend((a + delta, b + delta) for a, b in hits.get(name, ()) if a > old_end)
+        if spans:
+            result[name] = sorted(spans, key=lambda hit: hit[1])
+    return result
+
+
+def find_anchor(text, name):
+    # Non-overlapping spans of anchor `name` in `text`; the first lookup on a
+    # given text runs the whole automaton and later rules reuse the result
+    if name not in ANCHORS:
+        raise KeyError(f"Unknown anchor '{name}'")
+    spans = []
+    for start, end in _find_all(text).get(name, ()):
+        if not spans or start >= spans[-1][1]:
+            spans.append((start, end))
+    return spans
+
+
+def reindent(template, indent):
+    # Strip the template's own first-line indent and shift every other line
+    # so the block lines up with `indent`, the indent found in the file
+    lines = template.split('\n')
+    base = lines[0][:len(lines[0]) - len(lines[0].lstrip())]
+    shifted = [lines[0][len(base):]]
+    for line in lines[1:]:
+        shifted.append(indent + line[len(base):] if line.startswith(base) else line)
+    return '\n'.join(shifted)
+
+
+def indent_at(text, pos):
+    line_start = text.rfind(literal(text, '\n'), 0, pos) + 1
+    prefix = text[line_start:pos]
+    if not isinstance(prefix, str):
+        prefix = prefix.decode('utf-8', 'replace')
+    return prefix if not prefix.strip() else ''
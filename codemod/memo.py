@@ -0,0 +1,1010 @@
+# Constant arrays and derived collections in render code: hoisted or memoized.
+#
+# A component's body runs on every render, and so does everything declared
+# in it. add_activity_filters left
+#
+#     const activities = [ ...a dozen constant rows... ];
+#     const filteredActivities = activityFilter === 'all'
+#       ? activities
+#       : activities.filter(activity => activity.type === activityFilter);
+#
+# inside the Activity case of renderTabContent: every render (a keystroke in
+# the notes tab) builds the rows again, filters them again and hands the list
+# a new array, so every row renders again. In each component (a top-level
+# function or arrow with a capitalized name) the rule looks at the `const`
+# declarations of the body, at any depth:
+#
+#   - an array or object literal that only refers to module-level names
+#     (imports, top-level declarations) and is never mutated moves to the end
+#     of the file as ACTIVITIES, where it is built once;
+#   - a collection derived without side effects (filter, map, slice, sort on
+#     a copy...) from the state, props and values of the component is wrapped
+#     in useMemo, with the component-level names it uses as dependencies;
+#     one derived from module-level names alone moves to the end of the file
+#     like a constant, and one that depends on an array or object literal
+#     the component builds again on every render is left alone, as its memo
+#     would never hit.
+#     Hooks run unconditionally at the top of the component, so a declaration
+#     nested in render code (a render* helper, an IIFE in the JSX, a map
+#     callback or renderItem) moves up there, after the hooks and the
+#     declarations it depends on. A value that uses a function recreated on
+#     every render, a name of the nested code, or a name the rule cannot
+#     resolve is left alone, and so is code that only runs in handlers.
+#
+# Row components (extract_duplicate_subtrees adds them) rendered from a
+# .map() callback or a renderItem are wrapped in React.memo, unless a call
+# site hands them children or a new function, object or array on every
+# render, which would defeat it.
+#
+# python3 -m codemod.memo [GLOB ...] reports per file what the rule hoists,
+# memoizes and wraps, and what it leaves alone with the reason.
+
+import argparse
+import re
+import textwrap
+from bisect import bisect_right
+from dataclasses import dataclass, field
+
+from codemod.buffers import char, compile_for, contains, decode, literal, text_slice
+from codemod.duplicates import _GLOBALS, _IDENT, _camel_words, _module_names
+from codemod.hoist import _MAP_CALL
+from codemod.imports import add_named_imports, find_imports
+from codemod.lists import _line
+from codemod.matcher import indent_at, reindent
+from codemod.scanner import _EXPR_PREV, _prev_significant, _starts_expression, scan
+from codemod.symbols import _IDENTIFIER
+
+# Longest useMemo call kept on one line
+MAX_LINE = 100
+
+_NAME = r'[A-Za-z_$][\w$]*'
+_KEYWORDS = {
+    'break', 'case', 'catch', 'class', 'const', 'continue', 'debugger', 'default', 'delete', 'do', 'else', 'export',
+    'extends', 'finally', 'for', 'function', 'if', 'import', 'in', 'instanceof', 'let', 'new', 'return', 'super',
+    'switch', 'this', 'throw', 'try', 'typeof', 'var', 'void', 'while', 'with', 'yield', 'await', 'async', 'of', 'as',
+    'true', 'false', 'null', 'undefined', 'type', 'interface', 'keyof', 'readonly', 'satisfies',
+}
+# Type names an annotation may use, and what render code may call besides the
+# module's own names
+_TYPES = {'string', 'number', 'boolean', 'any', 'unknown', 'never', 'object', 'symbol', 'bigint'}
+_BUILTINS = _GLOBALS | {'Set', 'Map', 'Intl', 'RegExp', 'Symbol', 'isNaN', 'isFinite'}
+# Array methods that derive a new collection, the ones that sort in place,
+# and the calls a derived value may make besides them
+_DERIVING = {'filter', 'map', 'flatMap', 'flat', 'slice', 'concat', 'reduce', 'reduceRight', 'toSorted', 'toReversed'}
+_IN_PLACE = {'sort', 'reverse'}
+_FRESH = _DERIVING | {'from', 'keys', 'values', 'entries', 'split'}
+_PURE_METHODS = {
+    'includes', 'indexOf', 'lastIndexOf', 'find', 'findIndex', 'findLast', 'findLastIndex', 'some', 'every', 'join',
+    'at', 'keys', 'values', 'entries', 'fromEntries', 'from', 'isArray', 'toLowerCase', 'toUpperCase', 'trim',
+    'trimStart', 'trimEnd', 'startsWith', 'endsWith', 'split', 'substring', 'padStart', 'padEnd', 'charAt',
+    'localeCompare', 'toFixed', 'toString', 'toLocaleString', 'toLocaleDateString', 'toLocaleTimeString', 'getTime',
+    'getDate', 'getDay', 'getMonth', 'getFullYear', 'getHours', 'getMinutes', 'toISOString', 'stringify', 'max', 'min',
+    'abs', 'round', 'floor', 'ceil', 'has',
+}
+_PURE_FUNCTIONS = {'String', 'Number', 'Boolean', 'Array', 'parseInt', 'parseFloat', 'isNaN', 'isFinite'}
+
+_DECLARATOR = r'(?<![\w$.])(const|let|var)\s+'
+_FUNCTION_DECLARATION = rf'(?<![\w$.])function\b\s*\*?\s*({_NAME})?\s*(?:<[^>(]*>)?\s*\('
+_COMPONENT = r'(?<![\w$.])(?:function\s+([A-Z][\w$]*)\s*(?:<[^>(]*>)?\s*\(|const\s+([A-Z][\w$]*)\s*(?::[^=;]*)?=\s*(?:async\s*)?\()'
+_ROW = r'(?<![\w$.])const\s+([A-Z][\w$]*)\s*=\s*\('
+_ASSIGN = r'\s*(?::[^=;]*?)?=(?![=>])'
+_ARROW = r'\s*(?::[^=;{}]*)?=>\s*'
+_BODY = r'\s*(?::[^{;=]*)?\{'
+_FUNCTION = rf'\s*(?:async\s+)?(?:function\b|{_NAME}\s*=>)'
+_HOOK = r'\s*(?:React\.)?(use[A-Z][\w$]*)\b'
+_STATE = r'\s*(?:React\.)?useState\s*(?:<[^>()]*>)?\s*\(\s*[\[{\'"`\d]'
+_HOOK_CALL = r'(?<![\w$.])(?:React\.)?use[A-Z][\w$]*\s*(?:<[^>(]*>)?\s*\('
+_RETURN = r'(?<![\w$.])return\b'
+_NEXT_STATEMENT = r'\n[ \t]*(?:const|let|var|return|if|for|while|switch|function|export|import|case|default)\b'
+_TOP_STATEMENT = rf'(?<![\w$.])(?:(?:const|let)\s+({_NAME})\s*(?::[^=;]*)?=|function\s+({_NAME})|(return)\b)'
+_DERIVED = r'\??\.\s*(?:' + '|'.join(sorted(_DERIVING)) + r')\s*\('
+_IMPURE = r'\(|(?<![\w$.])(?:new|await|yield|delete)\b|\+\+|--|(?<![=!<>+\-*/%&|^])=(?![=>])|[-+*/%&|^]=|\?\?='
+_MUTATION = (r'\s*(?:\??\.\s*(?:push|pop|shift|unshift|splice|sort|reverse|fill|copyWithin)\s*\('
+             r'|(?:\.\s*[\w$]+|\[[^\]\n]*\])*\s*(?:[-+*/%&|^]|\*\*|<<|>>>?|&&|\|\||\?\?)?=(?![=>])|\+\+|--)')
+_MUTATION_BEFORE = r'(?:\+\+|--|(?<![\w$.])delete\s+)\s*$'
+_RENDER_HELPER = r'(?<![\w$.])(?:const|let)\s+render[\w$]*\s*(?::[^=;]*)?=\s*(?:async\s*)?$'
+_RENDER_CALLBACK = r'(?:\.\s*(?:map|flatMap)\s*\(|(?<![\w$.-])render[\w$]*\s*=\s*\{)\s*$'
+_ATTRIBUTE = r'(?<![\w$.-])([\w$-]+)\s*=\s*\{'
+_NEW = r'\s*(?:Set|Map)\b|\s*Date\s*\(\s*[^\s)]'
+# An initializer that builds a new object, array or element on every render
+_FRESH_VALUE = r'\s*(?:[\[{<]|new\b)'
+
+
+@dataclass
+class Memoized:
+    name: str
+    line: int
+    # 'constant', 'derived' or 'row'
+    kind: str
+    # The module-level name of a hoisted constant
+    to: str = ''
+    # Dependencies of a memoized value, and the component it moved to the
+    # top of, if it was nested
+    deps: list = field(default_factory=list)
+    moved: str = ''
+    # Why it was left alone, if it was
+    skipped: str = ''
+
+
+@dataclass
+class MemoReport:
+    path: str
+    found: list = field(default_factory=list)
+
+    def count(self, kind):
+        return sum(1 for found in self.found if found.kind == kind and not found.skipped)
+
+
+@dataclass
+class _Binding:
+    name: str
+    pos: int
+    # Offsets the name is visible in
+    scope: tuple
+    kind: str
+    # The hook the value comes from (useState, useCallback...), if any
+    hook: str = ''
+    setter: bool = False
+    function: bool = False
+    # Declared by a destructuring pattern
+    pattern: bool = False
+    # Bounds of the declaration statement and of its initializer
+    statement: tuple = None
+    init: tuple = None
+
+
+@dataclass
+class _Component:
+    name: str
+    start: int
+    params: object
+    body: object
+
+
+def _skip_space(text, pos, end):
+    while pos < end and char(text, pos).isspace():
+        pos += 1
+    return pos
+
+
+def _prev_code(text, pos):
+    # Offset of the last non-space character before `pos`, or -1
+    pos -= 1
+    while pos >= 0 and char(text, pos).isspace():
+        pos -= 1
+    return pos
+
+
+def _statement_end(text, index, start, limit):
+    # (end of the expression, end of the statement) of the statement at
+    # `start`: its `;`, or the end of its last line when the next line starts
+    # another statement
+    outer = index.enclosing_pair(start)
+    stop = limit
+    for m in compile_for(text, _NEXT_STATEMENT).finditer(text, start, limit):
+        if index.is_code(m.end() - 1) and index.enclosing_pair(m.end() - 1) is outer:
+            stop = m.start()
+            break
+    for m in compile_for(text, ';').finditer(text, start, stop):
+        if index.is_code(m.start()) and index.enclosing_pair(m.start()) is outer:
+            return m.start(), m.end()
+    end = stop
+    while end > start and char(text, end - 1).isspace():
+        end -= 1
+    return end, end
+
+
+def _list_items(text, index, start, end):
+    # Bounds of the comma-separated items of text[start:end]
+    items = []
+    begin = pos = start
+    while pos < end:
+        c = char(text, pos)
+        pair = index.pair_at(pos) if c in '([{' else None
+        if pair is not None and pair.close >= 0:
+            pos = pair.close + 1
+            continue
+        if c == ',' and index.is_code(pos):
+            items.append((begin, pos))
+            begin = pos + 1
+        pos += 1
+    items.append((begin, end))
+    return items
+
+
+def _pattern_names(text, index, start, end, kind):
+    # Names bound by a destructuring pattern, or by a parameter list (kind
+    # '('), whose annotations and defaults bind nothing
+    names = []
+    for a, b in _list_items(text, index, start, end):
+        a = _skip_space(text, a, b)
+        if text_slice(text, a, a + 3) == '...':
+            a = _skip_space(text, a + 3, b)
+        if kind == '{':
+            renamed = compile_for(text, rf'{_NAME}\s*:(?!:)').match(text, a, b)
+            if renamed:
+                a = _skip_space(text, renamed.end(), b)
+        c = char(text, a)
+        if c in ('[', '{'):
+            pair = index.pair_at(a)
+            if pair is not None and pair.close >= 0:
+                names += _pattern_names(text, index, pair.open + 1, pair.close, c)
+            continue
+        m = compile_for(text, _NAME).match(text, a, b)
+        if m:
+            names.append(decode(m.group()))
+    return names
+
+
+class _File:
+    # The scan of a file and what every component's analysis shares
+    def __init__(self, text):
+        self.text = text
+        self.index = scan(text)
+        self.imports = find_imports(text)
+        self.module = _module_names(text, self.index, self.imports)
+        self.closes = {pair.close: pair for pair in self.index.pairs if pair.close >= 0}
+        self.starts = [elem.start for elem in self.index.elements]
+        # Every word of the file, so new names shadow nothing
+        self.taken = {decode(word) for word in compile_for(text, _IDENT.pattern).findall(text)}
+
+    def element_at(self, pos):
+        # The innermost element whose source holds `pos`
+        k = bisect_right(self.starts, pos - 1) - 1
+        elem = self.index.elements[k] if k >= 0 else None
+        while elem is not None and not (elem.start < pos < max(elem.end, elem.open_end)):
+            elem = self.index.elements[elem.parent] if elem.parent >= 0 else None
+        return elem
+
+    def in_tag(self, pos):
+        # The element whose opening tag holds `pos` outside any attribute
+        # value, or None
+        elem = self.element_at(pos)
+        if elem is None or not pos < elem.open_end:
+            return None
+        pair = self.index.enclosing_pair(pos)
+        return elem if pair is None or pair.open < elem.start else None
+
+    def is_function(self, pos):
+        # Whether the expression at `pos` is a function
+        text, index = self.text, self.index
+        if compile_for(text, _FUNCTION).match(text, pos):
+            return True
+        m = compile_for(text, r'\s*(?:async\s*)?\(').match(text, pos)
+        pair = index.pair_at(m.end() - 1) if m else None
+        return pair is not None and pair.close >= 0 and compile_for(text, _ARROW).match(text, pair.close + 1) is not None
+
+    def references(self, start, end, name=None):
+        # (name, start, end) of the identifiers in text[start:end] (named
+        # `name`, if given) that refer to a variable: not keywords,
+        # properties, object keys or attribute names
+        text, index = self.text, self.index
+        pattern = _IDENTIFIER if name is None else _IDENTIFIER.replace(_NAME, re.escape(name) + r'(?![\w$])')
+        for m in compile_for(text, pattern).finditer(text, start, end):
+            name = decode(m.group())
+            if name in _KEYWORDS or not index.is_code(m.start()) or name == '$' and char(text, m.end()) == '{':
+                continue
+            c, word = _prev_significant(text, m.start())
+            if word == 'as' or char(text, _skip_space(text, m.end(), len(text))) == ':' and c in ('{', ','):
+                continue
+            elem = self.in_tag(m.start())
+            if elem is not None and m.start() > elem.start + len(elem.name):
+                continue
+            yield name, m.start(), m.end()
+
+    def function_start(self, body):
+        # Where the function whose body is the `{` pair `body` starts, or -1
+        # if the pair is no function body
+        text = self.text
+        j = _prev_code(text, body.open)
+        if j >= 1 and char(text, j) == '>' and char(text, j - 1) == '=':
+            k = _prev_code(text, j - 1)
+            if char(text, k) == ')' and k in self.closes:
+                return self.closes[k].open
+            m = compile_for(text, rf'(?:async\s+)?{_NAME}\s*$').search(text, max(0, k - 80), k + 1)
+            return m.start() if m else -1
+        if j < 0 or char(text, j) != ')' or j not in self.closes:
+            return -1
+        params = self.closes[j]
+        m = compile_for(text, rf'(?<![\w$.])function\b\s*\*?\s*(?:{_NAME})?\s*(?:<[^>(]*>)?\s*$').search(text, max(0, params.open - 80), params.open)
+        return m.start() if m else -1
+
+    def render_time(self, start):
+        # Whether the function starting at `start` runs while rendering: an
+        # IIFE, a render* helper, a map callback or a render prop
+        text, index = self.text, self.index
+        before = text_slice(text, max(0, start - 80), start)
+        if re.search(_RENDER_HELPER, before) or re.search(_RENDER_CALLBACK, before):
+            return True
+        if compile_for(text, r'function\s*\*?\s*render').match(text, start):
+            return True
+        group = index.enclosing_pair(start)
+        return (group is not None and group.kind == '(' and _prev_code(text, start) == group.open
+                and compile_for(text, r'\s*\(').match(text, group.close + 1) is not None)
+
+    def bindings(self, comp):
+        # {name: [_Binding]} of what the component's params and body declare
+        text, index = self.text, self.index
+        start, end = comp.params.open, comp.body.close
+        found = []
+        if compile_for(text, _ARROW).match(text, comp.params.close + 1) is None:
+            # function Name(...) {: the `=>` loop below binds the parameters
+            # of arrow components
+            found += [_Binding(name, start, (start, end), 'param')
+                      for name in _pattern_names(text, index, start + 1, comp.params.close, '(')]
+        for m in compile_for(text, _DECLARATOR).finditer(text, start, end):
+            outer = index.enclosing_pair(m.start())
+            if not index.is_code(m.start()) or outer is None:
+                continue
+            scope = outer
+            if outer.kind == '(' and outer.parent >= 0:
+                # for (const x of ...): the loop
+                scope = index.pairs[outer.parent]
+            pos = m.end()
+            c = char(text, pos)
+            if c in ('[', '{'):
+                pair = index.pair_at(pos)
+                if pair is None or pair.close < 0:
+                    continue
+                names, pattern, after = _pattern_names(text, index, pair.open + 1, pair.close, c), True, pair.close + 1
+            else:
+                name = compile_for(text, _NAME).match(text, pos)
+                if name is None:
+                    continue
+                names, pattern, after = [decode(name.group())], False, name.end()
+            statement = init = None
+            hook, function = '', False
+            assign = compile_for(text, _ASSIGN).match(text, after)
+            if assign is not None:
+                expr_end, statement_end = _statement_end(text, index, m.start(), outer.close)
+                statement, init = (m.start(), statement_end), (assign.end(), expr_end)
+                used = compile_for(text, _HOOK).match(text, assign.end())
+                hook = decode(used.group(1)) if used else ''
+                function = self.is_function(assign.end())
+            for k, name in enumerate(names):
+                found.append(_Binding(
+                    name, pos, (scope.open, scope.close), decode(m.group(1)),
+                    hook=hook, setter=pattern and c == '[' and k == 1 and hook in ('useState', 'useReducer'),
+                    function=function, pattern=pattern, statement=statement, init=init,
+                ))
+        for m in compile_for(text, _FUNCTION_DECLARATION).finditer(text, start, end):
+            if not index.is_code(m.start()):
+                continue
+            params = index.pair_at(m.end() - 1)
+            if params is None or params.close < 0:
+                continue
+            body = compile_for(text, _BODY).match(text, params.close + 1)
+            body = index.pair_at(body.end() - 1) if body else None
+            outer = index.enclosing_pair(m.start())
+            if m.group(1) and outer is not None and outer.open >= start:
+                found.append(_Binding(decode(m.group(1)), m.start(1), (outer.open, outer.close), 'function', function=True,
+                                      statement=(m.start(), body.close + 1 if body else params.close + 1)))
+            if body is not None and body.close >= 0:
+                found += [_Binding(name, params.open, (params.open, body.close), 'param')
+                          for name in _pattern_names(text, index, params.open + 1, params.close, '(')]
+        for m in compile_for(text, '=>').finditer(text, start, end):
+            if not index.is_code(m.start()):
+                continue
+            begin = _skip_space(text, m.end(), end)
+            body = index.pair_at(begin) if char(text, begin) == '{' else None
+            if body is not None and body.close >= 0:
+                scope_end = body.close
+            else:
+                outer = index.enclosing_pair(m.start())
+                scope_end = outer.close if outer is not None else end
+                if outer is not None and outer.kind == '{':
+                    scope_end = _statement_end(text, index, m.end(), outer.close)[0]
+            # The parameters are in scope from the list on
+            j = _prev_code(text, m.start())
+            typed = compile_for(text, r'\)\s*:[^=(){};,]*$').search(text, max(0, j - 80), j + 1)
+            if typed is not None:
+                j = typed.start()
+            if char(text, j) == ')' and j in self.closes:
+                params = self.closes[j]
+                found += [_Binding(name, params.open, (params.open, scope_end), 'param')
+                          for name in _pattern_names(text, index, params.open + 1, j, '(')]
+                continue
+            c, word = _prev_significant(text, m.start())
+            if word and word not in _KEYWORDS:
+                pos = j - len(literal(text, word)) + 1
+                found.append(_Binding(word, pos, (pos, scope_end), 'param'))
+        bindings = {}
+        for binding in found:
+            bindings.setdefault(binding.name, []).append(binding)
+        return bindings
+
+
+def _resolve(bindings, name, pos):
+    # The innermost binding of `name` visible at `pos`, or None
+    best = None
+    for binding in bindings.get(name, ()):
+        if binding.scope[0] <= pos <= binding.scope[1] and (best is None or binding.scope[0] > best.scope[0]):
+            best = binding
+    return best
+
+
+def _top_level(binding, comp):
+    # Declared at the top of the component, or one of its parameters
+    return binding.scope[0] <= comp.body.open and binding.scope[1] == comp.body.close
+
+
+def _is_global(file, name):
+    return name in file.module or name in _BUILTINS or name in _TYPES or name[:1].isupper()
+
+
+def _components(file):
+    text, index = file.text, file.index
+    for m in compile_for(text, _COMPONENT).finditer(text):
+        if not index.is_code(m.start()) or index.enclosing_pair(m.start()) is not None:
+            continue
+        params = index.pair_at(m.end() - 1)
+        if params is None or params.close < 0:
+            continue
+        if m.group(1):
+            after = compile_for(text, _BODY).match(text, params.close + 1)
+        else:
+            after = compile_for(text, _ARROW + r'\{').match(text, params.close + 1)
+        body = index.pair_at(after.end() - 1) if after else None
+        if body is not None and body.close >= 0:
+            yield _Component(decode(m.group(1) or m.group(2)), m.start(), params, body)
+
+
+def _removal(text, start, end):
+    # Bounds that remove text[start:end] with the line it has to itself, its
+    # comment lines, and the blank line it would leave doubled
+    line_start = text.rfind(literal(text, '\n'), 0, start) + 1
+    if text_slice(text, line_start, start).strip():
+        return start, end
+    stop = end
+    while char(text, stop) in (' ', '\t'):
+        stop += 1
+    if char(text, stop) not in ('\n', ''):
+        return start, end
+    stop += 1
+    while line_start > 0:
+        above = text.rfind(literal(text, '\n'), 0, line_start - 1) + 1
+        if not text_slice(text, above, line_start).strip().startswith('//'):
+            break
+        line_start = above
+    above = text.rfind(literal(text, '\n'), 0, max(0, line_start - 1)) + 1
+    previous = text_slice(text, above, line_start).strip()
+    blank = compile_for(text, r'[ \t]*\n').match(text, stop)
+    if blank and (not previous or previous.endswith('{')):
+        stop = blank.end()
+    return line_start, stop
+
+
+def _folded(text, start, end, edits):
+    # text[start:end] with the edits inside it applied
+    parts = []
+    pos = start
+    for a, b, replacement in sorted(edits):
+        if start <= a and b <= end:
+            parts += [text_slice(text, pos, a), replacement]
+            pos = b
+    parts.append(text_slice(text, pos, end))
+    return ''.join(parts)
+
+
+def _constant_name(file, name):
+    base = '_'.join(word.upper() for word in _camel_words(name)) or name.upper()
+    declared = sum(1 for m in compile_for(file.text, rf'(?<![\w$.])(?:const|let|var|function)\s+{re.escape(name)}(?![\w$])').finditer(file.text))
+    n = 1
+    while True:
+        candidate = base if n == 1 else f'{base}_{n}'
+        if candidate not in file.taken or candidate == name and declared == 1 and name not in file.module:
+            file.taken.add(candidate)
+            return candidate
+        n += 1
+
+
+def _literal(file, binding):
+    # The array or object literal `binding` is initialized with, or None
+    text, index = file.text, file.index
+    start, end = binding.init
+    start = _skip_space(text, start, end)
+    pair = index.pair_at(start) if char(text, start) in ('[', '{') else None
+    if pair is None or pair.close < 0 or text_slice(text, pair.close + 1, end).strip() not in ('', 'as const'):
+        return None
+    return pair if text_slice(text, pair.open + 1, pair.close).strip() else None
+
+
+def _mutated(file, binding, bindings):
+    text = file.text
+    for name, start, end in file.references(*binding.scope, binding.name):
+        if start == binding.pos or _resolve(bindings, name, start) is not binding:
+            continue
+        if compile_for(text, _MUTATION).match(text, end) or re.search(_MUTATION_BEFORE, text_slice(text, max(0, start - 16), start)):
+            return True
+    return False
+
+
+def _renames(file, binding, bindings, new):
+    # Edits that refer to the hoisted `binding` by its new name
+    text, index = file.text, file.index
+    edits = []
+    for name, start, end in file.references(*binding.scope, binding.name):
+        if start == binding.pos or _resolve(bindings, name, start) is not binding:
+            continue
+        pair = index.enclosing_pair(start)
+        c, _ = _prev_significant(text, start)
+        after = char(text, _skip_space(text, end, len(text)))
+        if pair is not None and pair.kind == '{' and c in ('{', ',') and after in ('}', ',') and file.in_tag(pair.open) is None:
+            elem = file.element_at(pair.open)
+            # {name} as a JSX child is no object
+            if elem is None or pair.parent >= 0 and index.pairs[pair.parent].open > elem.start:
+                edits.append((start, end, f'{name}: {new}'))
+                continue
+        edits.append((start, end, new))
+    return edits
+
+
+def _call(file, pos):
+    # Why the call at the `(` at `pos` may have side effects, '' if it is
+    # pure or no call at all
+    text = file.text
+    c, word = _prev_significant(text, pos)
+    j = _prev_code(text, pos)
+    if not c or word in _KEYWORDS or not word and c not in (')', ']', '>'):
+        return ''
+    if c == '>':
+        return '' if char(text, j - 1) == '=' else 'calls a generic function'
+    if not word:
+        return 'calls the result of an expression'
+    k = _prev_code(text, j - len(literal(text, word)) + 1)
+    if _prev_significant(text, k + 1)[1] == 'new':
+        # Checked with the `new`
+        return ''
+    if char(text, k) != '.':
+        return '' if word in _PURE_FUNCTIONS else f'calls {word}()'
+    if word in _DERIVING or word in _PURE_METHODS:
+        return ''
+    if word not in _IN_PLACE:
+        return f'calls .{word}()'
+    # Sorting a copy is fine, sorting the array it came from is not
+    r = _prev_code(text, k - (char(text, k - 1) == '?'))
+    pair = file.closes.get(r)
+    if pair is not None and pair.kind == '(':
+        callee = compile_for(text, rf'\.\s*({_NAME})\s*$').search(text, max(0, pair.open - 40), pair.open)
+        if callee and decode(callee.group(1)) in _FRESH:
+            return ''
+    if pair is not None and pair.kind == '[' and _starts_expression(text, pair.open, _EXPR_PREV):
+        return ''
+    return f'{word}s an array in place'
+
+
+def _local_assignment(file, pos, start, end, bindings):
+    # Whether the assignment at `pos` is to a variable declared in
+    # text[start:end] (or a property of a const declared there)
+    text = file.text
+    m = compile_for(text, rf'({_NAME})((?:\s*(?:\??\.\s*[\w$]+|\[[^\]\n]*\]))*)\s*[-+*/%&|^?]*$').search(text, max(start, pos - 120), pos)
+    if m is None:
+        return False
+    target = _resolve(bindings, decode(m.group(1)), m.start(1))
+    if target is None or not start <= target.pos < end or target.kind not in ('const', 'let', 'var'):
+        return False
+    return bool(m.group(2).strip()) or target.kind != 'const'
+
+
+def _impurity(file, start, end, bindings):
+    # Why text[start:end] may have side effects, '' if it has none;
+    # initializing its own declarations is none
+    text, index = file.text, file.index
+    inits = {binding.init[0] for found in bindings.values() for binding in found if binding.init and start <= binding.pos < end}
+    for m in compile_for(text, _IMPURE).finditer(text, start, end):
+        if not index.is_code(m.start()):
+            continue
+        token = decode(m.group())
+        if token == '(':
+            reason = _call(file, m.start())
+            if reason:
+                return reason
+        elif token == 'new':
+            if not compile_for(text, _NEW).match(text, m.end()):
+                return 'constructs an object'
+        elif token in ('await', 'yield', 'delete', '++', '--'):
+            return f'uses {token}'
+        elif m.end() not in inits and file.in_tag(m.start()) is None and not _local_assignment(file, m.start(), start, end, bindings):
+            return 'assigns a variable'
+    return ''
+
+
+def _top_statement(file, comp, pos):
+    # (start, end, helper name or 'return') of the top-level statement of
+    # `comp` that holds `pos`, or None if it is neither a function
+    # definition nor a return
+    text, index = file.text, file.index
+    body = comp.body
+    found = None
+    for m in compile_for(text, _TOP_STATEMENT).finditer(text, body.open + 1, pos):
+        if index.is_code(m.start()) and index.enclosing_pair(m.start()) is body:
+            found = m
+    if found is None:
+        return None
+    start = found.start()
+    if found.group(2):
+        params = compile_for(text, r'\s*(?:<[^>(]*>)?\s*\(').match(text, found.end())
+        params = index.pair_at(params.end() - 1) if params else None
+        block = compile_for(text, _BODY).match(text, params.close + 1) if params is not None and params.close >= 0 else None
+        block = index.pair_at(block.end() - 1) if block else None
+        if block is None or not block.open < pos < block.close:
+            return None
+        return start, block.close + 1, decode(found.group(2))
+    end = _statement_end(text, index, start, body.close)[1]
+    if not pos < end:
+        return None
+    if found.group(3):
+        return start, end, 'return'
+    return (start, end, decode(found.group(1))) if file.is_function(found.end()) else None
+
+
+def _returns(file, comp):
+    # Offsets of the component's own return statements
+    text, index = file.text, file.index
+    found = []
+    for m in compile_for(text, _RETURN).finditer(text, comp.body.open, comp.body.close):
+        if not index.is_code(m.start()):
+            continue
+        pair = index.enclosing_pair(m.start())
+        while pair is not None and pair is not comp.body and not (pair.kind == '{' and file.function_start(pair) >= 0):
+            pair = index.pairs[pair.parent] if pair.parent >= 0 else None
+        if pair is comp.body:
+            found.append(m.start())
+    return found
+
+
+def _hooks_end(file, comp):
+    # End of the last top-level statement of the component that calls a hook
+    text, index = file.text, file.index
+    end = comp.body.open + 1
+    for m in compile_for(text, _HOOK_CALL).finditer(text, comp.body.open, comp.body.close):
+        if index.is_code(m.start()) and index.enclosing_pair(m.start()) is comp.body:
+            end = max(end, _statement_end(text, index, m.start(), comp.body.close)[1])
+    return end
+
+
+def _render_code(file, comp, pos):
+    # Whether `pos` runs while the component renders: every function between
+    # it and the component body is render code
+    index = file.index
+    pair = index.enclosing_pair(pos)
+    while pair is not None and pair is not comp.body:
+        if pair.kind == '{':
+            start = file.function_start(pair)
+            if start >= 0 and not file.render_time(start):
+                return False
+        pair = index.pairs[pair.parent] if pair.parent >= 0 else None
+    return pair is comp.body
+
+
+def _in_hook(file, comp, pos):
+    # Whether `pos` is inside the arguments of a hook call
+    text, index = file.text, file.index
+    pair = index.enclosing_pair(pos)
+    while pair is not None and pair is not comp.body:
+        if pair.kind == '(' and compile_for(text, r'(?<![\w$.])(?:React\.)?use[A-Z][\w$]*\s*(?:<[^>(]*>)?\s*$').search(text, max(0, pair.open - 60), pair.open):
+            return True
+        pair = index.pairs[pair.parent] if pair.parent >= 0 else None
+    return False
+
+
+def _indent_unit(file, comp):
+    text = file.text
+    first = _skip_space(text, comp.body.open + 1, comp.body.close)
+    inner = indent_at(text, first)
+    outer = indent_at(text, comp.start)
+    unit = inner[len(outer):] if inner.startswith(outer) else ''
+    return inner, unit if unit and not unit.strip() else '  '
+
+
+def _use_memo(header, expr, deps, indent, unit, source_indent):
+    if expr.startswith('{'):
+        expr = f'({expr})'
+    listed = f"[{', '.join(deps)}]"
+    line = f'{header} useMemo(() => {expr}, {listed});'
+    if '\n' not in expr and len(indent) + len(line) <= MAX_LINE:
+        return indent + line
+    expr = reindent(source_indent + expr, indent + unit)
+    return f'{indent}{header} useMemo(\n{indent}{unit}() => {expr},\n{indent}{unit}{listed},\n{indent});'
+
+
+def _dependencies(file, comp, binding, bindings, hoisted, lifted, memoized):
+    # (dependencies, why it cannot be memoized) of the derived `binding`.
+    # Moved to the top, it is computed where the code around it may have
+    # ruled out a null first, so only state with a non-null initial value
+    # may be dereferenced there. A literal built on every render would be a
+    # new dependency every time, unless it was memoized itself.
+    text = file.text
+    start, end = binding.init
+    deps = []
+    for name, pos, _ in file.references(start, end):
+        found = _resolve(bindings, name, pos)
+        if found is not None and start <= found.pos < end or id(found) in hoisted:
+            continue
+        if found is None:
+            if _is_global(file, name):
+                continue
+            return deps, f'uses {name}, which is not declared in {comp.name}'
+        if not _top_level(found, comp) and id(found) not in lifted:
+            return deps, f'uses {name}, which is local to the code it is declared in'
+        if found.setter:
+            continue
+        if (found.function or found.kind == 'function') and found.hook != 'useCallback':
+            return deps, f'uses {name}, a function created on every render'
+        if found.kind in ('let', 'var'):
+            return deps, f'uses {name}, which may be reassigned'
+        if found.init and id(found) not in memoized and compile_for(text, _FRESH_VALUE).match(text, found.init[0]):
+            return deps, f'uses {name}, which is built again on every render'
+        if (not _top_level(binding, comp) and id(found) not in lifted and compile_for(text, r'\s*(?:\.|\[)').match(text, pos + len(literal(text, name)))
+                and not (found.init and compile_for(text, _STATE).match(text, found.init[0]))):
+            return deps, f'dereferences {name}, which the code around it may check first'
+        if name not in deps:
+            deps.append(name)
+    return deps, ''
+
+
+def _module_level(file, binding, bindings, hoisted):
+    # Whether the derived `binding` only uses module-level names, its own
+    # and the constants hoisted out of the component
+    start, end = binding.init
+    for name, pos, _ in file.references(start, end):
+        found = _resolve(bindings, name, pos)
+        if found is not None and not start <= found.pos < end and id(found) not in hoisted:
+            return False
+    return True
+
+
+def _hoist(file, binding, bindings, found, edits, definitions, hoisted):
+    # Move the declaration of `binding` to the end of the file as found.to,
+    # with the edits already planned inside it
+    text = file.text
+    found.to = _constant_name(file, binding.name)
+    hoisted[id(binding)] = found.to
+    start, end = _removal(text, binding.statement[0], binding.statement[1])
+    # With its comment lines, from the start of its line so dedent sees
+    # the indent
+    after = binding.pos + len(literal(text, binding.name))
+    moved = text_slice(text, start, binding.pos) + found.to + _folded(text, after, binding.init[1], edits)
+    definitions.append(textwrap.dedent(moved).strip() + ';\n')
+    edits[:] = [edit for edit in edits if not (start <= edit[0] and edit[1] <= end)]
+    edits.append((start, end, ''))
+    edits.extend(_renames(file, binding, bindings, found.to))
+
+
+def _plan_component(file, comp, report, edits, definitions, lifted_blocks):
+    text, index = file.text, file.index
+    bindings = file.bindings(comp)
+    declared = sorted((binding for found in bindings.values() for binding in found
+                       if binding.kind == 'const' and not binding.pattern and binding.init is not None and binding.scope[0] >= comp.body.open),
+                      key=lambda binding: binding.pos)
+
+    # Derived candidates, outermost only
+    derived = []
+    for binding in declared:
+        start, end = binding.init
+        if binding.hook or binding.function or any(outer.init[0] <= binding.pos < outer.init[1] for outer in derived):
+            continue
+        if any(index.is_code(m.start()) for m in compile_for(text, _DERIVED).finditer(text, start, end)):
+            derived.append(binding)
+
+    hoisted = {}
+    for binding in declared:
+        pair = _literal(file, binding)
+        if pair is None or any(binding is other for other in derived):
+            continue
+        if any(index.is_code(m.start()) for m in compile_for(text, r'\(').finditer(text, pair.open, pair.close)):
+            continue
+        if any(_resolve(bindings, name, pos) is not None or not _is_global(file, name) for name, pos, _ in file.references(pair.open, pair.close)):
+            continue
+        found = Memoized(binding.name, _line(text, binding.pos), 'constant')
+        report.found.append(found)
+        if _mutated(file, binding, bindings):
+            found.skipped = 'it is mutated'
+            continue
+        _hoist(file, binding, bindings, found, edits, definitions, hoisted)
+
+    indent, unit = _indent_unit(file, comp)
+    returns = _returns(file, comp)
+    hooks_end = None
+    # id(binding) -> where it was lifted to, and every value memoized
+    lifted = {}
+    memoized = set()
+    taken = {name for name, found in bindings.items() if any(_top_level(binding, comp) for binding in found)}
+    for binding in derived:
+        start, end = binding.init
+        if _in_hook(file, comp, binding.pos) or not _render_code(file, comp, binding.pos):
+            continue
+        found = Memoized(binding.name, _line(text, binding.pos), 'derived')
+        report.found.append(found)
+        found.skipped = _impurity(file, start, end, bindings)
+        if found.skipped:
+            continue
+        found.deps, found.skipped = _dependencies(file, comp, binding, bindings, hoisted, lifted, memoized)
+        if found.skipped:
+            continue
+        if not found.deps and _module_level(file, binding, bindings, hoisted):
+            # The same on every render of every instance: built once instead
+            found.kind = 'constant'
+            if _mutated(file, binding, bindings):
+                found.skipped = 'it is mutated'
+            else:
+                _hoist(file, binding, bindings, found, edits, definitions, hoisted)
+            continue
+        header = text_slice(text, binding.statement[0], start).rstrip()
+        expr = _folded(text, start, end, edits).strip()
+        source_indent = indent_at(text, binding.statement[0])
+        if _top_level(binding, comp):
+            if any(pos < binding.pos for pos in returns):
+                found.skipped = 'it comes after an early return'
+                continue
+            statement = _use_memo(header, expr, found.deps, source_indent, unit, source_indent).lstrip()
+            edits[:] = [edit for edit in edits if not (start <= edit[0] and edit[1] <= end)]
+            edits.append((binding.statement[0], binding.statement[1], statement))
+            memoized.add(id(binding))
+            continue
+
+        statement = _top_statement(file, comp, binding.pos)
+        if statement is None:
+            found.skipped = f'its top-level statement in {comp.name} is neither a render helper nor the return'
+            continue
+        if binding.name in taken:
+            found.skipped = f'{binding.name} is already declared at the top of {comp.name}'
+            continue
+        if any(name == binding.name and not binding.scope[0] <= pos <= binding.scope[1] and _resolve(bindings, name, pos) is None
+               for name, pos, _ in file.references(comp.body.open, comp.body.close, binding.name)):
+            found.skipped = f'it would shadow the module-level {binding.name}'
+            continue
+        if hooks_end is None:
+            hooks_end = _hooks_end(file, comp)
+        point = hooks_end
+        for name in found.deps:
+            dep = _resolve(bindings, name, binding.pos)
+            if id(dep) in lifted:
+                point = max(point, lifted[id(dep)])
+            elif dep.statement is not None:
+                point = max(point, dep.statement[1])
+        if any(pos < point for pos in returns):
+            found.skipped = f'{comp.name} returns before its dependencies are declared'
+            continue
+        helper = statement[2]
+        if helper != 'return' and any(name == helper and pos < point and not statement[0] <= pos < statement[1]
+                                       for name, pos, _ in file.references(comp.body.open, point, helper)):
+            found.skipped = f'{helper} is called before its dependencies are declared'
+            continue
+        found.moved = comp.name
+        lifted[id(binding)] = point
+        memoized.add(id(binding))
+        taken.add(binding.name)
+        line_end = text.find(literal(text, '\n'), point)
+        line_end = len(text) if line_end < 0 else line_end
+        lifted_blocks.setdefault(line_end, []).append(_use_memo(header, expr, found.deps, indent, unit, source_indent))
+        removal = _removal(text, binding.statement[0], binding.statement[1])
+        edits[:] = [edit for edit in edits if not (removal[0] <= edit[0] and edit[1] <= removal[1])]
+        edits.append((removal[0], removal[1], ''))
+
+
+def _row_reason(file, elem):
+    # Why React.memo cannot spare the row rendered by `elem`, or ''
+    text, index = file.text, file.index
+    if not elem.self_closing and text_slice(text, elem.open_end, elem.close_start).strip():
+        return 'it is given children'
+    for m in compile_for(text, _ATTRIBUTE).finditer(text, elem.start, elem.open_end):
+        pair = index.pair_at(m.end() - 1)
+        if pair is None or pair.close < 0 or not index.is_code(m.start()) or file.in_tag(m.start()) is not elem:
+            continue
+        start = _skip_space(text, pair.open + 1, pair.close)
+        kind = {'{': 'object', '[': 'array'}.get(char(text, start), '')
+        arrows = [a for a in compile_for(text, '=>').finditer(text, start, pair.close) if index.is_code(a.start()) and index.enclosing_pair(a.start()) is pair]
+        if file.is_function(start) or arrows or compile_for(text, r'\s*function\b').match(text, start):
+            kind = 'function'
+        if kind:
+            return f'{decode(m.group(1))} gets a new {kind} on every render'
+    return ''
+
+
+def _in_list(file, elem):
+    text, index = file.text, file.index
+    pair = index.enclosing_pair(elem.start)
+    while pair is not None:
+        before = decode(text[max(0, pair.open - 32):pair.open])
+        if pair.kind == '(' and _MAP_CALL.search(before) or pair.kind == '{' and re.search(r'renderItem\s*=\s*$', before):
+            return True
+        pair = index.pairs[pair.parent] if pair.parent >= 0 else None
+    return False
+
+
+def _plan_rows(file, report, edits, memo):
+    text, index = file.text, file.index
+    for m in compile_for(text, _ROW).finditer(text):
+        if not index.is_code(m.start()) or index.enclosing_pair(m.start()) is not None:
+            continue
+        params = index.pair_at(m.end() - 1)
+        arrow = compile_for(text, _ARROW).match(text, params.close + 1) if params is not None and params.close >= 0 else None
+        body = index.pair_at(arrow.end()) if arrow else None
+        if body is None or body.close < 0 or body.kind == '[':
+            continue
+        name = decode(m.group(1))
+        rows = [elem for elem in index.elements if elem.name == name and _in_list(file, elem)]
+        if not rows:
+            continue
+        found = Memoized(name, _line(text, m.start()), 'row')
+        report.found.append(found)
+        found.skipped = next((reason for reason in map(lambda elem: _row_reason(file, elem), rows) if reason), '')
+        if not found.skipped:
+            edits += [(params.open, params.open, f'{memo}('), (body.close + 1, body.close + 1, ')')]
+
+
+def plan_memo(text, path=''):
+    # (edits, MemoReport)
+    report = MemoReport(path)
+    file = _File(text)
+    if file.index.errors:
+        return [], report
+    edits, definitions, lifted = [], [], {}
+    for comp in _components(file):
+        _plan_component(file, comp, report, edits, definitions, lifted)
+    react = any(found.module == 'react' and found.default == 'React' for found in file.imports)
+    _plan_rows(file, report, edits, 'React.memo' if react else 'memo')
+
+    for line_end, blocks in lifted.items():
+        following = text_slice(text, line_end + 1, text.find(literal(text, '\n'), line_end + 1))
+        edits.append((line_end, line_end, ''.join(f'\n\n{block}' for block in blocks) + ('\n' if following.strip() else '')))
+    if definitions:
+        end = len(text)
+        newline = '' if text_slice(text, end - 1, end) == '\n' else '\n'
+        edits.append((end, end, newline + '\n' + '\n'.join(definitions)))
+    names = ['useMemo'] if report.count('derived') else []
+    if report.count('row') and not react:
+        names.append('memo')
+    if names:
+        edits.extend(add_named_imports(text, 'react', names, file.imports))
+    return edits, report
+
+
+def memoize_render_values(buf):
+    if not contains(buf, 'const ') or not contains(buf, 'react'):
+        return []
+    return plan_memo(buf)[0]
+
+
+def format_memo_report(report):
+    lines = []
+    for found in report.found:
+        where = f'{report.path}:{found.line}'
+        if found.skipped:
+            lines.append(f'➖ {where}: {found.name} left as is, {found.skipped}')
+        elif found.kind == 'constant':
+            lines.append(f'✅ {where}: {found.name} -> {found.to} at module level')
+        elif found.kind == 'derived':
+            moved = f', moved to the top of {found.moved}' if found.moved else ''
+            lines.append(f"✅ {where}: {found.name} -> useMemo [{', '.join(found.deps)}]{moved}")
+        else:
+            lines.append(f'✅ {where}: {found.name} -> React.memo')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    from codemod.tree import DEFAULT_GLOBS, expand_globs
+
+    parser = argparse.ArgumentParser(prog='codemod.memo', description='Report the render values memoize_render_values hoists, memoizes and wraps.')
+    parser.add_argument('globs', nargs='*', help='files to analyse (default: the tree globs)')
+    args = parser.parse_args(argv)
+    counts = {'constant': 0, 'derived': 0, 'row': 0}
+    skipped = 0
+    for path in sorted(expand_globs(args.globs or DEFAULT_GLOBS)):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+        if not contains(text, 'const '):
+            continue
+        _, report = plan_memo(text, path)
+        if report.found:
+            print(format_memo_report(report))
+        for kind in counts:
+            counts[kind] += report.count(kind)
+        skipped += sum(1 for found in report.found if found.skipped)
+    print(f"🌲 {counts['constant']} constant(s) hoisted, {counts['derived']} value(s) memoized,"
+          f" {counts['row']} row component(s) wrapped, {skipped} left alone")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+# Edit plans: what a run would change, as data.
+#
+# Every run records the (start, end, replacement) edits each rule planned, in
+# order, as a Plan. The sequential steps compose into one list of edits
+# against the original file, which is all a unified diff needs: hunks are cut
+# around the edits instead of diffing the whole file line by line. Plans
+# serialize to JSON, so a tree can be planned with --dry-run --plan FILE,
+# reviewed, and applied later with --apply FILE without matching again; a plan
+# only applies to a file that still has the content it was made against.
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+
+from codemod.buffers import literal
+
+# Lines of context around each change in a diff
+CONTEXT = 3
+# Bumped when the saved layout changes
+FORMAT = 1
+
+
+@dataclass
+class Plan:
+    path: str
+    # sha256 of the file the plan was made against
+    digest: str
+    # 'text' (offsets in characters) or 'bytes'
+    units: str = 'text'
+    # [rule, [[start, end, replacement], ...]] per rule that had edits, in
+    # application order; each rule's offsets are into the text the previous
+    # rules left
+    steps: list = field(default_factory=list)
+
+    def edits(self, content):
+        # The steps as one list of edits against `content`, the original
+        composed = None
+        for _, edits in self.steps:
+            composed = sorted(map(tuple, edits)) if composed is None else compose(content, composed, edits)
+        return composed or []
+
+
+def _size(replacement, binary):
+    return len(replacement.encode('utf-8')) if binary else len(replacement)
+
+
+def _piece(replacement, binary):
+    return replacement.encode('utf-8', 'surrogateescape') if binary else replacement
+
+
+def _join(content, pieces):
+    return content[:0].join(piece if isinstance(piece, str) else bytes(piece) for piece in pieces)
+
+
+def compose(content, first, second):
+    # Edits against `content` equivalent to applying `first` and then
+    # `second`, whose offsets are into the text `first` produced. Edits of
+    # the two that touch or overlap become one.
+    binary = not isinstance(content, str)
+
+    # Every edit as a span of the intermediate text: (start, end, is_second, edit)
+    spans = []
+    delta = 0
+    for start, end, replacement in sorted(map(tuple, first)):
+        size = _size(replacement, binary)
+        spans.append((start + delta, start + delta + size, False, (start, end, replacement)))
+        delta += size - (end - start)
+    spans.extend((start, end, True, (start, end, replacement)) for start, end, replacement in second)
+    spans.sort(key=lambda span: (span[0], span[1]))
+
+    clusters = []
+    for span in spans:
+        if clusters and span[0] <= clusters[-1][1]:
+            clusters[-1][1] = max(clusters[-1][1], span[1])
+            clusters[-1][2].append(span)
+        else:
+            clusters.append([span[0], span[1], [span]])
+
+    composed = []
+    delta = 0  # growth from the `first` edits so far
+    for start, end, members in clusters:
+        olds = [edit for _, _, is_second, edit in members if not is_second]
+        news = [edit for _, _, is_second, edit in members if is_second]
+
+        # The cluster's intermediate text, rebuilt from the original and the
+        # `first` replacements in it
+        orig_start = olds[0][0] if olds and olds[0][0] + delta == start else start - delta
+        pieces = []
+        pos = orig_start
+        for old_start, old_end, replacement in olds:
+            pieces += [content[pos:old_start], _piece(replacement, binary)]
+            pos = old_end
+            delta += _size(replacement, binary) - (old_end - old_start)
+        orig_end = olds[-1][1] if olds and olds[-1][1] + delta == end else end - delta
+        pieces.append(content[pos:orig_end])
+        middle = _join(content, pieces)
+
+        # ...with the `second` edits on top
+        pieces = []
+        pos = 0
+        for new_start, new_end, replacement in news:
+            pieces += [middle[pos:new_start - start], _piece(replacement, binary)]
+            pos = new_end - start
+        pieces.append(middle[pos:])
+        result = _join(middle, pieces)
+        composed.append((orig_start, orig_end, result.decode('utf-8', 'surrogateescape') if binary else result))
+    return composed
+
+
+def _lines(chunk):
+    # Lines split on '\n' only, keeping it, like a diff sees them
+    if not isinstance(chunk, str):
+        chunk = bytes(chunk).decode('utf-8', 'replace')
+    lines = chunk.split('\n')
+    return [line + '\n' for line in lines[:-1]] + ([lines[-1]] if lines[-1] else [])
+
+
+def _forward(content, pos, count):
+    # Offset `count` line starts after `pos` (a line start)
+    newline = literal(content, '\n')
+    for _ in range(count):
+        found = content.find(newline, pos)
+        pos = len(content) if found < 0 else found + 1
+    return pos
+
+
+def _back(content, pos, count):
+    # Offset of the line start `count` lines before `pos` (a line start)
+    newline = literal(content, '\n')
+    for _ in range(count):
+        if pos == 0:
+            break
+        pos = content.rfind(newline, 0, pos - 1) + 1
+    return pos
+
+
+def _blocks(content, edits):
+    # (first changed line, its offset, offset after the last changed line,
+    # old lines, new lines) for every group of edits that share a line; lines
+    # the edits leave as they were are trimmed off both ends. Only the lines
+    # around the edits are split; newlines in between are counted in C.
+    binary = not isinstance(content, str)
+    newline = literal(content, '\n')
+    line = pos = 0
+    i = 0
+    while i < len(edits):
+        line_start = content.rfind(newline, 0, edits[i][0]) + 1
+        line += content.count(newline, pos, line_start)
+        line_end = line_start
+        pieces = []
+        cursor = line_start
+        while i < len(edits) and (cursor == line_start or edits[i][0] < line_end):
+            start, end, replacement = edits[i]
+            pieces += [content[cursor:start], _piece(replacement, binary)]
+            cursor = end
+            # Through the line holding `end`; unchanged lines are trimmed below
+            line_end = _forward(content, content.rfind(newline, 0, end) + 1, 1)
+            i += 1
+        pieces.append(content[cursor:line_end])
+        old = _lines(content[line_start:line_end])
+        new = _lines(_join(content, pieces))
+
+        head = 0
+        while head < min(len(old), len(new)) and old[head] == new[head]:
+            head += 1
+        tail = 0
+        while tail < min(len(old), len(new)) - head and old[-1 - tail] == new[-1 - tail]:
+            tail += 1
+        old, new = old[head:len(old) - tail], new[head:len(new) - tail]
+        if old or new:
+            changed = _forward(content, line_start, head)
+            yield line + head, changed, _forward(content, changed, len(old)), old, new
+        line += content.count(newline, line_start, line_end)
+        pos = line_end
+
+
+def unified_diff(plan, content, context=CONTEXT):
+    # Unified diff of `plan` against `content`, the text it was made against,
+    # built from the edits alone; '' when the plan changes nothing
+    hunks = []  # [first line, offset after the last line, last line, body]
+    for line, start, end, old, new in _blocks(content, plan.edits(content)):
+        if hunks and line - hunks[-1][2] <= 2 * context:
+            hunk = hunks[-1]
+            hunk[3] += [(' ', text) for text in _lines(content[hunk[1]:start])]
+        else:
+            lead = _lines(content[_back(content, start, context):start])
+            hunk = [line - len(lead), 0, 0, [(' ', text) for text in lead]]
+            hunks.append(hunk)
+        hunk[3] += [('-', text) for text in old] + [('+', text) for text in new]
+        hunk[1], hunk[2] = end, line + len(old)
+    if not hunks:
+        return ''
+
+    path = plan.path.replace(os.sep, '/')
+    out = [f'--- a/{path}\n', f'+++ b/{path}\n']
+    growth = 0
+    for first, end, _, body in hunks:
+        body += [(' ', text) for text in _lines(content[end:_forward(content, end, context)])]
+        old_count = sum(1 for sign, _ in body if sign != '+')
+        new_count = sum(1 for sign, _ in body if sign != '-')
+        old_line = first + 1 if old_count else first
+        new_line = first + growth + 1 if new_count else first + growth
+        out.append(f'@@ -{old_line},{old_count} +{new_line},{new_count} @@\n')
+        for sign, text in body:
+            out.append(sign + text if text.endswith('\n') else f'{sign}{text}\n\\ No newline at end of file\n')
+        growth += new_count - old_count
+    return ''.join(out)
+
+
+def read_planned(plan):
+    # The content `plan` was made against, in its units; ValueError if the
+    # file has changed since
+    with open(plan.path, 'rb') as f:
+        data = f.read()
+    if hashlib.sha256(data).hexdigest() != plan.digest:
+        raise ValueError('file changed since the plan was made')
+    return data.decode('utf-8') if plan.units == 'text' else data
+
+
+def diff_file(plan, context=CONTEXT):
+    return unified_diff(plan, read_planned(plan), context)
+
+
+def save_plans(plans, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'format': FORMAT, 'created': time.time(), 'plans': [asdict(plan) for plan in plans]}, f)
+
+
+def load_plans(path):
+    with open(path, 'r') as f:
+        saved = json.load(f)
+    if saved.get('format') != FORMAT:
+        raise ValueError(f"{path}: unsupported plan format {saved.get('format')!r}")
+    return [Plan(**plan) for plan in saved['plans']]
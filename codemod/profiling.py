@@ -0,0 +1,122 @@
+# Optional instrumentation for codemod runs.
+#
+# Every run already times read, match (planning edits), rewrite (applying
+# them) and write per file and rule. A Profiling object passed to run_file()
+# or run_tree() adds a cProfile capture and/or a tracemalloc peak per rule;
+# write_trace() exports all of it as JSON or CSV so slow rules and
+# pathological files can be picked out after a single run.
+
+import cProfile
+import csv
+import json
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+PROFILE_DIR = os.path.join('.codemod-cache', 'profiles')
+# Functions kept per rule in the trace, by own time
+HOTSPOTS = 5
+
+
+@dataclass
+class Profiling:
+    cprofile: bool = False
+    memory: bool = False
+    # Where per-file, per-rule .prof dumps go (cprofile only)
+    directory: str = PROFILE_DIR
+
+    def _dump(self, profile, path, rule):
+        os.makedirs(self.directory, exist_ok=True)
+        name = re.sub(r'[^\w.-]+', '_', os.path.normpath(path)).strip('_')
+        dump = os.path.join(self.directory, f'{name}.{rule}.prof')
+        profile.dump_stats(dump)
+        return dump
+
+    @contextmanager
+    def measure(self, stat, path):
+        # Wraps one rule on one file and fills in stat.peak_kb, stat.profile
+        # and stat.hotspots
+        started = False
+        if self.memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                started = True
+        profile = cProfile.Profile() if self.cprofile else None
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                stat.profile = self._dump(profile, path, stat.name)
+                stat.hotspots = hotspots(profile)
+            if self.memory:
+                stat.peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+                if started:
+                    tracemalloc.stop()
+
+
+def hotspots(profile, limit=HOTSPOTS):
+    # [(function, own seconds, cumulative seconds, calls)], slowest first
+    stats = pstats.Stats(profile).stats
+    rows = []
+    for (filename, line, func), (_, calls, own, cumulative, _) in stats.items():
+        where = f'{os.path.basename(filename)}:{line}({func})' if line else func
+        rows.append((where, own, cumulative, calls))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return [[where, round(own, 6), round(cumulative, 6), calls] for where, own, cumulative, calls in rows[:limit]]
+
+
+def trace_rows(reports):
+    # One row per file and phase: read, each rule, write
+    for report in reports:
+        common = {'path': report.path, 'cached': report.cached, 'changed': report.changed}
+        yield dict(common, phase='read', rule='', matches=0, seconds=report.read_seconds,
+                   match_seconds=0.0, rewrite_seconds=0.0, peak_kb=-1, profile='')
+        for stat in report.rules:
+            yield dict(common, phase='rule', rule=stat.name, matches=stat.matches, seconds=stat.seconds,
+                       match_seconds=stat.match_seconds, rewrite_seconds=stat.rewrite_seconds,
+                       peak_kb=stat.peak_kb, profile=stat.profile)
+        yield dict(common, phase='write', rule='', matches=0, seconds=report.write_seconds,
+                   match_seconds=0.0, rewrite_seconds=0.0, peak_kb=-1, profile='')
+
+
+def write_trace(reports, path, errors=None):
+    # .csv gets the flat rows, anything else a JSON document with the full
+    # per-rule stats (hotspots included)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if path.endswith('.csv'):
+        rows = list(trace_rows(reports))
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['path'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+
+    files = []
+    for report in reports:
+        entry = {
+            'path': report.path,
+            'cached': report.cached,
+            'changed': report.changed,
+            'seconds': report.seconds,
+            'read_seconds': report.read_seconds,
+            'write_seconds': report.write_seconds,
+            'rules': [dict(asdict(stat), seconds=stat.seconds) for stat in report.rules],
+        }
+        files.append(entry)
+    with open(path, 'w') as f:
+        json.dump({'created': time.time(), 'files': files, 'errors': errors or {}}, f, indent=2)
+
+
+def slowest_rules(reports, limit=5):
+    # [(seconds, rule, path)] for the slowest rule runs of the whole run
+    runs = [(stat.seconds, stat.name, report.path) for report in reports for stat in report.rules]
+    return sorted(runs, reverse=True)[:limit]
@@ -0,0 +1,231 @@
+# Declarative rules, defined in the TOML files under codemod/rules/.
+#
+# A rule file holds [[rule]] tables, applied in file name order and then in
+# file order, also when only some are named with --rule. A rule either
+# points at a Python planner
+#
+#     [[rule]]
+#     name = "dedupe_style_keys"
+#     planner = "codemod.cleanup:dedupe_style_keys"
+#
+# or is made of [[rule.edit]] tables, each with one selector and what to put
+# there:
+#
+#     anchor = '''...'''     literal text, whitespace-insensitive; replaced by
+#                            `template` re-indented to the anchor's column, or
+#                            with insert = "before" / "after", `template` is
+#                            inserted next to it
+#     case = "Label"         a `case 'Label':` block, replaced by `template`
+#                            verbatim (the block starts at its line start);
+#                            with `contains`, only a block holding that
+#                            literal text is, so a block already migrated to
+#                            another shape is left alone
+#     element = "View"       JSX elements (with `attribute` in the opening tag);
+#                            the opening tag becomes `open`, re-indented, and
+#                            the closing tag `close`
+#
+# plus an optional [rule.styles] table: the `block` of StyleSheet entries to
+# add after the `after` key (keys the sheet has are skipped), or at the end of
+# the `styles` sheet with fallback = true when no sheet has it but the rule's
+# edits matched. `prefilter` lists literals of which at least one must be in
+# the file, and all = true makes the rule plan nothing unless every edit
+# (and the `after` key) matched. An [rule.imports] table maps modules to the
+# names the templates may use, e.g. "lucide-react-native" = ["Eye", "Mail"];
+# the ones the planned text uses and the file does not import yet are added
+# to its imports.
+#
+# A planner rule declares what it reads and writes (see codemod/schedule.py)
+#
+#     reads = ["jsx", "styles"]
+#     writes = ["styles"]
+#
+# so the engine can plan it on the same text as the rules it is independent
+# of; without them it runs on its own. Edit rules get theirs from the edits.
+#
+# A run without --rule applies every rule except the ones declared with
+# default = false: rules that sweep whole screens (extracting components,
+# hoisting styles, pruning imports, ...) only run when they are named.
+#
+# Files are parsed once per process and a rule is compiled (its anchors
+# registered with the matcher) only the first time a run asks for it.
+
+import hashlib
+import importlib
+import json
+import os
+import re
+import tomllib
+from functools import lru_cache
+
+from codemod.buffers import contains, find, text_slice
+from codemod.engine import RULES, Rule
+from codemod.imports import add_named_imports
+from codemod.matcher import find_anchor, indent_at, register_anchor, reindent
+from codemod.scanner import find_case_blocks, find_elements
+from codemod.schedule import table_access
+from codemod.styles import find_style_keys, insert_styles
+
+RULES_DIR = os.path.join(os.path.dirname(__file__), 'rules')
+
+_RULE_KEYS = {'name', 'planner', 'edit', 'styles', 'imports', 'prefilter', 'all', 'version', 'reads', 'writes', 'default'}
+_EDIT_KEYS = {'anchor', 'case', 'contains', 'element', 'attribute', 'template', 'insert', 'open', 'close'}
+_STYLE_KEYS = {'block', 'after', 'fallback'}
+
+
+def rule_files(directory=RULES_DIR):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.toml'))
+
+
+@lru_cache(maxsize=None)
+def _parse(path):
+    with open(path, 'rb') as f:
+        tables = tomllib.load(f).get('rule', [])
+    for table in tables:
+        _check(path, table)
+    return tables
+
+
+def _check(path, table):
+    where = f"{os.path.basename(path)}: rule {table.get('name', '?')!r}"
+    if 'name' not in table:
+        raise ValueError(f'{where}: missing name')
+    unknown = set(table) - _RULE_KEYS
+    if unknown:
+        raise ValueError(f"{where}: unknown key(s) {', '.join(sorted(unknown))}")
+    if ('planner' in table) == ('edit' in table or 'styles' in table):
+        raise ValueError(f'{where}: needs either a planner or edits/styles')
+    for edit in table.get('edit', ()):
+        unknown = set(edit) - _EDIT_KEYS
+        if unknown:
+            raise ValueError(f"{where}: unknown edit key(s) {', '.join(sorted(unknown))}")
+        if sum(key in edit for key in ('anchor', 'case', 'element')) != 1:
+            raise ValueError(f'{where}: every edit needs exactly one of anchor, case, element')
+        if edit.get('insert') not in (None, 'before', 'after'):
+            raise ValueError(f"{where}: insert must be 'before' or 'after'")
+        if 'contains' in edit and 'case' not in edit:
+            raise ValueError(f'{where}: contains is for case edits')
+    if set(table.get('styles', {})) - _STYLE_KEYS or 'styles' in table and 'block' not in table['styles']:
+        raise ValueError(f'{where}: styles takes block, after and fallback')
+    if 'planner' in table and 'imports' in table or not all(isinstance(names, list) for names in table.get('imports', {}).values()):
+        raise ValueError(f'{where}: imports maps modules to lists of names, for edit rules')
+    if not all(isinstance(table.get(key, []), list) for key in ('reads', 'writes')):
+        raise ValueError(f'{where}: reads and writes are lists of resources')
+    if not isinstance(table.get('default', True), bool):
+        raise ValueError(f'{where}: default is true or false')
+
+
+def catalog(directory=RULES_DIR):
+    # {name: (rule file, table)} for every declared rule, in application order
+    rules = {}
+    for path in rule_files(directory):
+        for table in _parse(path):
+            if table['name'] in rules:
+                raise ValueError(f"Rule '{table['name']}' is declared in {rules[table['name']][0]} and {path}")
+            rules[table['name']] = (path, table)
+    return rules
+
+
+def default_rules(directory=RULES_DIR):
+    # Names of the declared rules a run applies when none are named
+    return [name for name, (_, table) in catalog(directory).items() if table.get('default', True)]
+
+
+def _anchor_edits(buf, anchor, edit):
+    template = edit['template']
+    for start, end in find_anchor(buf, anchor):
+        if edit.get('insert') == 'before':
+            # The anchor keeps its indent, so the inserted text ends with it
+            yield start, start, template + indent_at(buf, start)
+        elif edit.get('insert') == 'after':
+            yield end, end, template
+        else:
+            yield start, end, reindent(template, indent_at(buf, start))
+
+
+def _element_edits(buf, edit):
+    for elem in find_elements(buf, edit['element'], edit.get('attribute')):
+        if elem.self_closing:
+            continue
+        if 'open' in edit:
+            yield elem.start, elem.open_end, reindent(edit['open'], indent_at(buf, elem.start))
+        if 'close' in edit:
+            yield elem.close_start, elem.end, edit['close']
+
+
+def _used_names(planned, names):
+    # The names among `names` the planned replacements refer to
+    text = '\n'.join(replacement for _, _, replacement in planned)
+    return [name for name in names if re.search(rf'(?<![\w$.]){re.escape(name)}(?![\w$])', text)]
+
+
+def _planner(table):
+    name = table['name']
+    prefilter = table.get('prefilter', ())
+    styles = table.get('styles')
+    imports = table.get('imports', {})
+    edits = table.get('edit', ())
+    anchors = []
+    for k, edit in enumerate(edits):
+        anchors.append(f'{name}.{k}' if 'anchor' in edit else None)
+        if 'anchor' in edit:
+            register_anchor(anchors[-1], edit['anchor'])
+
+    def plan(buf):
+        # Cheap literal check first so files without the anchors are never scanned
+        if prefilter and not any(contains(buf, literal) for literal in prefilter):
+            return []
+        planned = []
+        for anchor, edit in zip(anchors, edits):
+            if anchor is not None:
+                found = list(_anchor_edits(buf, anchor, edit))
+            elif 'case' in edit:
+                found = [
+                    (start, end, edit['template']) for start, end in find_case_blocks(buf, edit['case'])
+                    if 'contains' not in edit or find(buf, edit['contains'], start, end) >= 0
+                ]
+            else:
+                found = list(_element_edits(buf, edit))
+            if not found and table.get('all'):
+                return []
+            # Already rewritten spans are left alone
+            planned.extend(span for span in found if text_slice(buf, span[0], span[1]) != span[2])
+        if styles is not None:
+            after = styles.get('after')
+            if table.get('all') and after is not None and not find_style_keys(buf, after):
+                return []
+            planned.extend(insert_styles(buf, styles['block'], after=after, fallback=styles.get('fallback', False) and bool(planned)))
+        for module, names in imports.items():
+            planned.extend(add_named_imports(buf, module, _used_names(planned, names)))
+        return planned
+
+    plan.__name__ = plan.__qualname__ = name
+    return plan
+
+
+def _version(table):
+    # Editing a rule's table invalidates its cached results
+    return hashlib.sha256(json.dumps(table, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def compile_rule(table):
+    if 'planner' in table:
+        module, _, attr = table['planner'].partition(':')
+        func = getattr(importlib.import_module(module), attr)
+    else:
+        func = _planner(table)
+    return Rule(table['name'], func, '\0'.join(filter(None, (table.get('version', ''), _version(table)))), table_access(table))
+
+
+def load_rules(names=None, directory=RULES_DIR):
+    # Compile and register the declared rules among `names` (default: the
+    # default rules) that are not registered yet; unknown names are left to
+    # the caller
+    declared = catalog(directory)
+    for name in default_rules(directory) if names is None else names:
+        if name in declared and name not in RULES:
+            RULES[name] = compile_rule(declared[name][1])
+    return declared
+
+
+def rule_table(name, directory=RULES_DIR):
+    return catalog(directory)[name][1]
@@ -0,0 +1,582 @@
+# Linear-time TSX scanner.
+#
+# One pass over the text tracks brace/paren/bracket depth, JSX tag depth and
+# string, comment, regex and template-literal state, recording every bracket
+# pair and JSX element with its bounds. Rules use the resulting index to find
+# the exact extent of a `case` block, a StyleSheet key or a JSX element
+# instead of regexes like `[^}]+}` that backtrack and stop at the first nested
+# brace.
+#
+# The scanner works on str as well as on bytes/mmap buffers (streaming mode);
+# offsets are in the buffer's own units. rescan() updates an index after an
+# edit by rescanning only the bracket pair around it (watch mode), and
+# rescan_regions() after a rewrite with edits in several places
+# (codemod.validate).
+#
+# An index holds one record per bracket pair and JSX element plus the masked
+# spans; the records are slotted, but the index still takes about five times
+# the size of the text it was built from.
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+
+from codemod.buffers import char, compile_for, decode, find, is_text, literal, memoize_buffer
+
+# Pattern sources, compiled for str or bytes on first use
+_SOURCES = {
+    'js_token': (r"[{}()\[\]'\"`</]", 0),
+    'tag_token': (r"[{}'\"/>]", 0),
+    'children_token': (r"[{}<]", 0),
+    'template_token': (r"\\.|`|\$\{", re.DOTALL),
+    'sq_string': (r"'[^'\\\n]*(?:\\.[^'\\\n]*)*'?", 0),
+    'dq_string': (r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"?', 0),
+    'sq_attr': (r"'[^']*'?", 0),
+    'dq_attr': (r'"[^"]*"?', 0),
+    'line_comment': (r'//[^\n]*', 0),
+    'block_comment': (r'/\*.*?(?:\*/|\Z)', re.DOTALL),
+    'regex_literal': (r'/(?![*/])(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*', 0),
+    'tag_name': (r'\s*([A-Za-z_$][\w$.:-]*)?', 0),
+    'closing_tag': (r'</\s*([A-Za-z_$][\w$.:-]*)?\s*>', 0),
+    'generic': (r'<\s*[A-Za-z_$][\w$]*\s*(?:,|extends\b)', 0),
+    'not_space': (r'\S', 0),
+    # No leading \b: a literal prefix lets `re` skip ahead instead of trying
+    # every offset; word boundaries are checked by hand
+    'case_label': (r'case\b|default\s*:', 0),
+    'stylesheet': (r'StyleSheet\.create\s*\(\s*\{', 0),
+}
+
+
+class _Syntax:
+    def __init__(self, binary):
+        self.binary = binary
+        for name, (source, flags) in _SOURCES.items():
+            setattr(self, name, re.compile(source.encode() if binary else source, flags))
+        self.strings = {"'": self.sq_string, '"': self.dq_string}
+        self.attr_strings = {"'": self.sq_attr, '"': self.dq_attr}
+        self.lit = {s: s.encode() if binary else s for s in ('</', '/>', '//', '/*', '\n', ',')}
+
+
+@lru_cache(maxsize=2)
+def _syntax_for(binary):
+    return _Syntax(binary)
+
+
+def _syntax(text):
+    return _syntax_for(not is_text(text))
+
+_OPENERS = {'{': '}', '(': ')', '[': ']'}
+_CLOSERS = {'}': '{', ')': '(', ']': '['}
+# A `/` or `<` after one of these starts an expression (regex literal / JSX)
+_EXPR_PREV = set('(,=:[!&|?{};>')
+_REGEX_PREV = _EXPR_PREV | set('+-*%<~^')
+_EXPR_KEYWORDS = {'return', 'case', 'default', 'yield', 'await', 'typeof', 'void', 'delete', 'in', 'of', 'else', 'do'}
+
+
+@dataclass(slots=True)
+class Pair:
+    open: int
+    close: int
+    kind: str
+    parent: int
+
+
+@dataclass(slots=True)
+class Element:
+    name: str
+    start: int
+    open_end: int = -1
+    close_start: int = -1
+    end: int = -1
+    parent: int = -1
+
+    @property
+    def self_closing(self):
+        return self.close_start < 0 and self.end == self.open_end
+
+
+class Index:
+    def __init__(self, text):
+        self.text = text
+        self.pairs = []
+        self.elements = []
+        self.masked = []
+        self.errors = []
+        self._opens = []
+        self._pair_at = {}
+        self._elem_starts = None
+
+    def is_code(self, pos):
+        # False inside strings, comments, regex/template literals and JSX text
+        k = bisect_right(self.masked, (pos, float('inf'))) - 1
+        return k < 0 or self.masked[k][1] <= pos
+
+    def pair_at(self, open_pos):
+        return self._pair_at.get(open_pos)
+
+    def enclosing_pair(self, pos, kind=None):
+        k = bisect_right(self._opens, pos - 1) - 1
+        while k >= 0:
+            pair = self.pairs[k]
+            if pair.close >= pos and (kind is None or pair.kind == kind):
+                return pair
+            k = pair.parent
+        return None
+
+    def in_jsx_text(self, pos):
+        # True in the text children of a JSX element, outside any `{...}`
+        if self.is_code(pos):
+            return False
+        if self._elem_starts is None:
+            self._elem_starts = [elem.start for elem in self.elements]
+        k = bisect_right(self._elem_starts, pos) - 1
+        while k >= 0:
+            elem = self.elements[k]
+            if pos < elem.open_end:
+                # In the tag, e.g. an attribute string
+                return False
+            if elem.end < 0 or pos < elem.close_start:
+                pair = self.enclosing_pair(pos)
+                return pair is None or pair.open < elem.open_end
+            k = elem.parent
+        return False
+
+    def line_start(self, pos):
+        return self.text.rfind(literal(self.text, '\n'), 0, pos) + 1
+
+
+def _is_ident(c):
+    return c.isalnum() or (c != '' and c in '_$')
+
+
+def _prev_significant(text, pos):
+    j = pos - 1
+    while j >= 0 and char(text, j).isspace():
+        j -= 1
+    if j < 0:
+        return '', ''
+    c = char(text, j)
+    if _is_ident(c):
+        k = j
+        while k >= 0 and _is_ident(char(text, k)):
+            k -= 1
+        return c, decode(text[k + 1:j + 1])
+    return c, ''
+
+
+def _ident_before(text, pos):
+    return pos > 0 and (_is_ident(char(text, pos - 1)) or char(text, pos - 1) == '.')
+
+
+def _starts_expression(text, pos, allowed):
+    c, word = _prev_significant(text, pos)
+    if not c:
+        return True
+    if word:
+        return word in _EXPR_KEYWORDS
+    return c in allowed
+
+
+def _looks_like_jsx(text, pos, syntax):
+    nxt = char(text, pos + 1)
+    if not (nxt.isalpha() or (nxt != '' and nxt in '>_$')):
+        return False
+    if syntax.generic.match(text, pos):
+        return False
+    return _starts_expression(text, pos, _EXPR_PREV)
+
+
+@memoize_buffer(maxsize=16)
+def scan(text):
+    return _scan(text)
+
+
+def _scan(text, start=0, region=False):
+    # With `region`, scanning starts at the bracket at `start` and stops as
+    # soon as it is closed; the rest of the text is still visible to the
+    # look-ahead and look-behind, so decisions are the same as in a full scan
+    syntax = _syntax(text)
+    binary = syntax.binary
+    lit = syntax.lit
+    index = Index(text)
+    pairs, elements, masked, errors = index.pairs, index.elements, index.masked, index.errors
+    # Frames are (kind, payload): payload is the pair index for brackets and
+    # the element index for 'tag'/'children'
+    stack = []
+    pair_stack = []
+    elem_stack = []
+    pos = start
+
+    def open_tag(i):
+        m = syntax.tag_name.match(text, i + 1)
+        elements.append(Element(decode(m.group(1)) if m.group(1) else '', i, parent=elem_stack[-1] if elem_stack else -1))
+        elem_stack.append(len(elements) - 1)
+        stack.append(('tag', len(elements) - 1))
+        return m.end()
+
+    def open_pair(i, c):
+        pairs.append(Pair(i, -1, c, pair_stack[-1] if pair_stack else -1))
+        pair_stack.append(len(pairs) - 1)
+        stack.append((c, len(pairs) - 1))
+        return i + 1
+
+    def close_pair(i, c):
+        if stack and stack[-1][0] == _CLOSERS[c]:
+            pairs[stack.pop()[1]].close = i
+            pair_stack.pop()
+            if stack and stack[-1][0] == 'template':
+                # Back in the template after `${...}`
+                stack[-1] = ('template', i + 1)
+        else:
+            errors.append((i, f"unexpected '{c}'"))
+        return i + 1
+
+    while True:
+        if region and not stack and pos > start:
+            break
+        kind = stack[-1][0] if stack else '{'
+
+        if kind == 'children':
+            m = syntax.children_token.search(text, pos)
+            if not m:
+                break
+            i, c = m.start(), m.group()
+            if binary:
+                c = c.decode('latin-1')
+            if syntax.not_space.search(text, pos, i):
+                masked.append((pos, i))
+            if c == '{':
+                pos = open_pair(i, c)
+            elif c == '}':
+                errors.append((i, "unexpected '}' in JSX text"))
+                pos = i + 1
+            elif text[i:i + 2] == lit['</']:
+                elem = elements[stack[-1][1]]
+                closing = syntax.closing_tag.match(text, i)
+                if not closing:
+                    errors.append((i, f'malformed closing tag for <{elem.name}>'))
+                    pos = i + 2
+                    continue
+                closing_name = decode(closing.group(1)) if closing.group(1) else ''
+                if closing_name != elem.name:
+                    errors.append((i, f'<{elem.name}> closed by </{closing_name}>'))
+                elem.close_start, elem.end = i, closing.end()
+                stack.pop()
+                elem_stack.pop()
+                pos = closing.end()
+            else:
+                pos = open_tag(i)
+
+        elif kind == 'tag':
+            m = syntax.tag_token.search(text, pos)
+            if not m:
+                break
+            i, c = m.start(), m.group()
+            if binary:
+                c = c.decode('latin-1')
+            if c == '{':
+                pos = open_pair(i, c)
+            elif c in syntax.attr_strings:
+                s = syntax.attr_strings[c].match(text, i)
+                masked.append((i, s.end()))
+                pos = s.end()
+            elif c == '>':
+                elem = elements[stack.pop()[1]]
+                elem.open_end = i + 1
+                stack.append(('children', elem_stack[-1]))
+                pos = i + 1
+            elif c == '/' and text[i:i + 2] == lit['/>']:
+                elem = elements[stack.pop()[1]]
+                elem.open_end = elem.end = i + 2
+                elem_stack.pop()
+                pos = i + 2
+            elif c == '/' and text[i:i + 2] == lit['//']:
+                s = syntax.line_comment.match(text, i)
+                masked.append((i, s.end()))
+                pos = s.end()
+            elif c == '/' and text[i:i + 2] == lit['/*']:
+                s = syntax.block_comment.match(text, i)
+                masked.append((i, s.end()))
+                pos = s.end()
+            else:
+                if c == '}':
+                    errors.append((i, "unexpected '}' in JSX tag"))
+                pos = i + 1
+
+        elif kind == 'template':
+            m = syntax.template_token.search(text, pos)
+            if not m:
+                break
+            i, c = m.start(), m.group()
+            if binary:
+                c = c.decode('latin-1')
+            if c == '`':
+                masked.append((stack.pop()[1], i + 1))
+                pos = i + 1
+            elif c == '${':
+                masked.append((stack[-1][1], i))
+                pos = open_pair(i + 1, '{')
+            else:
+                pos = m.end()
+
+        else:
+            m = syntax.js_token.search(text, pos)
+            if not m:
+                break
+            i, c = m.start(), m.group()
+            if binary:
+                c = c.decode('latin-1')
+            if c in _OPENERS:
+                pos = open_pair(i, c)
+            elif c in _CLOSERS:
+                pos = close_pair(i, c)
+            elif c in syntax.strings:
+                s = syntax.strings[c].match(text, i)
+                masked.append((i, s.end()))
+                pos = s.end()
+            elif c == '`':
+                stack.append(('template', i))
+                pos = i + 1
+            elif c == '<':
+                pos = open_tag(i) if _looks_like_jsx(text, i, syntax) else i + 1
+            elif text[i:i + 2] == lit['//']:
+                s = syntax.line_comment.match(text, i)
+                masked.append((i, s.end()))
+                pos = s.end()
+            elif text[i:i + 2] == lit['/*']:
+                s = syntax.block_comment.match(text, i)
+                masked.append((i, s.end()))
+                pos = s.end()
+            else:
+                s = syntax.regex_literal.match(text, i) if _starts_expression(text, i, _REGEX_PREV) else None
+                if s:
+                    masked.append((i, s.end()))
+                    pos = s.end()
+                else:
+                    pos = i + 1
+
+    for kind, payload in stack:
+        if kind in _OPENERS:
+            errors.append((pairs[payload].open, f"unclosed '{kind}'"))
+        elif kind in ('tag', 'children'):
+            errors.append((elements[payload].start, f'unclosed <{elements[payload].name}>'))
+        else:
+            errors.append((payload, 'unterminated template literal'))
+
+    # Template chunks are appended when they end, so restore position order
+    masked.sort()
+    index._opens = [pair.open for pair in pairs]
+    index._pair_at = {pair.open: pair for pair in pairs}
+    return index
+
+
+def _common_prefix(a, b, block=4096):
+    # Length of the common prefix, comparing whole blocks first so only one
+    # block is searched character by character
+    n = min(len(a), len(b))
+    i = 0
+    while i + block <= n and a[i:i + block] == b[i:i + block]:
+        i += block
+    end = min(i + block, n)
+    while i < end and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def changed_span(old, new):
+    # (start, old_end, new_end) of the region where `old` and `new` differ,
+    # or None if they are equal
+    if old == new:
+        return None
+    start = _common_prefix(old, new)
+    limit = min(len(old), len(new)) - start
+    suffix = min(_common_prefix(old[::-1][:limit], new[::-1][:limit]), limit)
+    return start, len(old) - suffix, len(new) - suffix
+
+
+def _shift(pos, after, delta):
+    return pos + delta if pos >= after else pos
+
+
+def region_around(index, start, end):
+    # Innermost pair of `index` whose inside holds text[start:end], or None
+    pair = index.enclosing_pair(start)
+    while pair is not None and (pair.close < end or pair.open >= start):
+        pair = index.pairs[pair.parent] if pair.parent >= 0 else None
+    return pair
+
+
+def rescan(index, text):
+    # Index of `text`, a new version of `index.text`, rescanning only the
+    # innermost bracket pair that contains the whole edit; everything before
+    # it is reused and everything after it is shifted. Falls back to a full
+    # scan() when no such pair exists or the pair does not rescan cleanly.
+    span = changed_span(index.text, text)
+    if span is None:
+        return index
+    start, old_end, new_end = span
+    pair = region_around(index, start, old_end)
+    if pair is None:
+        return scan(text)
+    result, problems = rescan_regions(index, text, [(pair, new_end - old_end)])
+    return result if not problems else scan(text)
+
+
+def rescan_regions(index, text, regions):
+    # (index, problems) of `text`, a new version of `index.text` in which
+    # only the inside of the `regions` changed: disjoint pairs of `index`
+    # in order, each with how much longer it got. Only the regions are
+    # scanned again, at their shifted offsets. Problems are (offset in
+    # `text`, message) of the syntax errors in a region and of regions that
+    # no longer close where they should; the index is None if there are any.
+    problems = []
+    subs = []
+    delta = 0
+    for pair, grown in regions:
+        sub = _scan(text, pair.open + delta, region=True)
+        close = pair.close + delta + grown
+        problems.extend(sub.errors)
+        if not sub.errors and (not sub.pairs or sub.pairs[0].close != close):
+            problems.append((pair.open + delta, f"'{pair.kind}' opened here no longer closes at the same place"))
+        elif not sub.errors and any(elem.end < 0 for elem in sub.elements):
+            problems.append((pair.open + delta, f"unclosed element inside '{pair.kind}'"))
+        subs.append((pair, sub, grown))
+        delta += grown
+    if problems:
+        return None, problems
+    return _splice(index, text, subs), []
+
+
+def _splice(index, text, subs):
+    # The index of `text` from `index` and the rescans of its changed regions.
+    # The pairs, elements and masked spans that start inside a region are
+    # contiguous and replaced by the rescanned ones; the rest are shifted
+    result = Index(text)
+    elem_starts = [elem.start for elem in index.elements]
+    spans = []
+    for pair, sub, delta in subs:
+        k = bisect_left(index._opens, pair.open)
+        ek = bisect_right(elem_starts, pair.open)
+        mk = bisect_right(index.masked, (pair.open, float('inf')))
+        spans.append((
+            pair, sub, delta,
+            (k, bisect_right(index._opens, pair.close)),
+            (ek, bisect_right(elem_starts, pair.close)),
+            (mk, bisect_right(index.masked, (pair.close, float('inf')))),
+        ))
+    first = spans[0][0].open
+    # Region closes and how much the text grew up to each region, for
+    # shifting; pair / element index bounds and how much each list grew
+    closes = [span[0].close for span in spans]
+    grown = [0]
+    pair_ends, pair_grown = [], [0]
+    elem_ends, elem_grown = [], [0]
+    for pair, sub, delta, (k, k_end), (ek, ek_end), _ in spans:
+        grown.append(grown[-1] + delta)
+        pair_ends.append(k_end)
+        pair_grown.append(pair_grown[-1] + len(sub.pairs) - (k_end - k))
+        elem_ends.append(ek_end)
+        elem_grown.append(elem_grown[-1] + len(sub.elements) - (ek_end - ek))
+
+    def shift(pos):
+        # Offset in `text` of an old offset outside every region
+        return pos + grown[bisect_left(closes, pos)] if pos >= 0 else pos
+
+    def renumber_pair(old):
+        # Index in the new list of an old pair outside every region
+        return old + pair_grown[bisect_right(pair_ends, old)] if old >= 0 else old
+
+    def renumber_elem(old):
+        return old + elem_grown[bisect_right(elem_ends, old)] if old >= 0 else old
+
+    pair_pos = elem_pos = mask_pos = 0
+    for span in spans + [None]:
+        pair_stop = span[3][0] if span else len(index.pairs)
+        elem_stop = span[4][0] if span else len(index.elements)
+        mask_stop = span[5][0] if span else len(index.masked)
+        # What ends before the first region is shared, not copied
+        for p in index.pairs[pair_pos:pair_stop]:
+            result.pairs.append(p if 0 <= p.close < first else Pair(shift(p.open), shift(p.close), p.kind, renumber_pair(p.parent)))
+        for elem in index.elements[elem_pos:elem_stop]:
+            result.elements.append(elem if 0 <= elem.end < first else Element(
+                elem.name, shift(elem.start), shift(elem.open_end), shift(elem.close_start), shift(elem.end),
+                renumber_elem(elem.parent),
+            ))
+        result.masked.extend((shift(a), shift(b)) for a, b in index.masked[mask_pos:mask_stop])
+        if span is None:
+            break
+        pair, sub, _, (k, k_end), (ek, ek_end), (mk, mk_end) = span
+        base = len(result.pairs)
+        for j, p in enumerate(sub.pairs):
+            result.pairs.append(Pair(p.open, p.close, p.kind, renumber_pair(pair.parent) if j == 0 else p.parent + base))
+        # The rescanned top-level elements hang off the innermost element
+        # around the region
+        outer = ek - 1
+        while outer >= 0 and not (index.elements[outer].end < 0 or index.elements[outer].end > pair.close):
+            outer = index.elements[outer].parent
+        outer = renumber_elem(outer)
+        elem_base = len(result.elements)
+        for elem in sub.elements:
+            result.elements.append(Element(
+                elem.name, elem.start, elem.open_end, elem.close_start, elem.end,
+                outer if elem.parent < 0 else elem.parent + elem_base,
+            ))
+        result.masked.extend(sub.masked)
+        pair_pos, elem_pos, mask_pos = k_end, ek_end, mk_end
+    result.errors = [
+        (shift(pos), message) for pos, message in index.errors
+        if not any(span[0].open <= pos <= span[0].close for span in spans)
+    ]
+    result._opens = [p.open for p in result.pairs]
+    result._pair_at = {p.open: p for p in result.pairs}
+    return result
+
+
+def find_case_blocks(text, label):
+    # Bounds of `case '<label>':` up to the next label of the same switch,
+    # from the start of its line to the end of its last non-blank line
+    index = scan(text)
+    syntax = _syntax(text)
+    pattern = compile_for(text, r"case\s+(['\"])" + re.escape(label) + r"\1\s*:")
+    blocks = []
+    for m in pattern.finditer(text):
+        if _ident_before(text, m.start()) or not index.is_code(m.start()):
+            continue
+        body = index.enclosing_pair(m.start(), '{')
+        if body is None:
+            continue
+        end = body.close
+        for label_match in syntax.case_label.finditer(text, m.end(), body.close):
+            if _ident_before(text, label_match.start()) or not index.is_code(label_match.start()):
+                continue
+            if index.enclosing_pair(label_match.start(), '{') is body:
+                end = label_match.start()
+                break
+        while end > m.end() and char(text, end - 1).isspace():
+            end -= 1
+        newline = find(text, '\n', end)
+        blocks.append((index.line_start(m.start()), len(text) if newline < 0 else newline + 1))
+    return blocks
+
+
+def stylesheet_bodies(text):
+    # `{...}` pairs passed to StyleSheet.create
+    index = scan(text)
+    bodies = []
+    for m in _syntax(text).stylesheet.finditer(text):
+        if not _ident_before(text, m.start()) and index.is_code(m.start()):
+            body = index.pair_at(m.end() - 1)
+            if body is not None and body.close >= 0:
+                bodies.append(body)
+    return bodies
+
+
+def find_elements(text, name, attribute=None):
+    # JSX elements called `name` whose opening tag contains `attribute`
+    index = scan(text)
+    return [
+        elem for elem in index.elements
+        if elem.name == name and elem.end >= 0
+        and (attribute is None or find(text, attribute, elem.start, elem.open_end) >= 0)
+    ]
@@ -0,0 +1,191 @@
+# Rule scheduling: which rules can plan against the same text.
+#
+# Applied one after the other, every rule re-scans text the previous one
+# already rewrote, and the order the rules depend on is implicit:
+# make_activity_scrollable needs the activityDescription style
+# update_activity_section inserts, add_activity_filters anchors on the
+# ScrollView make_activity_scrollable produces. Instead every rule has an
+# Access: what it reads and writes, as resources
+#
+#     case:Activity         a `case 'Activity':` block
+#     element:ScrollView    JSX elements of that name
+#     style:activityList    a key of the `styles` sheet
+#     jsx, styles, imports  any of them (planner rules declare these)
+#     *                     anything; a rule without declarations
+#
+# plus, for rules made of edits, the literal text their anchors (and element
+# attributes) look for and the text their templates produce. A rule depends
+# on an earlier one if it reads (or looks for text) the earlier one writes,
+# or both write the same thing. Rules are grouped into waves: the rules of a
+# wave depend on nothing in it, so the engine plans them on the same
+# snapshot and applies their edits in one merge. Edits of a wave that still
+# overlap (a declaration was too narrow) are detected before anything is
+# applied; the later rule and the rest of its wave are re-planned on the
+# merged text.
+#
+# A rule that reads what a rule after it writes never sees that output; such
+# order conflicts are reported before any file is touched.
+
+import re
+from dataclasses import dataclass, field
+
+ALL = '*'
+# Family of each specific resource kind: reading the family reads them all
+_FAMILIES = {'case': 'jsx', 'element': 'jsx', 'style': 'styles', 'import': 'imports'}
+_TAG = re.compile(r'<\s*([A-Za-z_$][\w$.]*)')
+_CASE = re.compile(r'''case\s+(['"])(.*?)\1\s*:''')
+_STYLE_KEY = re.compile(r'^[ \t]*([\w$]+)\s*:\s*\{', re.MULTILINE)
+
+
+@dataclass
+class Access:
+    reads: set = field(default_factory=set)
+    writes: set = field(default_factory=set)
+    # Whitespace-normalized text the rule looks for / produces
+    needs: list = field(default_factory=list)
+    produces: list = field(default_factory=list)
+
+
+def _squash(text):
+    return ' '.join(text.split())
+
+
+def _family(resource):
+    kind, sep, _ = resource.partition(':')
+    return _FAMILIES.get(kind) if sep else None
+
+
+def _covers(read, write):
+    # Whether writing `write` can change what reading `read` sees
+    return ALL in (read, write) or read == write or _family(write) == read or _family(read) == write
+
+
+def _produced(text):
+    # Resources a template's text creates
+    found = {f'element:{name}' for name in _TAG.findall(text)}
+    found.update(f'case:{label}' for _, label in _CASE.findall(text))
+    return found
+
+
+def table_access(table):
+    # Access of a rule declared in a rules/*.toml table; `reads` / `writes`
+    # add to what its edits imply, and are all a planner rule has
+    access = Access(set(table.get('reads', ())), set(table.get('writes', ())))
+    if 'planner' in table and not ('reads' in table or 'writes' in table):
+        return Access({ALL}, {ALL})
+    for edit in table.get('edit', ()):
+        if 'anchor' in edit:
+            access.needs.append(_squash(edit['anchor']))
+        elif 'case' in edit:
+            if 'contains' in edit:
+                access.needs.append(_squash(edit['contains']))
+            access.reads.add(f"case:{edit['case']}")
+            access.writes.add(f"case:{edit['case']}")
+        else:
+            # Elements with a given attribute are found by it
+            if edit.get('attribute'):
+                access.needs.append(_squash(edit['attribute']))
+            else:
+                access.reads.add(f"element:{edit['element']}")
+            access.writes.add(f"element:{edit['element']}")
+        for key in ('template', 'open', 'close'):
+            if key in edit:
+                access.produces.append(_squash(edit[key]))
+                access.writes.update(_produced(edit[key]))
+    styles = table.get('styles')
+    if styles is not None:
+        access.reads.add('styles')
+        if styles.get('after'):
+            access.reads.add(f"style:{styles['after']}")
+        access.writes.update(f'style:{key}' for key in _STYLE_KEY.findall(styles['block']))
+        access.produces.append(_squash(styles['block']))
+    if table.get('imports'):
+        access.reads.add('imports')
+        access.writes.update(f'import:{module}' for module in table['imports'])
+    return access
+
+
+def _access(rule):
+    return rule.access if rule.access is not None else Access({ALL}, {ALL})
+
+
+def _reasons(earlier, later):
+    # Why `later` depends on `earlier` having run, most specific first: what
+    # it reads or looks for that `earlier` writes, then what both write
+    reasons = [f'reads {read}' for read in sorted(later.reads) if ':' in read and read in earlier.writes]
+    reasons += [f"looks for '{need[:40]}'" for need in later.needs if any(need in text for text in earlier.produces)]
+    reasons += [f'reads {read}' for read in sorted(later.reads) for write in sorted(earlier.writes) if _covers(read, write)]
+    if later.writes and ALL in earlier.writes:
+        reasons.append('follows a rule that may write anything')
+    reasons += [f'also writes {write}' for write in sorted(later.writes & earlier.writes)]
+    return reasons
+
+
+@dataclass
+class Schedule:
+    # Waves of rule objects, in application order
+    waves: list = field(default_factory=list)
+    # (rule, rule it depends on, reason)
+    edges: list = field(default_factory=list)
+    # (rule, later rule whose output it reads, reason)
+    conflicts: list = field(default_factory=list)
+
+
+def schedule(rules):
+    result = Schedule()
+    accesses = [_access(rule) for rule in rules]
+    levels = []
+    for k, rule in enumerate(rules):
+        level = 0
+        for j in range(k):
+            reasons = _reasons(accesses[j], accesses[k])
+            if reasons:
+                result.edges.append((rule.name, rules[j].name, reasons[0]))
+                level = max(level, levels[j] + 1)
+        levels.append(level)
+        if level == len(result.waves):
+            result.waves.append([])
+        result.waves[level].append(rule)
+        # Output of later rules this one would have needed
+        for j in range(k + 1, len(rules)):
+            # Only specific resources and literal text count: most rules read
+            # and write some of the jsx family
+            later = accesses[j]
+            reasons = [f'reads {read}' for read in sorted(accesses[k].reads) if ':' in read and read in later.writes]
+            reasons += [f"looks for '{need[:40]}'" for need in accesses[k].needs if any(need in text for text in later.produces)]
+            if reasons:
+                result.conflicts.append((rule.name, rules[j].name, reasons[0]))
+    return result
+
+
+_schedules = {}
+
+
+def schedule_for(rules):
+    # schedule(), memoized on the rule names and versions
+    key = tuple((rule.name, rule.version) for rule in rules)
+    if key not in _schedules:
+        _schedules[key] = schedule(rules)
+    return _schedules[key]
+
+
+def overlaps(a, b):
+    # Whether edits a and b touch the same text, so applying them in either
+    # order could differ: overlapping spans, two insertions at one offset, or
+    # an insertion inside a replaced span
+    (a0, a1), (b0, b1) = a[:2], b[:2]
+    return max(a0, b0) < min(a1, b1) or a0 == b0 or a0 == a1 and b0 < a0 < b1 or b0 == b1 and a0 < b0 < a1
+
+
+def format_schedule(result):
+    lines = []
+    for k, wave in enumerate(result.waves, 1):
+        lines.append(f"🌊 wave {k}: {', '.join(rule.name for rule in wave)}")
+    for name, other, reason in result.edges:
+        lines.append(f"   {name} after {other}: {reason}")
+    lines.extend(format_conflicts(result))
+    return '\n'.join(lines)
+
+
+def format_conflicts(result):
+    return [f"⚠️  {name} runs before {other} but {reason} that {other} writes" for name, other, reason in result.conflicts]
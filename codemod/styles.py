@@ -0,0 +1,257 @@
+# Index of the StyleSheet.create blocks in a file.
+#
+# One walk over each StyleSheet body records every top-level `key: value,`
+# entry with its bounds, so rules look keys up in a dict instead of
+# regex-matching a neighbouring key. Inserting a block of styles skips keys
+# the sheet already has, and duplicate keys can be found and removed (the
+# last one wins at runtime, so that is the one kept).
+
+from bisect import bisect_left
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+
+from codemod.buffers import char, compile_for, decode, memoize_buffer
+from codemod.scanner import scan, stylesheet_bodies
+
+_KEY = r'''([\w$]+|'[^'\n]*'|"[^"\n]*")\s*:\s*'''
+_SEPARATOR = r'[,{(\[]'
+_ASSIGNED = r'([\w$]+)\s*=\s*StyleSheet\.create\s*\(\s*$'
+
+
+@dataclass
+class StyleEntry:
+    key: str
+    # From the start of the key's line (or the key itself when the line
+    # already holds code) to just after the trailing comma, if any
+    start: int
+    end: int
+    key_start: int
+    value_start: int
+    value_end: int
+
+    @property
+    def has_comma(self):
+        return self.end > self.value_end
+
+
+@dataclass
+class StyleSheet:
+    # Variable the sheet is assigned to, e.g. 'styles' ('' if none)
+    name: str
+    open: int
+    close: int
+    entries: list = field(default_factory=list)
+    # key -> entries in source order (more than one means duplicates)
+    keys: dict = field(default_factory=dict)
+
+    def get(self, key):
+        # The entry that takes effect, i.e. the last one
+        entries = self.keys.get(key)
+        return entries[-1] if entries else None
+
+    def duplicates(self):
+        return {key: entries for key, entries in self.keys.items() if len(entries) > 1}
+
+
+@dataclass
+class StyleIndex:
+    sheets: list = field(default_factory=list)
+
+    def find(self, key):
+        return [entry for sheet in self.sheets for entry in sheet.keys.get(key, ())]
+
+    def sheet(self, name='styles'):
+        for sheet in self.sheets:
+            if sheet.name == name:
+                return sheet
+        return None
+
+
+def _comment_end(index, pos):
+    k = bisect_left(index.masked, (pos,))
+    return index.masked[k][1] if k < len(index.masked) and index.masked[k][0] == pos else pos + 1
+
+
+def _entries(text, index, body, start=None):
+    # Split the body at its top-level commas, skipping nested brackets and
+    # anything inside strings or comments; `start` resumes the walk at the
+    # beginning of an entry
+    separator = compile_for(text, _SEPARATOR)
+    key_pattern = compile_for(text, _KEY)
+    not_space = compile_for(text, r'\S')
+    line_break = b'\n' if not isinstance(text, str) else '\n'
+    start = pos = body.open + 1 if start is None else start
+    while start < body.close:
+        m = separator.search(text, pos, body.close)
+        comma = m.start() if m else body.close
+        if m and not index.is_code(comma):
+            pos = comma + 1
+            continue
+        if m and char(text, comma) != ',':
+            pair = index.pair_at(comma)
+            pos = pair.close + 1 if pair is not None and pair.close >= 0 else comma + 1
+            continue
+
+        # First token of the entry that is not a comment
+        key = not_space.search(text, start, comma)
+        while key and not index.is_code(key.start()) and decode(text[key.start():key.start() + 2]) in ('//', '/*'):
+            key = not_space.search(text, _comment_end(index, key.start()), comma)
+        m_key = key_pattern.match(text, key.start(), comma) if key else None
+        if m_key:
+            value_end = m_key.end() + len(text[m_key.end():comma].rstrip())
+            line_start = text.rfind(line_break, 0, key.start()) + 1
+            entry_start = line_start if not text[line_start:key.start()].strip() else key.start()
+            yield StyleEntry(
+                decode(m_key.group(1)).strip('\'"'),
+                entry_start,
+                comma + 1 if comma < body.close else value_end,
+                key.start(),
+                m_key.end(),
+                value_end,
+            )
+        start = pos = comma + 1
+
+
+def _sheet(text, body, entries):
+    line_break = b'\n' if not isinstance(text, str) else '\n'
+    prefix = text[text.rfind(line_break, 0, body.open) + 1:body.open]
+    m = compile_for(text, _ASSIGNED).search(prefix)
+    sheet = StyleSheet(decode(m.group(1)) if m else '', body.open, body.close, entries)
+    for entry in entries:
+        sheet.keys.setdefault(entry.key, []).append(entry)
+    return sheet
+
+
+@memoize_buffer(maxsize=16)
+def style_index(text):
+    index = scan(text)
+    return StyleIndex([_sheet(text, body, list(_entries(text, index, body))) for body in stylesheet_bodies(text)])
+
+
+def _moved(entry, delta):
+    return replace(
+        entry, start=entry.start + delta, end=entry.end + delta, key_start=entry.key_start + delta,
+        value_start=entry.value_start + delta, value_end=entry.value_end + delta,
+    )
+
+
+def restyle(style, text, span):
+    # Index of `text` from `style`, the index of the previous version, given
+    # the scanner.changed_span() of the edit: sheets away from the edit are
+    # reused or shifted and inside the edited sheet only the entries from the
+    # edit up to the first unchanged one are walked again
+    start, old_end, new_end = span
+    delta = new_end - old_end
+    index = scan(text)
+    old = {sheet.open: sheet for sheet in style.sheets}
+    result = StyleIndex()
+    for body in stylesheet_bodies(text):
+        sheet = old.get(body.open if body.open < start else body.open - delta)
+        close = None if sheet is None else (sheet.close if sheet.close < start else sheet.close + delta)
+        if sheet is None or close != body.close or start <= sheet.open < old_end:
+            entries = list(_entries(text, index, body))
+        elif sheet.close < start:
+            entries = sheet.entries
+        elif sheet.open >= old_end:
+            entries = [_moved(entry, delta) for entry in sheet.entries]
+        else:
+            entries = [entry for entry in sheet.entries if entry.end < start]
+            rest = {entry.key_start + delta: k for k, entry in enumerate(sheet.entries) if entry.key_start > old_end}
+            resume = entries[-1].end if entries else None
+            for entry in _entries(text, index, body, resume):
+                k = rest.get(entry.key_start) if entry.key_start > new_end else None
+                if k is not None and _moved(sheet.entries[k], delta) == entry:
+                    entries.extend(_moved(moved, delta) for moved in sheet.entries[k:])
+                    break
+                entries.append(entry)
+        result.sheets.append(_sheet(text, body, entries))
+    return result
+
+
+def find_style_keys(text, key):
+    # Bounds of every `key: {...},` entry directly inside a StyleSheet.create
+    # body, in source order
+    return [
+        (entry.start, entry.end) for entry in style_index(text).find(key)
+        if char(text, entry.value_start) == '{'
+    ]
+
+
+@lru_cache(maxsize=64)
+def split_block(block):
+    # (key, text) pieces of a block of entries such as ACTIVITY_STYLES; each
+    # piece runs from the end of the previous entry, so leading comments and
+    # line breaks travel with the entry that follows them
+    wrapper = 'StyleSheet.create({'
+    text = wrapper + block + '\n});'
+    sheet = style_index(text).sheets[0]
+    pieces = []
+    pos = len(wrapper)
+    for entry in sheet.entries:
+        pieces.append((entry.key, text[pos:entry.end]))
+        pos = entry.end
+    return tuple(pieces)
+
+
+def _missing(sheet, block):
+    # Only the entries of `block` the sheet does not define yet
+    seen = set(sheet.keys)
+    parts = []
+    for key, piece in split_block(block):
+        if key not in seen:
+            seen.add(key)
+            parts.append(piece)
+    return ''.join(parts)
+
+
+def insert_styles(text, block, after=None, fallback=False):
+    # Edits adding the entries of `block` that are missing, right after the
+    # `after` entry in every sheet that has it. With `fallback`, a file with
+    # no such entry gets them at the end of its `styles` sheet instead.
+    style = style_index(text)
+    targets = [sheet for sheet in style.sheets if after is not None and after in sheet.keys]
+    if targets:
+        edits = []
+        for sheet in targets:
+            missing = _missing(sheet, block)
+            entry = sheet.keys[after][0]
+            if missing:
+                edits.append((entry.end, entry.end, missing if entry.has_comma else ',' + missing))
+        return edits
+
+    sheet = style.sheet() or (style.sheets[-1] if style.sheets else None)
+    if not fallback or sheet is None:
+        return []
+    missing = _missing(sheet, block)
+    if not missing:
+        return []
+    if not sheet.entries:
+        return [(sheet.open + 1, sheet.open + 1, missing)]
+    entry = sheet.entries[-1]
+    return [(entry.end, entry.end, missing if entry.has_comma else ',' + missing)]
+
+
+def replace_style(text, key, value):
+    # Edits replacing the value of the effective `key` entry of every sheet
+    edits = []
+    for sheet in style_index(text).sheets:
+        entry = sheet.get(key)
+        if entry is not None:
+            edits.append((entry.value_start, entry.value_end, value))
+    return edits
+
+
+def dedupe_styles(text):
+    # Edits removing all but the last entry of every duplicated key, with the
+    # rest of the line when nothing else follows on it
+    not_space = compile_for(text, r'[^ \t]')
+    edits = []
+    for sheet in style_index(text).sheets:
+        for entries in sheet.duplicates().values():
+            for entry in entries[:-1]:
+                end = entry.end
+                m = not_space.search(text, end, sheet.close)
+                if m and char(text, m.start()) == '\n' and entry.start != entry.key_start:
+                    end = m.end()
+                edits.append((entry.start, end, ''))
+    return edits
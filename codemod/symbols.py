@@ -0,0 +1,278 @@
+# Project-wide index of what every file imports and which names it uses.
+#
+# One pass over the tree, fanned out to a process pool, records per file the
+# named imports (module, name, local binding), the identifiers its code
+# refers to outside import declarations, and the components its JSX renders.
+# The index is kept in .codemod-cache/symbols.json and refreshed
+# incrementally: only files whose size or mtime changed are parsed again.
+#
+# From it come the unused named imports of lucide-react-native and of the
+# app's own modules, which the prune_unused_imports rule removes (an app
+# module left with no names is still imported for its side effects), and the
+# components a file renders without importing them, with the module the rest
+# of the tree imports them from.
+#
+# python3 -m codemod.symbols [--prune [--dry-run]] [-j N] [GLOB ...]
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from codemod.buffers import compile_for, contains, decode
+from codemod.cache import CACHE_DIR
+from codemod.imports import find_imports, remove_named_imports
+from codemod.scanner import scan
+
+INDEX_NAME = 'symbols.json'
+# Bumped when what is recorded per file changes
+FORMAT = 1
+# Modules whose unused named imports are pruned: the icon set, and the app's
+# own modules (relative or through the @/ alias)
+PRUNED_MODULES = ('lucide-react-native',)
+INTERNAL_PREFIXES = ('./', '../', '@/', '~/')
+
+# An identifier that is not a property (`a.Eye`), a spread (`...rest`) is
+_IDENTIFIER = r'(?<![\w$])(?:(?<=\.\.\.)|(?<!\.))[A-Za-z_$][\w$]*'
+_TAG = r'<\s*([A-Z][\w$]*)'
+_DECLARATION = r'(?<![\w$.])(?:const|let|var|function|class|interface|type|enum)\s+([A-Za-z_$][\w$]*)'
+
+
+def is_pruned(module):
+    return module in PRUNED_MODULES or module.startswith(INTERNAL_PREFIXES)
+
+
+@dataclass
+class FileSymbols:
+    path: str
+    size: int = 0
+    mtime_ns: int = 0
+    # [module, imported name, local name]; the default import is named 'default'
+    imports: list = field(default_factory=list)
+    # Identifiers the code refers to outside import declarations
+    used: list = field(default_factory=list)
+    # Components rendered as JSX tags, and names declared at any level
+    rendered: list = field(default_factory=list)
+    declared: list = field(default_factory=list)
+
+    def unused(self, modules=is_pruned):
+        used = set(self.used)
+        return [(module, name, local) for module, name, local in self.imports
+                if name != 'default' and local not in used and modules(module)]
+
+
+def _used(text, index, imports):
+    # Identifiers in code, skipping the import declarations themselves
+    spans = sorted((found.start, found.end) for found in imports)
+    names = set()
+    k = 0
+    for m in compile_for(text, _IDENTIFIER).finditer(text):
+        while k < len(spans) and spans[k][1] <= m.start():
+            k += 1
+        if k < len(spans) and spans[k][0] <= m.start() or not index.is_code(m.start()):
+            continue
+        names.add(decode(m.group()))
+    return names
+
+
+def file_symbols(text, path=''):
+    index = scan(text)
+    imports = find_imports(text)
+    symbols = FileSymbols(path)
+    for found in imports:
+        if found.default:
+            symbols.imports.append([found.module, 'default', found.default])
+        symbols.imports.extend([found.module, spec.name, spec.local] for spec in found.names)
+    symbols.used = sorted(_used(text, index, imports))
+    symbols.rendered = sorted({decode(m.group(1)) for m in compile_for(text, _TAG).finditer(text) if index.is_code(m.start())})
+    symbols.declared = sorted({decode(m.group(1)) for m in compile_for(text, _DECLARATION).finditer(text) if index.is_code(m.start())})
+    return symbols
+
+
+def prune_edits(text, modules=is_pruned):
+    # Edits that remove the named imports of `modules` the file never uses.
+    # The app's own modules may run code when loaded, so an import of one
+    # that loses all its names is kept as a bare `import '...'`
+    imports = find_imports(text)
+    used = _used(text, scan(text), imports)
+    edits = []
+    for found in imports:
+        if found.type_only or not modules(found.module):
+            continue
+        unused = [spec for spec in found.names if spec.local not in used]
+        if unused:
+            edits.extend(remove_named_imports(text, found, unused, side_effects=found.module.startswith(INTERNAL_PREFIXES)))
+    return edits
+
+
+def prune_unused_imports(buf):
+    if not contains(buf, 'import'):
+        return []
+    return prune_edits(buf)
+
+
+def _index_file(path):
+    try:
+        stat = os.stat(path)
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+    symbols = file_symbols(text, path)
+    symbols.size, symbols.mtime_ns = stat.st_size, stat.st_mtime_ns
+    return symbols
+
+
+class SymbolIndex:
+    def __init__(self, root='.'):
+        self.path = os.path.join(root, CACHE_DIR, INDEX_NAME)
+        self.files = self._load()
+        self.dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if saved.get('format') != FORMAT:
+            return {}
+        return {path: FileSymbols(**entry) for path, entry in saved['files'].items()}
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'format': FORMAT, 'files': {path: asdict(symbols) for path, symbols in self.files.items()}}, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def _stale(self, path):
+        symbols = self.files.get(path)
+        if symbols is None:
+            return True
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return True
+        return stat.st_size != symbols.size or stat.st_mtime_ns != symbols.mtime_ns
+
+    def refresh(self, paths, workers=None):
+        # Parse the files among `paths` that are new or changed since they
+        # were indexed and forget the ones that are gone; returns how many
+        # were parsed
+        paths = [os.path.normpath(path) for path in paths]
+        for path in set(self.files) - set(paths):
+            del self.files[path]
+            self.dirty = True
+        stale = [path for path in paths if self._stale(path)]
+        workers = max(1, min(workers or os.cpu_count() or 1, len(stale) or 1))
+        if workers == 1:
+            results = map(_index_file, stale)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_index_file, stale, chunksize=8))
+        for path, symbols in zip(stale, results):
+            if symbols is None:
+                self.files.pop(path, None)
+            else:
+                self.files[path] = symbols
+            self.dirty = True
+        return len(stale)
+
+    def update(self, path, text):
+        # Re-index one file from text already in memory (e.g. just written)
+        path = os.path.normpath(path)
+        symbols = file_symbols(text, path)
+        try:
+            stat = os.stat(path)
+            symbols.size, symbols.mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            pass
+        self.files[path] = symbols
+        self.dirty = True
+
+    def _exports(self):
+        # {name: {module: files importing it from there}} for names imported
+        # under their own name
+        exports = {}
+        for symbols in self.files.values():
+            for module, name, local in symbols.imports:
+                if name != 'default' and name == local:
+                    modules = exports.setdefault(name, {})
+                    modules[module] = modules.get(module, 0) + 1
+        return exports
+
+    def module_for(self, name, exports=None):
+        # The module the tree imports `name` from most often, or None
+        modules = (self._exports() if exports is None else exports).get(name)
+        return max(sorted(modules), key=modules.get) if modules else None
+
+    def importers(self, module, name):
+        return sorted(path for path, symbols in self.files.items() if any(m == module and n == name for m, n, _ in symbols.imports))
+
+    def unused(self, modules=is_pruned):
+        # {path: [(module, name, local)]} of the named imports nothing uses
+        return {path: unused for path, symbols in sorted(self.files.items()) if (unused := symbols.unused(modules))}
+
+    def missing(self):
+        # {path: [(component, module)]} of the components a file renders but
+        # neither imports nor declares, when the tree imports them elsewhere
+        exports = self._exports()
+        missing = {}
+        for path, symbols in sorted(self.files.items()):
+            bound = {local for _, _, local in symbols.imports} | set(symbols.declared)
+            found = [(name, self.module_for(name, exports)) for name in symbols.rendered if name not in bound and name in exports]
+            if found:
+                missing[path] = found
+        return missing
+
+
+def _print_diffs(report):
+    from codemod.plan import unified_diff
+
+    for result in report.files:
+        if result.plan is not None:
+            with open(result.path, 'r', encoding='utf-8', newline='') as f:
+                print(unified_diff(result.plan, f.read()), end='')
+
+
+def main(argv=None):
+    from codemod.tree import DEFAULT_GLOBS, expand_globs, format_tree_report, run_tree
+
+    parser = argparse.ArgumentParser(prog='codemod.symbols', description='Index imports across the tree; report or prune the unused ones.')
+    parser.add_argument('globs', nargs='*', help='files to index (default: the tree globs)')
+    parser.add_argument('--prune', action='store_true', help='remove the unused named imports of lucide-react-native and internal modules')
+    parser.add_argument('--dry-run', action='store_true', help='with --prune, print the diffs without writing')
+    parser.add_argument('-j', '--jobs', type=int, help='worker processes (default: one per core)')
+    args = parser.parse_args(argv)
+
+    index = SymbolIndex()
+    paths = expand_globs(args.globs or DEFAULT_GLOBS)
+    start = time.perf_counter()
+    parsed = index.refresh(paths, args.jobs)
+    print(f"🔎 {len(index.files)} file(s) indexed, {parsed} parsed in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    unused = index.unused()
+    for path, names in unused.items():
+        print(f"➖ {path}: unused {', '.join(local for _, _, local in names)}")
+    for path, names in index.missing().items():
+        print(f"⚠️  {path}: renders {', '.join(f'{name} ({module})' for name, module in names)} without importing it")
+    print(f"🌲 {sum(map(len, unused.values()))} unused import(s) in {len(unused)} file(s)")
+
+    if args.prune and unused:
+        report = run_tree([glob.escape(path) for path in unused], ['prune_unused_imports'], write=not args.dry_run, workers=args.jobs)
+        if args.dry_run:
+            _print_diffs(report)
+        print(format_tree_report(report))
+        index.refresh(paths)
+    index.save()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+# Whole-tree mode: expand globs, fan the files out to a process pool sized to
+# the cores and aggregate the per-file reports. Workers only stage their
+# rewrites; the parent commits them as one transaction, and only if every
+# file was processed without error. With a codemod.checkpoint.Checkpoint,
+# each finished file is recorded as it comes back, so an interrupted run
+# (or one that failed on some file) resumes with the files it has left.
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from codemod.cache import rules_key
+from codemod.engine import FileReport, get_rules, run_file, run_file_streaming
+from codemod.journal import StaleError, Transaction
+from codemod.profiling import slowest_rules
+
+DEFAULT_GLOBS = (
+    'app/**/*.tsx',
+    'components/**/*.tsx',
+    'contexts/**/*.tsx',
+    'hooks/**/*.ts',
+    'services/**/*.ts',
+    'types/**/*.ts',
+    'utils/**/*.ts',
+)
+
+
+@dataclass
+class TreeReport:
+    files: list = field(default_factory=list)
+    errors: dict = field(default_factory=dict)
+    seconds: float = 0.0
+    workers: int = 1
+    # Id of the transaction that wrote the changed files, if any
+    transaction: str = ''
+    # Files a checkpointed run had finished but that were edited since
+    requeued: list = field(default_factory=list)
+    # Set when nothing was written but the finished files wait in the
+    # checkpoint for the next run
+    resumable: bool = False
+
+    @property
+    def changed(self):
+        return [report.path for report in self.files if report.changed]
+
+    @property
+    def unchanged(self):
+        # Some rule matched but the text came out identical
+        return [report.path for report in self.files if not report.changed and report.matches]
+
+    @property
+    def no_match(self):
+        return [report.path for report in self.files if not report.matches and not report.cached and not report.resumed]
+
+    @property
+    def cached(self):
+        return [report.path for report in self.files if report.cached]
+
+    @property
+    def resumed(self):
+        return [report.path for report in self.files if report.resumed]
+
+    @property
+    def slowest(self):
+        return max(self.files, key=lambda report: report.seconds, default=None)
+
+    def rule_totals(self):
+        # {rule: (matches, match seconds, rewrite seconds)}
+        totals = {}
+        for report in self.files:
+            for stat in report.rules:
+                matches, match, rewrite = totals.get(stat.name, (0, 0.0, 0.0))
+                totals[stat.name] = (matches + stat.matches, match + stat.match_seconds, rewrite + stat.rewrite_seconds)
+        return totals
+
+    def io_totals(self):
+        # (read seconds, write seconds) summed over the files
+        return sum(r.read_seconds for r in self.files), sum(r.write_seconds for r in self.files)
+
+
+def expand_globs(patterns, root='.'):
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(root, pattern), recursive=True):
+            if os.path.isfile(path):
+                paths.add(os.path.normpath(path))
+    # Largest files first so the slowest one starts straight away
+    return sorted(paths, key=lambda path: (-os.path.getsize(path), path))
+
+
+def _run_one(path, names, write, known_digest, stream=False, profiling=None):
+    run = run_file_streaming if stream else run_file
+    try:
+        return run(path, names, write=write, known_digest=known_digest, commit=False, profiling=profiling), None
+    except (OSError, UnicodeDecodeError) as e:
+        return path, str(e)
+
+
+def run_tree(patterns=DEFAULT_GLOBS, names=None, write=True, workers=None, root='.', cache=None, stream=False, profiling=None,
+             checkpoint=None):
+    rules = get_rules(names)  # fail fast on unknown rule names, before forking
+    start = time.perf_counter()
+    paths = expand_globs(patterns, root)
+    report = TreeReport()
+
+    # Files whose stat matches a cached fixed point never reach the pool;
+    # workers only return reports, the cache is updated here
+    key = rules_key(rules) if cache is not None or checkpoint is not None else None
+    if cache is not None:
+        fresh = {path for path in paths if cache.is_fresh(path, key)}
+        report.files.extend(FileReport(path, cached=True) for path in sorted(fresh))
+        paths = [path for path in paths if path not in fresh]
+    # Files an interrupted run finished are taken as it left them
+    if checkpoint is not None:
+        checkpoint.start(key, patterns, stream)
+        finished, report.requeued = checkpoint.resume(paths)
+        report.files.extend(finished)
+        done = {result.path for result in finished}
+        paths = [path for path in paths if path not in done]
+    digests = [cache.known_digest(path, key) if cache is not None else None for path in paths]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+    report.workers = workers
+    # Resumed rewrites are committed with the new ones, and every staged
+    # rewrite joins the transaction as soon as it comes back, so a failure
+    # or an interruption never leaves its temp file behind
+    transaction = Transaction(root)
+    for result in report.files:
+        transaction.add(result.staged)
+    results = [None] * len(paths)
+    try:
+        if workers == 1:
+            for k, (path, known) in enumerate(zip(paths, digests)):
+                results[k] = _finished(_run_one(path, names, write, known, stream, profiling), transaction, checkpoint)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_run_one, path, names, write, known, stream, profiling): k
+                           for k, (path, known) in enumerate(zip(paths, digests))}
+                for future in as_completed(futures):
+                    results[futures[future]] = _finished(future.result(), transaction, checkpoint)
+    except BaseException:
+        # The checkpoint keeps what it recorded for the next run
+        if checkpoint is None:
+            transaction.abort()
+        raise
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    for result, error in results:
+        if error is None:
+            report.files.append(result)
+        else:
+            report.errors[result] = error
+    if not report.errors:
+        try:
+            report.transaction = transaction.commit() or ''
+        except StaleError as e:
+            # Edited while the run was going: nothing was written and the
+            # staged rewrites are gone, so the next run processes them again
+            report.errors.update((path, 'edited since it was read') for path in e.paths)
+        else:
+            if checkpoint is not None:
+                checkpoint.finish()
+    elif checkpoint is None:
+        # All or nothing: leave every file as it was
+        transaction.abort()
+    else:
+        # Nothing is written either, but the finished files stay staged
+        report.resumable = True
+    report.seconds = time.perf_counter() - start
+
+    if cache is not None:
+        for result in report.files:
+            cache.record(result, key)
+        cache.save()
+    return report
+
+
+def _finished(result, transaction, checkpoint):
+    # Take a file's staged rewrite and record the file in the checkpoint as
+    # soon as it comes back
+    report, error = result
+    if error is None:
+        transaction.add(report.staged)
+        if checkpoint is not None:
+            checkpoint.record(report)
+    return result
+
+
+def format_tree_report(report):
+    lines = [f"🌲 {len(report.files) + len(report.errors)} file(s) in {report.seconds * 1000:.1f} ms on {report.workers} worker(s)"]
+    slowest = report.slowest
+    if slowest:
+        lines.append(f"   slowest file: {slowest.path} ({slowest.seconds * 1000:.1f} ms)")
+    for seconds, name, path in slowest_rules(report.files, 3):
+        lines.append(f"   slow rule:    {name} on {path} ({seconds * 1000:.1f} ms)")
+    read, write = report.io_totals()
+    lines.append(f"   read {read * 1000:.1f} ms, write {write * 1000:.1f} ms")
+    for name, (matches, match, rewrite) in report.rule_totals().items():
+        lines.append(f"   {name:<28} {(match + rewrite) * 1000:8.2f} ms  {matches} match(es)  [match {match * 1000:.1f} / rewrite {rewrite * 1000:.1f} ms]")
+    if report.transaction:
+        lines.append(f"💾 transaction {report.transaction} (roll back with: python3 -m codemod --rollback {report.transaction})")
+    elif report.changed and report.errors:
+        lines.append("❌ nothing written: every file must succeed for the tree to be committed")
+        if report.resumable:
+            lines.append("↩️  the finished files are checkpointed; run again to resume with the rest")
+    lines.append(f"✅ changed:   {len(report.changed)}")
+    for path in report.changed:
+        lines.append(f"   • {path}")
+    lines.append(f"➖ unchanged: {len(report.unchanged)}")
+    for path in report.unchanged:
+        lines.append(f"   • {path}")
+    lines.append(f"⚪ no match:  {len(report.no_match)}")
+    if report.resumed:
+        lines.append(f"↩️  resumed:   {len(report.resumed)} file(s) an interrupted run had finished")
+    if report.requeued:
+        lines.append(f"⚠️  edited since the checkpoint, processed again: {len(report.requeued)}")
+        for path in report.requeued:
+            lines.append(f"   • {path}")
+    conflicts = [result for result in report.files if result.conflicts]
+    if conflicts:
+        lines.append(f"⚠️  overlapping rules re-planned in {len(conflicts)} file(s)")
+        for result in conflicts:
+            lines.append(f"   • {result.path}: {', '.join(f'{name} after {other}' for name, other in result.conflicts)}")
+    rejected = [result for result in report.files if result.rejected]
+    if rejected:
+        lines.append(f"❌ rules rejected for syntax errors in {len(rejected)} file(s)")
+        for result in rejected:
+            lines.append(f"   • {result.path}: {', '.join(f'{name} (line {line}: {message})' for name, line, message in result.rejected)}")
+    if report.cached:
+        lines.append(f"💾 cached:    {len(report.cached)}")
+    if report.errors:
+        lines.append(f"❌ errors:    {len(report.errors)}")
+        for path, error in report.errors.items():
+            lines.append(f"   • {path}: {error}")
+    return '\n'.join(lines)
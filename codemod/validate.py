@@ -0,0 +1,172 @@
+# Syntax check of every rewrite before the next wave sees it.
+#
+# Rules rewrite text they matched with anchors and templates, and nothing
+# stopped one from leaving a file that no longer parses: a global
+# replace('            </View>', '            </ScrollView>') also renames
+# the closing tag of every other View at that indent. After each wave the
+# engine hands the old text, the new text and the edits of every rule to
+# check(). The scanner already indexes the old text, so only the innermost
+# bracket pair around each edit is scanned again in the new text
+# (scanner.rescan_regions); a region with a syntax error, a JSX tag closed
+# by the wrong name or a pair that no longer closes where it did is blamed
+# on the rules whose edits are in it. Edits outside every pair (imports,
+# appended declarations) and regions that were broken to begin with are
+# checked with a full scan instead: the rewrite may not add errors.
+#
+# Balanced brackets and tags are not enough: a template inserted among JSX
+# children (`const activities = [...];` before a list) still balances, and
+# renders as text if it compiles at all. So the JSX text a rewrite adds is
+# checked too, and a line of it that reads as a statement (a declaration,
+# return/if/for, an arrow function, an assignment ending in `;`) rejects the
+# rule. That is the JavaScript that ends up there in practice, not a
+# grammar: tree-sitter's TSX grammar would check the rest, but it is a
+# compiled dependency and already reports errors in about a fifth of the
+# tree's screens, so it could only ever compare error counts.
+#
+# The engine drops the rejected rules' edits and rewrites again, so the
+# other rules of the wave still apply. The index of the accepted text is
+# primed for the scanner, so the next wave starts from it instead of
+# scanning the file again.
+
+import re
+
+from codemod.buffers import is_text, text_slice
+from codemod.plan import _size
+from codemod.scanner import _scan, region_around, rescan_regions, scan
+
+
+# A line of JSX text that is a statement
+_CODE_LINE = re.compile(
+    r'^(?:(?:const|let|var)\s+[\w$\[{]|(?:return|if|for|while|switch)\s*\(|function\b[\s\w$]*\('
+    r'|import\s.*\bfrom\s*[\'"]|export\s+(?:default|const|function)\b|[\w$.]+\s*=[^=>].*;$)|=>'
+)
+
+
+def _regions(index, kept, binary):
+    # Outermost pairs holding the edits as [pair, growth, rule names], in
+    # order, and the names of the rules with edits outside every pair
+    found = {}
+    top = set()
+    for name, edits in kept:
+        for start, end, replacement in edits:
+            pair = region_around(index, start, end)
+            if pair is None:
+                top.add(name)
+                continue
+            region = found.setdefault(pair.open, [pair, 0, set()])
+            region[1] += _size(replacement, binary) - (end - start)
+            region[2].add(name)
+    regions = []
+    for region in sorted(found.values(), key=lambda region: region[0].open):
+        last = regions[-1] if regions else None
+        if last is not None and region[0].close <= last[0].close:
+            last[1] += region[1]
+            last[2] |= region[2]
+        else:
+            regions.append(region)
+    return regions, top
+
+
+def _rewritten(buf, edits):
+    # `buf` with `edits` applied, in its own type
+    empty = '' if is_text(buf) else b''
+    parts = []
+    pos = 0
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+        parts += [buf[pos:start], replacement if is_text(buf) else replacement.encode('utf-8')]
+        pos = end
+    parts.append(buf[pos:])
+    return empty.join(parts)
+
+
+def _line(buf, pos):
+    return text_slice(buf, 0, pos).count('\n') + 1
+
+
+def _added_errors(before, after):
+    # Errors of `after` beyond the ones `before` already had, by message
+    remaining = [message for _, message in before.errors]
+    added = []
+    for pos, message in after.errors:
+        if message in remaining:
+            remaining.remove(message)
+        else:
+            added.append((pos, message))
+    return added
+
+
+def _blame(buf, before, kept):
+    # {rule: (line, message)} of the rules whose edits alone add errors to
+    # `buf`
+    blamed = {}
+    for name, edits in kept:
+        alone = _rewritten(buf, edits)
+        added = _added_errors(before, _scan(alone))
+        if added:
+            blamed[name] = (_line(alone, added[0][0]), added[0][1])
+    return blamed
+
+
+def _code_in_text(new, index, kept, binary):
+    # {rule: (line, message)} of the rules that add a statement to JSX text
+    # in `new`
+    edits = sorted((start, end, replacement, name) for name, edits in kept for start, end, replacement in edits)
+    found = {}
+    delta = 0
+    for start, end, replacement, name in edits:
+        pos = start + delta
+        size = _size(replacement, binary)
+        delta += size - (end - start)
+        if name in found or not replacement.strip():
+            continue
+        offset = 0
+        for line in replacement.split('\n'):
+            code = line.strip()
+            at = pos + _size(replacement[:offset + len(line) - len(line.lstrip())], binary)
+            offset += len(line) + 1
+            if code and _CODE_LINE.search(code) and index.in_jsx_text(at):
+                found[name] = (_line(new, at), f"code in JSX text: {code[:40]!r}")
+                break
+    return found
+
+
+def _accepted(buf, new, index, kept):
+    # check()'s result for a rewrite whose brackets and tags are sound
+    rejected = _code_in_text(new, index, kept, not is_text(buf))
+    return (None, rejected) if rejected else (index, {})
+
+
+def check(buf, new, kept):
+    # (index of `new`, {rule: (line, message)}) for `new`, `buf` rewritten
+    # with the edits of `kept` [(rule, edits)]. The index is None when a
+    # rule is rejected; the line is in `new`.
+    before = scan(buf)
+    regions, top = _regions(before, kept, not is_text(buf))
+    broken = any(region[0].open <= pos <= region[0].close for region in regions for pos, _ in before.errors)
+    if not top and not broken:
+        index, problems = rescan_regions(before, new, [(pair, grown) for pair, grown, _ in regions])
+        if not problems:
+            return _accepted(buf, new, index, kept)
+        rejected = {}
+        for pos, message in problems:
+            # The region the problem starts in, in the new offsets
+            delta = 0
+            owner = regions[0]
+            for region in regions:
+                if region[0].open + delta > pos:
+                    break
+                owner = region
+                delta += region[1]
+            for name in sorted(owner[2]):
+                rejected.setdefault(name, (_line(new, pos), message))
+        return None, rejected
+    index = _scan(new)
+    added = _added_errors(before, index)
+    if not added:
+        return _accepted(buf, new, index, kept)
+    # Blame the rules that break the text on their own, or all of them if
+    # only their combination does
+    rejected = _blame(buf, before, kept)
+    if not rejected:
+        rejected = {name: (_line(new, added[0][0]), added[0][1]) for name, _ in kept}
+    return None, rejected
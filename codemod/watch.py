@@ -0,0 +1,205 @@
+# Watch mode: keep the watched files' scanner, StyleSheet and anchor indexes
+# in memory and reapply the rules whenever a file is saved.
+#
+# python3 -m codemod --watch [--poll] [--rule NAME ...] [PATH ...]
+#
+# Saves are picked up with inotify (through libc, no extra dependency) or,
+# where that is unavailable, by polling mtime and size. On a save only the
+# edited region is re-indexed (scanner.rescan, styles.restyle,
+# matcher.research) and the primed indexes are what the rules then see, so a
+# save costs milliseconds instead of a cold run. Rewrites go through the
+# journal like any other run.
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from codemod.engine import FileReport, apply_rules, digest, format_report, get_rules
+from codemod.journal import Staged, StaleError, Transaction, write_temp
+from codemod.matcher import _find_all, research
+from codemod.scanner import changed_span, rescan, scan
+from codemod.styles import restyle, style_index
+
+# inotify(7)
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_EVENT = struct.Struct('iIII')
+
+# Editors often save in several steps; events this close together are one save
+DEBOUNCE = 0.05
+POLL_INTERVAL = 0.5
+
+
+class InotifyWatcher:
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.paths = {os.path.abspath(path): path for path in paths}
+        # Directories are watched, not files: editors that save by renaming
+        # a temp file over the original would drop a per-file watch
+        self.dirs = {}
+        for directory in {os.path.dirname(path) for path in self.paths}:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+            self.dirs[wd] = directory
+
+    def _read(self):
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            wd, _, _, length = _EVENT.unpack_from(data, pos)
+            name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b'\0')
+            pos += _EVENT.size + length
+            path = os.path.join(self.dirs.get(wd, ''), os.fsdecode(name))
+            if path in self.paths:
+                changed.add(self.paths[path])
+        return changed
+
+    def wait(self, timeout=None):
+        # Paths saved since the last call; empty after `timeout` seconds
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        changed = self._read()
+        while select.select([self.fd], [], [], DEBOUNCE)[0]:
+            changed |= self._read()
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.stats = {path: self._stat(path) for path in paths}
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, before in self.stats.items():
+                now = self._stat(path)
+                if now != before:
+                    self.stats[path] = now
+                    if now is not None:
+                        changed.add(path)
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+def make_watcher(paths, poll=False):
+    if not poll:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+
+class WatchedFile:
+    def __init__(self, path):
+        self.path = path
+        self.text = None
+        self.digest = ''
+
+    def load(self):
+        # Cold read; builds every index once
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+        self.reindex(text)
+        return text
+
+    def reindex(self, text):
+        # Bring the indexes from the previous text to `text`, rescanning only
+        # around the edit, and prime the caches the rules read from
+        old, self.text, self.digest = self.text, text, digest(text)
+        span = changed_span(old, text) if old is not None else None
+        if old is None or span is None:
+            scan(text), style_index(text), _find_all(text)
+            return
+        scan.prime(text, rescan(scan(old), text))
+        style_index.prime(text, restyle(style_index(old), text, span))
+        _find_all.prime(text, research(_find_all(old), text, span))
+
+
+def apply_watched(watched, rules):
+    # Apply `rules` to the saved file; rewrites are committed through the
+    # journal and re-indexed incrementally so the next save starts hot
+    report = FileReport(watched.path)
+    start = time.perf_counter()
+    with open(watched.path, 'r', encoding='utf-8', newline='') as f:
+        text = f.read()
+    report.read_seconds = time.perf_counter() - start
+    if digest(text) == watched.digest:
+        # Our own write, or a save that did not change anything
+        report.cached = True
+        return report
+    original = text
+    watched.reindex(text)
+
+    steps = []
+    content, report.rules = apply_rules(original, rules, steps, reindex=watched.reindex)
+    report.changed = content != original
+    report.digest = digest(content)
+    if report.changed:
+        start = time.perf_counter()
+        transaction = Transaction()
+        transaction.add(Staged(watched.path, write_temp(watched.path, content.encode('utf-8')), digest(original), report.digest, 'text', steps))
+        report.transaction = transaction.commit()
+        report.write_seconds = time.perf_counter() - start
+    return report
+
+
+def watch(paths, names=None, poll=False, timeout=None, on_report=None):
+    # Runs until interrupted (or until `timeout` seconds pass without a save)
+    rules = get_rules(names)
+    on_report = on_report or (lambda report: print(format_report(report)))
+    files = {path: WatchedFile(path) for path in paths}
+    for watched in files.values():
+        # The first pass builds the indexes cold and brings the file up to date
+        watched.load()
+        watched.digest = ''
+        on_report(apply_watched(watched, rules))
+
+    watcher = make_watcher(list(files), poll)
+    print(f"👀 Watching {len(files)} file(s) with {type(watcher).__name__} (Ctrl-C to stop)")
+    try:
+        while True:
+            changed = watcher.wait(timeout)
+            if not changed and timeout is not None:
+                return
+            for path in sorted(changed):
+                try:
+                    on_report(apply_watched(files[path], rules))
+                except (OSError, UnicodeDecodeError, StaleError) as e:
+                    # Saved again while the rules ran: that save is picked
+                    # up next
+                    print(f"❌ {path}: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
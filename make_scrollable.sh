@@ -2,33 +2,9 @@
 
 echo "🔄 Making Activity Timeline Scrollable..."
 
-# Create a backup
-cp "app/(tabs)/pipeline.tsx" "app/(tabs)/pipeline_backup.tsx"
-echo "✅ Backup created"
-
-# Replace the activity list opening tag
-sed -i '' 's/<View style={styles.activityList}>/<ScrollView \
-              style={styles.activityScrollContainer}\
-              showsVerticalScrollIndicator={false}\
-              contentContainerStyle={styles.activityList}>/g' "app/(tabs)/pipeline.tsx"
-
-echo "✅ Updated activity list opening tag"
-
-# Replace the activity list closing tag
-sed -i '' 's|            </View>|            </ScrollView>|g' "app/(tabs)/pipeline.tsx"
-
-echo "✅ Updated activity list closing tag"
-
-# Add new styles after activityDescription
-cat >> "app/(tabs)/pipeline.tsx" << 'EOF'
-
-  activityScrollContainer: {
-    flex: 1,
-    maxHeight: 400,
-  },
-EOF
-
-echo "✅ Added scroll container styles"
+# Swap the activity list for a ScrollView and add its styles, written
+# atomically; undo with: python3 -m codemod --rollback
+python3 -m codemod --rule make_activity_scrollable "app/(tabs)/pipeline.tsx"
 
 echo ""
 echo "🎉 Activity Timeline is now scrollable!"
@@ -0,0 +1,77 @@
+# Activity rules of codemod/rules/activity.toml on pipeline.tsx and on the
+# shapes they were written for.
+
+from codemod.activity import PIPELINE
+from codemod.engine import apply_edits, apply_rules, get_rules
+
+ACTIVITY_RULES = ['fix_activity_section', 'update_activity_section', 'make_activity_scrollable', 'add_activity_filters']
+
+OLD_ACTIVITY = '''export default function Pipeline() {
+  const renderTabContent = (tab) => {
+    switch (tab) {
+      case 'Activity':
+        return (
+          <View style={styles.activitySection}>
+            <Text style={styles.sectionTitle}>Recent Activity</Text>
+            <View style={styles.activityList}>
+              <View style={styles.activityItem}>
+                <View style={styles.activityInfo}>
+                  <Text style={styles.activityAction}>+ Card created</Text>
+                  <Text style={styles.activityUser}>System</Text>
+                  <Text style={styles.activityDate}>Jan 10, 2024, 5:00 AM</Text>
+                </View>
+              </View>
+            </View>
+          </View>
+        );
+      default:
+        return null;
+    }
+  };
+  return renderTabContent('Activity');
+}
+
+const styles = StyleSheet.create({
+  activityDate: {
+    fontSize: 12,
+    color: '#9CA3AF',
+  },
+});
+'''
+
+
+def _read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def _rule(name):
+    return get_rules([name])[0]
+
+
+def test_update_activity_section_leaves_the_migrated_case_alone():
+    # The current case (filters, automation tab, timeline from data) is not
+    # the static one the rule replaces
+    assert _rule('update_activity_section').plan(_read(PIPELINE)) == []
+
+
+def test_update_activity_section_replaces_the_static_case():
+    text = apply_edits(OLD_ACTIVITY, _rule('update_activity_section').plan(OLD_ACTIVITY))
+    assert 'Recent Activity' not in text
+    assert 'Activity Timeline' in text
+    assert 'activityFilterTabs: {' in text
+    assert "case 'Activity':" in text and 'default:' in text
+    # and once replaced, it is left alone
+    assert _rule('update_activity_section').plan(text) == []
+
+
+def test_activity_rules_migrate_the_static_case():
+    # The whole chain on the old case, as the wrapper scripts ran it: the
+    # data goes before the `return`, not among the JSX children
+    rejected = []
+    text, _ = apply_rules(OLD_ACTIVITY, get_rules(ACTIVITY_RULES), rejected=rejected)
+    assert rejected == []
+    case = text[text.index("case 'Activity':"):text.index('default:')]
+    assert case.index('const activities = [') < case.index('const filteredActivities') < case.index('return (')
+    assert 'filteredActivities.map(' in case
+    assert 'ScrollView' in case
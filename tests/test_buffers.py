@@ -0,0 +1,65 @@
+# codemod.buffers.memoize_buffer: how much a memoized function keeps alive.
+
+import mmap
+import sys
+
+from codemod.buffers import memoize_buffer
+
+
+def _counting(**bounds):
+    calls = []
+
+    @memoize_buffer(**bounds)
+    def length(buf):
+        calls.append(buf)
+        return len(buf)
+    return length, calls
+
+
+def test_repeated_buffers_are_computed_once():
+    length, calls = _counting()
+    assert length('abc') == length('abc') == 3
+    assert length(b'abc') == 3
+    assert len(calls) == 2
+
+
+def test_the_bytes_held_are_capped():
+    big = sys.getsizeof('x' * 1000)
+    length, calls = _counting(maxbytes=3 * big)
+    texts = [str(k) * 1000 for k in range(1, 10)]
+    for text in texts:
+        length(text)
+    entries, held = length.cache_info()
+    assert entries == 3 and held <= 3 * big
+    # The oldest buffers were let go, the newest are still cached
+    length(texts[-1])
+    length(texts[0])
+    assert len(calls) == len(texts) + 1
+
+
+def test_a_buffer_over_the_cap_is_still_kept_until_the_next_one():
+    length, calls = _counting(maxbytes=10)
+    length('x' * 100)
+    length('x' * 100)
+    assert len(calls) == 1
+    length('y' * 100)
+    assert length.cache_info()[0] == 1
+
+
+def test_primed_results_count_towards_the_cap():
+    length, calls = _counting(maxsize=2)
+    length.prime('a', 'primed')
+    length('b')
+    length('c')
+    assert length.cache_info()[0] == 2
+    assert length('a') == 1
+
+
+def test_mapped_buffers_are_remembered_by_identity(tmp_path):
+    path = tmp_path / 'screen.tsx'
+    path.write_bytes(b'<View />\n')
+    length, calls = _counting()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        assert length(buf) == length(buf) == 9
+    assert len(calls) == 1
+    assert length.cache_info() == (0, 0)
@@ -0,0 +1,69 @@
+# codemod.cache: what invalidates a cached fixed point.
+
+import os
+
+import codemod.cache
+from codemod.cache import Cache, package_hash, rules_key
+from codemod.engine import FileReport, digest, get_rules
+
+
+def _fixed_point(path):
+    stat = os.stat(path)
+    return FileReport(str(path), digest=digest(path.read_text()), size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+
+def test_an_unchanged_file_is_fresh_until_it_is_touched(tmp_path):
+    path = tmp_path / 'screen.tsx'
+    path.write_text('<View />\n')
+    cache = Cache(str(tmp_path))
+    cache.record(_fixed_point(path), 'key')
+    assert cache.is_fresh(str(path), 'key')
+    assert not cache.is_fresh(str(path), 'other key')
+
+    os.utime(path, ns=(0, 0))
+    assert not cache.is_fresh(str(path), 'key')
+    # The content hash still says it was processed
+    assert cache.known_digest(str(path), 'key') == _fixed_point(path).digest
+
+
+def test_entries_survive_a_save(tmp_path):
+    path = tmp_path / 'screen.tsx'
+    path.write_text('<View />\n')
+    cache = Cache(str(tmp_path))
+    cache.record(_fixed_point(path), 'key')
+    cache.save()
+    assert Cache(str(tmp_path)).is_fresh(str(path), 'key')
+
+
+def test_a_changed_file_is_forgotten(tmp_path):
+    path = tmp_path / 'screen.tsx'
+    path.write_text('<View />\n')
+    cache = Cache(str(tmp_path))
+    cache.record(_fixed_point(path), 'key')
+    report = _fixed_point(path)
+    report.changed = True
+    cache.record(report, 'key')
+    assert cache.entry(str(path), 'key') is None
+
+
+def test_editing_any_module_of_the_package_changes_the_key(tmp_path):
+    # Helpers like rulefiles.py or lists.py are not the rule's own module
+    package = tmp_path / 'codemod'
+    (package / 'rules').mkdir(parents=True)
+    (package / 'lists.py').write_text('A = 1\n')
+    (package / 'rules' / 'lists.toml').write_text('[[rule]]\n')
+    before = package_hash(str(package))
+    codemod.cache._package.clear()
+    (package / 'lists.py').write_text('A = 2\n')
+    after_module = package_hash(str(package))
+    codemod.cache._package.clear()
+    (package / 'rules' / 'lists.toml').write_text('[[rule]]\nname = "x"\n')
+    after_rules = package_hash(str(package))
+    assert len({before, after_module, after_rules}) == 3
+
+
+def test_the_key_depends_on_the_rules():
+    one = get_rules(['fix_activity_section'])
+    both = get_rules(['fix_activity_section', 'update_activity_section'])
+    assert rules_key(one) != rules_key(both)
+    assert rules_key(one) == rules_key(get_rules(['fix_activity_section']))
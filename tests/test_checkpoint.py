@@ -0,0 +1,164 @@
+# codemod.checkpoint: recording finished files, resuming an interrupted tree
+# run, and what invalidates a checkpoint.
+
+import os
+
+import pytest
+
+from codemod.checkpoint import Checkpoint
+from codemod.engine import RULES, Rule, run_file
+from codemod.journal import transactions
+from codemod.tree import run_tree
+
+BANNER = '// generated\n'
+
+
+@pytest.fixture
+def banner_rule(monkeypatch):
+    # Prepends BANNER, again on every run: a file rewritten twice shows it
+    # twice. The file named in `fail` breaks the rule, like a killed run
+    calls = []
+    fail = set()
+
+    def banner(buf):
+        calls.append(buf)
+        if any(name in buf for name in fail):
+            raise KeyboardInterrupt
+        return [(0, 0, BANNER)]
+
+    monkeypatch.setitem(RULES, 'banner', Rule('banner', banner))
+    return calls, fail
+
+
+def _tree(tmp_path):
+    (tmp_path / 'app').mkdir()
+    # Largest first: big.tsx, mid.tsx, then small.tsx
+    (tmp_path / 'app' / 'big.tsx').write_text('const big = "a much longer file";\n')
+    (tmp_path / 'app' / 'mid.tsx').write_text('const mid = "medium";\n')
+    (tmp_path / 'app' / 'small.tsx').write_text('const small = 1;\n')
+    return {name: str(tmp_path / 'app' / f'{name}.tsx') for name in ('big', 'mid', 'small')}
+
+
+def _staged(tmp_path, name='a.tsx', text='const a = 1;\n'):
+    path = tmp_path / name
+    path.write_text(text)
+    return run_file(str(path), ['banner'], commit=False)
+
+
+def _temps(tmp_path):
+    return sorted(path.name for path in tmp_path.rglob('.codemod-*.tmp'))
+
+
+def test_an_interrupted_run_resumes_requeues_and_commits_once(tmp_path, banner_rule):
+    calls, fail = banner_rule
+    paths = _tree(tmp_path)
+    fail.add('small')
+    with pytest.raises(KeyboardInterrupt):
+        run_tree(['app/*.tsx'], ['banner'], workers=1, root=str(tmp_path), checkpoint=Checkpoint(str(tmp_path)))
+    # Nothing written yet; big and mid are staged and checkpointed
+    assert open(paths['big']).read() == 'const big = "a much longer file";\n'
+    assert sorted(Checkpoint(str(tmp_path)).entries) == [paths['big'], paths['mid']]
+
+    with open(paths['mid'], 'w') as f:
+        f.write('const mid = "edited";\n')
+    fail.clear()
+    calls.clear()
+    report = run_tree(['app/*.tsx'], ['banner'], workers=1, root=str(tmp_path), checkpoint=Checkpoint(str(tmp_path)))
+    assert report.resumed == [paths['big']]
+    assert report.requeued == [paths['mid']]
+    # Only the edited file and the one left over ran again
+    assert calls == ['const mid = "edited";\n', 'const small = 1;\n']
+    assert open(paths['big']).read() == BANNER + 'const big = "a much longer file";\n'
+    assert open(paths['mid']).read() == BANNER + 'const mid = "edited";\n'
+    assert open(paths['small']).read() == BANNER + 'const small = 1;\n'
+    assert [journal['state'] for journal in transactions(str(tmp_path))] == ['committed']
+    assert _temps(tmp_path) == []
+    assert not os.path.exists(Checkpoint(str(tmp_path)).path)
+
+
+def test_recorded_files_are_resumed_by_the_next_checkpoint(tmp_path, banner_rule):
+    report = _staged(tmp_path)
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.start('key', ['*.tsx'], False)
+    checkpoint.record(report)
+    checkpoint.close()
+
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.start('key', ['*.tsx'], False)
+    [resumed], edited = checkpoint.resume([report.path])
+    assert edited == []
+    assert resumed.resumed and resumed.changed and resumed.staged == report.staged
+
+
+def test_a_line_cut_short_is_ignored(tmp_path, banner_rule):
+    report = _staged(tmp_path)
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.start('key', ['*.tsx'], False)
+    checkpoint.record(report)
+    checkpoint.close()
+    with open(checkpoint.path, 'a') as f:
+        f.write('{"path": "b.ts')
+    assert list(Checkpoint(str(tmp_path)).entries) == [report.path]
+
+
+def test_a_file_edited_since_is_queued_again(tmp_path, banner_rule):
+    report = _staged(tmp_path)
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.start('key', ['*.tsx'], False)
+    checkpoint.record(report)
+    with open(report.path, 'w') as f:
+        f.write('const a = 2;\n')
+    assert checkpoint.resume([report.path]) == ([], [report.path])
+    assert _temps(tmp_path) == []
+
+
+def test_a_file_touched_but_not_edited_is_resumed(tmp_path, banner_rule):
+    report = _staged(tmp_path)
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.start('key', ['*.tsx'], False)
+    checkpoint.record(report)
+    os.utime(report.path, ns=(0, 0))
+    finished, edited = checkpoint.resume([report.path])
+    assert [result.path for result in finished] == [report.path] and edited == []
+
+
+@pytest.mark.parametrize('key, patterns, stream', [('other', ['*.tsx'], False), ('key', ['app/*.tsx'], False), ('key', ['*.tsx'], True)])
+def test_another_run_invalidates_the_checkpoint(tmp_path, banner_rule, key, patterns, stream):
+    report = _staged(tmp_path)
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.start('key', ['*.tsx'], False)
+    checkpoint.record(report)
+    checkpoint.close()
+
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.start(key, patterns, stream)
+    assert checkpoint.entries == {}
+    assert checkpoint.resume([report.path]) == ([], [])
+    assert _temps(tmp_path) == []
+
+
+def test_discard_drops_the_run_and_its_staged_output(tmp_path, banner_rule):
+    # What --restart does
+    report = _staged(tmp_path)
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.start('key', ['*.tsx'], False)
+    checkpoint.record(report)
+    checkpoint.close()
+    Checkpoint(str(tmp_path)).discard()
+    assert _temps(tmp_path) == []
+    assert not os.path.exists(checkpoint.path)
+    assert Checkpoint(str(tmp_path)).entries == {}
+
+
+def test_stale_temp_files_are_removed(tmp_path, banner_rule):
+    kept, gone, lost = _staged(tmp_path, 'kept.tsx'), _staged(tmp_path, 'gone.tsx'), _staged(tmp_path, 'lost.tsx')
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.start('key', ['*.tsx'], False)
+    for report in (kept, gone, lost):
+        checkpoint.record(report)
+    # lost.tsx's output was overwritten; gone.tsx is no longer in the run
+    with open(lost.staged.temp, 'w') as f:
+        f.write('something else')
+    finished, edited = checkpoint.resume([kept.path, lost.path])
+    assert [result.path for result in finished] == [kept.path] and edited == []
+    assert _temps(tmp_path) == [os.path.basename(kept.staged.temp)]
@@ -0,0 +1,103 @@
+# codemod.duplicates: fingerprints, thresholds and extract_duplicate_subtrees.
+
+import codemod.duplicates
+from codemod.duplicates import MIN_BYTES, Fingerprints, find_clusters, plan_duplicates, subtrees
+from codemod.engine import apply_edits, apply_rules, get_rules
+from codemod.scanner import scan
+
+
+def _card(title, amount, icon, tag='Text'):
+    return f"""      <View style={{styles.statCard}}>
+        <View style={{styles.statIcon}}>
+          <{icon} size={{20}} color="#2563EB" strokeWidth={{2}} />
+        </View>
+        <{tag} style={{styles.statTitle}} numberOfLines={{1}}>{title}</{tag}>
+        <Text style={{styles.statAmount}} numberOfLines={{1}}>{amount}</Text>
+      </View>
+"""
+
+
+CARDS = [('Revenue', '$12,400', 'DollarSign'), ('Customers', '84', 'Users'), ('Hours logged', '312', 'Clock'), ('Rating', '4.9', 'Star')]
+
+
+def _screen(cards, container='View'):
+    return ("import { ScrollView, View, Text } from 'react-native';\n"
+            "import { DollarSign, Users, Clock, Star } from 'lucide-react-native';\n\n"
+            'export default function Stats() {\n'
+            '  return (\n'
+            f'    <{container} style={{styles.container}}>\n'
+            + ''.join(cards) +
+            f'    </{container}>\n'
+            '  );\n'
+            '}\n\n'
+            'const styles = StyleSheet.create({\n'
+            '  container: { flex: 1 },\n'
+            '});\n')
+
+
+SCREEN = _screen([_card(*card) for card in CARDS])
+
+
+def _cards(text):
+    index = scan(text)
+    return [elem for elem in index.elements if elem.name == 'View' and elem.parent >= 0 and index.elements[elem.parent].parent < 0]
+
+
+def test_copies_that_differ_in_literals_share_a_fingerprint():
+    prints = Fingerprints(SCREEN)
+    keys = {prints.key(elem) for elem in _cards(SCREEN)}
+    assert len(keys) == 1
+    other = _screen([_card('Revenue', '$12,400', 'DollarSign', tag='Label')])
+    assert Fingerprints(other).key(_cards(other)[0]) not in keys
+
+
+def test_a_fingerprint_collision_is_not_taken_for_a_match(monkeypatch):
+    # Same tags and sizes, different structure: only the hash says "same"
+    text = _screen([_card(*CARDS[0]), _card(*CARDS[1], tag='Label'), _card(*CARDS[2]), _card(*CARDS[3], tag='Label')])
+    monkeypatch.setattr(codemod.duplicates.Fingerprints, 'key', lambda self, elem: (0, 0))
+    assert plan_duplicates(text)[0] == []
+
+
+def test_clusters_need_big_enough_subtrees_in_more_than_one_place():
+    found = subtrees(SCREEN, 'stats.tsx')
+    assert all(tree.end - tree.start >= MIN_BYTES for tree in found)
+    [cluster] = find_clusters(found)
+    assert len(cluster.subtrees) == 4
+    # The icon tag, the title and the amount vary
+    assert len(cluster.params) == 3
+    assert find_clusters(subtrees(_screen([_card(*CARDS[0])]), 'one.tsx')) == []
+
+
+def test_runs_shorter_than_min_run_are_left_alone():
+    assert plan_duplicates(_screen([_card(*card) for card in CARDS[:2]]))[0] == []
+
+
+def test_small_copies_are_left_alone():
+    small = ''.join(f'      <View><Text>{title}</Text><Text>{amount}</Text></View>\n' for title, amount, _ in CARDS)
+    edits, report = plan_duplicates(_screen([small]))
+    assert edits == [] and report.extracted == []
+
+
+def test_the_extracted_component_takes_the_varying_holes_as_props():
+    edits, report = plan_duplicates(SCREEN)
+    [found] = report.extracted
+    assert (found.component, found.data, found.copies, found.props) == ('StatCard', 'STAT_CARDS', 4, ['icon', 'title', 'amount'])
+    new = apply_edits(SCREEN, edits)
+    assert '{STAT_CARDS.map((item, index) => <StatCard key={index} {...item} />)}' in new
+    assert "  { icon: DollarSign, title: 'Revenue', amount: '$12,400' },\n" in new
+    assert 'const StatCard = ({ icon: Icon, title, amount }: (typeof STAT_CARDS)[number]) => (\n' in new
+    assert '      <Icon size={20} color="#2563EB" strokeWidth={2} />\n' in new
+
+
+def test_extracting_twice_changes_nothing():
+    edits, _ = plan_duplicates(SCREEN)
+    assert plan_duplicates(apply_edits(SCREEN, edits))[0] == []
+
+
+def test_the_map_left_in_a_scroll_view_is_virtualized_in_the_same_run():
+    # Named in any order, the list rule runs after the extraction
+    rules = get_rules(['virtualize_scroll_lists', 'extract_duplicate_subtrees'])
+    assert [rule.name for rule in rules] == ['extract_duplicate_subtrees', 'virtualize_scroll_lists']
+    once, _ = apply_rules(_screen([_card(*card) for card in CARDS], 'ScrollView'), rules)
+    assert '<FlatList\n      data={STAT_CARDS}' in once
+    assert apply_rules(once, rules)[0] == once
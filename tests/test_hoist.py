@@ -0,0 +1,52 @@
+# codemod.hoist: constant inline styles -> entries of the `styles` sheet.
+
+from codemod.engine import apply_edits
+from codemod.hoist import plan_hoist
+
+SCREEN = '''export default function Screen() {{
+  return (
+    <View>
+      <View style={{[styles.icon, {{ backgroundColor: '#D1FAE5' }}]}} />
+      <Text style={{{{ backgroundColor: '#D1FAE5' }}}}>Paid</Text>
+    </View>
+  );
+}}
+
+const styles = StyleSheet.create({{
+  icon: {{
+    width: 24,
+  }},{entry}
+}});
+'''
+
+
+def _hoisted(entry=''):
+    text = SCREEN.format(entry=entry)
+    edits, report = plan_hoist(text)
+    return apply_edits(text, edits), report
+
+
+def test_identical_literals_share_one_new_entry():
+    text, report = _hoisted()
+    assert list(report.added) == ['backgroundColorD1FAE5']
+    assert text.count('styles.backgroundColorD1FAE5') == 2
+    assert '<Text style={styles.backgroundColorD1FAE5}>' in text
+
+
+def test_a_hand_written_entry_with_the_same_content_is_not_reused():
+    text, report = _hoisted('''
+  invoiceStatusPaid: {
+    backgroundColor: '#D1FAE5',
+  },''')
+    assert report.reused == 0
+    assert 'styles.invoiceStatusPaid' not in text
+    assert list(report.added) == ['backgroundColorD1FAE5']
+
+
+def test_an_entry_an_earlier_run_added_is_reused():
+    text, report = _hoisted('''
+  backgroundColorD1FAE5: {
+    backgroundColor: '#D1FAE5',
+  },''')
+    assert report.added == {} and report.reused == 2
+    assert text.count('styles.backgroundColorD1FAE5') == 2
@@ -0,0 +1,118 @@
+# codemod.journal: commit, rollback and recovery of interrupted runs.
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from codemod.journal import JOURNAL_DIR, Staged, StaleError, Transaction, recover, rollback, transactions, write_temp
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _staged(path, before, after, start, end):
+    # `before` with before[start:end] replaced to give `after`
+    with open(path, 'w') as f:
+        f.write(before)
+    temp = write_temp(str(path), after.encode())
+    step = [[start, len(after) - len(before) + end - start, before[start:end]]]
+    return Staged(str(path), temp, _digest(before), _digest(after), 'text', [step])
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_commit_and_rollback(tmp_path):
+    path = tmp_path / 'screen.tsx'
+    transaction = Transaction(str(tmp_path))
+    transaction.add(_staged(path, '<View>old</View>', '<View>new text</View>', 6, 9))
+    txid = transaction.commit()
+    assert _read(path) == '<View>new text</View>'
+    assert [journal['state'] for journal in transactions(str(tmp_path))] == ['committed']
+
+    assert rollback(root=str(tmp_path)) == (txid, {str(path): None})
+    assert _read(path) == '<View>old</View>'
+    with pytest.raises(KeyError):
+        rollback(root=str(tmp_path))
+
+
+def test_rollback_leaves_files_edited_since(tmp_path):
+    path = tmp_path / 'screen.tsx'
+    transaction = Transaction(str(tmp_path))
+    transaction.add(_staged(path, 'a = 1', 'a = 2', 4, 5))
+    transaction.commit()
+    path.write_text('a = 3')
+    _, results = rollback(root=str(tmp_path))
+    assert results[str(path)] == 'file changed since the transaction'
+    assert _read(path) == 'a = 3'
+
+
+def test_abort_removes_the_staged_files(tmp_path):
+    staged = _staged(tmp_path / 'screen.tsx', 'a', 'b', 0, 1)
+    transaction = Transaction(str(tmp_path))
+    transaction.add(staged)
+    transaction.abort()
+    assert not os.path.exists(staged.temp)
+    assert transaction.commit() is None
+
+
+def test_commit_refuses_files_edited_since_they_were_staged(tmp_path):
+    edited, other = tmp_path / 'edited.tsx', tmp_path / 'other.tsx'
+    transaction = Transaction(str(tmp_path))
+    transaction.add(_staged(edited, 'a = 1', 'a = 2', 4, 5))
+    transaction.add(_staged(other, 'b = 1', 'b = 2', 4, 5))
+    temps = [staged.temp for staged in transaction.staged]
+    edited.write_text('a = 3')
+    with pytest.raises(StaleError) as e:
+        transaction.commit()
+    assert e.value.paths == [str(edited)]
+    # Nothing was written, not even the file that was not edited
+    assert _read(edited) == 'a = 3' and _read(other) == 'b = 1'
+    assert not any(os.path.exists(temp) for temp in temps)
+    assert transactions(str(tmp_path)) == []
+
+
+def _interrupted(tmp_path, pid):
+    # A journal left 'prepared' by `pid` after it renamed the file into place
+    path = tmp_path / 'screen.tsx'
+    staged = _staged(path, 'const a = 1;', 'const a = 2;', 10, 11)
+    os.replace(staged.temp, staged.path)
+    transaction = Transaction(str(tmp_path))
+    transaction.add(staged)
+    transaction._write('prepared')
+    journal_path = os.path.join(str(tmp_path), JOURNAL_DIR, f'{transaction.id}.json')
+    with open(journal_path) as f:
+        journal = json.load(f)
+    journal['pid'] = pid
+    with open(journal_path, 'w') as f:
+        json.dump(journal, f)
+    return path, transaction.id
+
+
+def test_recover_rolls_back_the_journal_of_a_dead_run(tmp_path):
+    # A process that has exited: its pid is free
+    child = subprocess.Popen([sys.executable, '-c', 'pass'])
+    child.wait()
+    path, txid = _interrupted(tmp_path, child.pid)
+    assert recover(str(tmp_path)) == [txid]
+    assert _read(path) == 'const a = 1;'
+    assert recover(str(tmp_path)) == []
+
+
+def test_recover_leaves_the_journal_of_a_live_run(tmp_path):
+    path, _ = _interrupted(tmp_path, os.getpid())
+    assert recover(str(tmp_path)) == []
+    assert _read(path) == 'const a = 2;'
+    assert [journal['state'] for journal in transactions(str(tmp_path))] == ['prepared']
+
+
+def test_recover_without_journals_writes_nothing(tmp_path):
+    assert recover(str(tmp_path)) == []
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,82 @@
+# codemod.lists: which ScrollView lists become FlatLists.
+
+from codemod.lists import find_scroll_lists
+
+LIST = '''<ScrollView style={styles.list}>
+        {items.map((item) => (
+          <Text key={item.id} style={styles.row}>{item.name}</Text>
+        ))}
+      </ScrollView>'''
+
+
+def _lists(text):
+    return [(found.data, found.skipped) for found in find_scroll_lists(text)]
+
+
+def test_converts_a_list_the_component_renders():
+    text = f'''export default function Screen({{ items }}) {{
+  return (
+    <View>
+      {LIST}
+    </View>
+  );
+}}
+'''
+    assert _lists(text) == [('items', '')]
+
+
+def test_skips_a_list_inside_a_scroller_of_the_same_orientation():
+    text = f'''export default function Screen({{ items }}) {{
+  return (
+    <ScrollView>
+      {LIST}
+    </ScrollView>
+  );
+}}
+'''
+    assert _lists(text)[-1] == ('items', 'inside a ScrollView of the same orientation')
+
+
+def test_follows_render_helpers_to_their_call_sites():
+    text = f'''export default function Screen({{ items, tab }}) {{
+  const renderTab = () => {{
+    switch (tab) {{
+      case 'Items':
+        return (
+          <View>
+            {LIST}
+          </View>
+        );
+    }}
+  }};
+
+  return (
+    <Modal>
+      <ScrollView>{{renderTab()}}</ScrollView>
+    </Modal>
+  );
+}}
+'''
+    assert _lists(text) == [('items', 'rendered by renderTab(), inside a ScrollView of the same orientation')]
+
+
+def test_converts_in_a_helper_called_outside_any_scroller():
+    text = f'''export default function Screen({{ items }}) {{
+  function renderItems() {{
+    return {LIST};
+  }}
+
+  return <View>{{renderItems()}}</View>;
+}}
+'''
+    assert _lists(text) == [('items', '')]
+
+
+def test_skips_a_helper_it_cannot_follow():
+    text = f'''export default function Screen({{ items }}) {{
+  const renderItems = () => {LIST};
+
+  return <Pager render={{renderItems}} />;
+}}
+'''
+    assert _lists(text) == [('items', 'rendered by renderItems, which is passed around rather than called')]
@@ -0,0 +1,96 @@
+# codemod.memo: constants hoisted, derived values memoized, rows wrapped.
+
+from codemod.engine import apply_edits
+from codemod.memo import plan_memo
+
+SCREEN = """import React, { useState } from 'react';
+import { View, Text } from 'react-native';
+
+export default function Screen({ items }) {
+  const [query, setQuery] = useState('');
+  const [notes] = useState([]);
+  const tabs = [
+    { key: 'all', label: 'All' },
+    { key: 'open', label: 'Open' },
+  ];
+  const visible = items.filter(item => item.name.includes(query));
+
+  const renderNotes = () => {
+    const recent = notes.filter(note => note.recent);
+    return recent.map(note => <Text key={note.id}>{note.text}</Text>);
+  };
+
+  return (
+    <View>
+      {tabs.map(tab => <Text key={tab.key}>{tab.label}</Text>)}
+      {visible.map(item => <Row key={item.id} item={item} />)}
+      {renderNotes()}
+    </View>
+  );
+}
+
+const Row = ({ item }) => (
+  <Text>{item.name}</Text>
+);
+"""
+
+
+def _memoized(text):
+    edits, report = plan_memo(text)
+    return apply_edits(text, edits), {found.name: found for found in report.found}
+
+
+def test_constant_literals_move_to_module_level():
+    new, found = _memoized(SCREEN)
+    assert found['tabs'].to == 'TABS'
+    assert 'const tabs' not in new
+    assert new.endswith("const TABS = [\n  { key: 'all', label: 'All' },\n  { key: 'open', label: 'Open' },\n];\n")
+    assert '{TABS.map(tab =>' in new
+
+
+def test_derived_values_are_memoized_on_what_they_use():
+    new, found = _memoized(SCREEN)
+    assert found['visible'].deps == ['items', 'query']
+    assert '  const visible = useMemo(() => items.filter(item => item.name.includes(query)), [items, query]);\n' in new
+    assert "import React, { useMemo, useState } from 'react';" in new
+
+
+def test_nested_declarations_move_to_the_top_of_the_component():
+    new, found = _memoized(SCREEN)
+    assert found['recent'].moved == 'Screen' and found['recent'].deps == ['notes']
+    top = new.index('const recent = useMemo(() => notes.filter(note => note.recent), [notes]);')
+    assert new.index('useState([])') < top < new.index('const renderNotes')
+    assert new.count('const recent') == 1
+
+
+def test_rows_rendered_from_a_map_are_wrapped_in_react_memo():
+    new, found = _memoized(SCREEN)
+    assert found['Row'].kind == 'row' and not found['Row'].skipped
+    assert 'const Row = React.memo(({ item }) => (\n  <Text>{item.name}</Text>\n));' in new
+
+
+def test_a_row_given_a_new_function_is_left_alone():
+    text = SCREEN.replace('<Row key={item.id} item={item} />', '<Row key={item.id} item={item} onPress={() => setQuery(item.name)} />')
+    _, found = _memoized(text)
+    assert found['Row'].skipped == 'onPress gets a new function on every render'
+
+
+def test_a_value_derived_from_a_literal_built_on_every_render_is_left_alone():
+    text = SCREEN.replace("const [notes] = useState([]);", "const notes = [{ id: 1, text: 'a', recent: true }, ...items];")
+    new, found = _memoized(text)
+    assert found['recent'].skipped == 'uses notes, which is built again on every render'
+    assert 'useMemo(() => notes' not in new
+
+
+def test_a_value_derived_only_from_constants_is_hoisted_instead():
+    text = SCREEN.replace("const visible = items.filter(item => item.name.includes(query));",
+                          "const labels = tabs.map(tab => tab.label);\n  const visible = items;")
+    new, found = _memoized(text)
+    assert found['labels'].kind == 'constant' and found['labels'].to == 'LABELS'
+    assert new.endswith('const LABELS = TABS.map(tab => tab.label);\n')
+    assert 'useMemo(() => tabs' not in new
+
+
+def test_memoizing_twice_changes_nothing():
+    new, _ = _memoized(SCREEN)
+    assert plan_memo(new)[0] == []
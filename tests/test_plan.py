@@ -0,0 +1,133 @@
+# codemod.plan: diffs built from the edits, saved plans, and applying a plan
+# only to the file it was made against.
+
+import json
+import re
+
+import pytest
+
+from codemod.__main__ import apply_saved
+from codemod.engine import RULES, Rule, run_file, run_plan
+from codemod.plan import Plan, load_plans, save_plans, unified_diff
+
+TEXT = ''.join(f'line {k}\n' for k in range(1, 21))
+
+
+def _box_views(buf):
+    return [(m.start(), m.end(), 'Box') for m in re.finditer('View', buf)]
+
+
+@pytest.fixture
+def box_rule(monkeypatch):
+    monkeypatch.setitem(RULES, 'box_views', Rule('box_views', _box_views))
+    return ['box_views']
+
+
+def _plan(text, *steps):
+    return Plan('app/screen.tsx', '', 'text', [[f'rule{k}', edits] for k, edits in enumerate(steps)])
+
+
+def _at(text, old):
+    start = text.index(old)
+    return start, start + len(old)
+
+
+def test_a_diff_has_one_hunk_per_change_with_context():
+    plan = _plan(TEXT, [[*_at(TEXT, 'line 2\n'), 'line two\n'], [*_at(TEXT, 'line 15\n'), '']])
+    assert unified_diff(plan, TEXT) == (
+        '--- a/app/screen.tsx\n'
+        '+++ b/app/screen.tsx\n'
+        '@@ -1,5 +1,5 @@\n'
+        ' line 1\n'
+        '-line 2\n'
+        '+line two\n'
+        ' line 3\n'
+        ' line 4\n'
+        ' line 5\n'
+        '@@ -12,7 +12,6 @@\n'
+        ' line 12\n'
+        ' line 13\n'
+        ' line 14\n'
+        '-line 15\n'
+        ' line 16\n'
+        ' line 17\n'
+        ' line 18\n'
+    )
+
+
+def test_changes_close_together_share_a_hunk():
+    plan = _plan(TEXT, [[*_at(TEXT, '5'), 'five'], [*_at(TEXT, '10'), 'ten']])
+    diff = unified_diff(plan, TEXT, context=3)
+    assert diff.count('@@ -') == 1
+    assert '@@ -2,12 +2,12 @@\n' in diff
+    assert unified_diff(plan, TEXT, context=1).count('@@ -') == 2
+
+
+def test_the_steps_of_later_rules_are_composed_onto_the_earlier_ones():
+    # rule1's offsets are into the text rule0 left
+    first = [[*_at(TEXT, 'line 1\n'), 'first\nline 1\n']]
+    after = 'first\n' + TEXT
+    plan = _plan(TEXT, first, [[*_at(after, 'line 3'), 'line three']])
+    assert plan.edits(TEXT) == [(0, 7, 'first\nline 1\n'), (14, 20, 'line three')]
+    diff = unified_diff(plan, TEXT)
+    assert diff.startswith('--- a/app/screen.tsx\n+++ b/app/screen.tsx\n@@ -1,6 +1,7 @@\n+first\n line 1\n line 2\n-line 3\n+line three\n')
+
+
+def test_a_missing_newline_at_the_end_is_marked():
+    plan = _plan('a\nb', [[2, 3, 'c']])
+    assert unified_diff(plan, 'a\nb') == '--- a/app/screen.tsx\n+++ b/app/screen.tsx\n@@ -1,2 +1,2 @@\n a\n-b\n\\ No newline at end of file\n+c\n\\ No newline at end of file\n'
+
+
+def test_a_plan_without_edits_has_no_diff():
+    assert unified_diff(_plan(TEXT), TEXT) == ''
+
+
+def test_saved_plans_load_back(tmp_path, box_rule):
+    path = tmp_path / 'screen.tsx'
+    path.write_text('<View>é</View>\n')
+    plan = run_file(str(path), box_rule, write=False).plan
+    saved = tmp_path / 'plans' / 'run.json'
+    save_plans([plan], str(saved))
+    [loaded] = load_plans(str(saved))
+    assert (loaded.path, loaded.digest, loaded.units) == (plan.path, plan.digest, plan.units)
+    assert loaded.edits('<View>é</View>\n') == plan.edits('<View>é</View>\n') == [(1, 5, 'Box'), (9, 13, 'Box')]
+    assert run_plan(loaded, write=False).changed
+
+    data = json.loads(saved.read_text())
+    data['format'] = 0
+    saved.write_text(json.dumps(data))
+    with pytest.raises(ValueError, match='unsupported plan format'):
+        load_plans(str(saved))
+
+
+def test_a_plan_applies_to_the_file_it_was_made_against(tmp_path, box_rule):
+    path = tmp_path / 'screen.tsx'
+    path.write_text('<View>a</View>\n')
+    plan = run_file(str(path), box_rule, write=False).plan
+    assert path.read_text() == '<View>a</View>\n'
+    report = run_plan(plan, write=False)
+    assert report.changed and report.staged is None
+
+    path.write_text('<View>b</View>\n')
+    with pytest.raises(ValueError, match='file changed since the plan was made'):
+        run_plan(plan)
+    assert path.read_text() == '<View>b</View>\n'
+
+
+def test_apply_refuses_every_file_if_one_changed_after_planning(tmp_path, monkeypatch, box_rule):
+    monkeypatch.chdir(tmp_path)
+    for name in ('a.tsx', 'b.tsx'):
+        (tmp_path / name).write_text(f'<View>{name}</View>\n')
+    save_plans([run_file(name, box_rule, write=False).plan for name in ('a.tsx', 'b.tsx')], 'plan.json')
+
+    (tmp_path / 'b.tsx').write_text('<View>edited</View>\n')
+    with pytest.raises(SystemExit) as e:
+        apply_saved('plan.json')
+    assert e.value.code == 1
+    assert (tmp_path / 'a.tsx').read_text() == '<View>a.tsx</View>\n'
+    assert (tmp_path / 'b.tsx').read_text() == '<View>edited</View>\n'
+
+    (tmp_path / 'b.tsx').write_text('<View>b.tsx</View>\n')
+    apply_saved('plan.json')
+    assert (tmp_path / 'a.tsx').read_text() == '<Box>a.tsx</Box>\n'
+    assert (tmp_path / 'b.tsx').read_text() == '<Box>b.tsx</Box>\n'
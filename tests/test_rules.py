@@ -0,0 +1,34 @@
+# Every rule in codemod/rules/*.toml, applied on its own to the app's
+# sources, must reach a fixed point: planning again on its output finds
+# nothing left to do.
+
+import os
+
+import pytest
+
+from codemod.engine import get_rules
+from codemod.rulefiles import catalog
+from codemod.tree import DEFAULT_GLOBS, expand_globs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def sources():
+    sources = {}
+    for path in expand_globs(DEFAULT_GLOBS, ROOT):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            sources[os.path.relpath(path, ROOT)] = f.read()
+    assert sources, f"no sources under {ROOT}"
+    return sources
+
+
+@pytest.mark.parametrize('name', list(catalog()))
+def test_rule_is_idempotent_on_the_tree(name, sources):
+    [rule] = get_rules([name])
+    again = {}
+    for path, text in sources.items():
+        new, matches = rule.apply(text)
+        if new != text and rule.plan(new):
+            again[path] = rule.plan(new)[:3]
+    assert again == {}
@@ -0,0 +1,93 @@
+# codemod.scanner: pairs, elements and what is masked as not code.
+
+from codemod.scanner import find_case_blocks, find_elements, rescan, scan, stylesheet_bodies
+
+SCREEN = """import { View, Text } from 'react-native';
+
+const pattern = /[}{]/g; // a } in a comment
+const label = `total: ${count} }`;
+
+export default function Screen({ tab }) {
+  switch (tab) {
+    case 'Home':
+      return <Text>Home</Text>;
+    case 'Activity':
+      return (
+        <View style={{ flex: 1 }}>
+          <Text>Recent {'{'} activity</Text>
+          <Image source={icon} />
+        </View>
+      );
+    default:
+      return null;
+  }
+}
+
+const styles = StyleSheet.create({
+  container: { flex: 1 },
+});
+"""
+
+
+def _at(text, snippet, k=0):
+    return text.index(snippet) + k
+
+
+def test_brackets_in_strings_comments_regexes_and_templates_are_not_pairs():
+    index = scan(SCREEN)
+    assert index.errors == []
+    assert all(pair.close >= 0 for pair in index.pairs)
+    for snippet in ('[}{]', 'a } in a comment', 'total:', "'{'"):
+        assert not index.is_code(_at(SCREEN, snippet, 1))
+    # Template substitutions are code again
+    assert index.is_code(_at(SCREEN, 'count'))
+
+
+def test_elements_record_their_bounds_and_parents():
+    index = scan(SCREEN)
+    view = find_elements(SCREEN, 'View', 'style=')[0]
+    assert SCREEN[view.start:view.open_end] == '<View style={{ flex: 1 }}>'
+    assert SCREEN[view.close_start:view.end] == '</View>'
+    image = find_elements(SCREEN, 'Image')[0]
+    assert image.self_closing
+    assert index.elements[image.parent] is view
+
+
+def test_enclosing_pair_and_jsx_text():
+    index = scan(SCREEN)
+    body = index.enclosing_pair(_at(SCREEN, 'switch'), '{')
+    assert SCREEN[body.open - 2:body.open] == ') '
+    assert index.in_jsx_text(_at(SCREEN, 'Recent'))
+    assert not index.in_jsx_text(_at(SCREEN, 'flex: 1'))
+    assert not index.in_jsx_text(_at(SCREEN, 'total:'))
+
+
+def test_case_blocks_end_at_the_next_label():
+    [(start, end)] = find_case_blocks(SCREEN, 'Activity')
+    block = SCREEN[start:end]
+    assert block.lstrip().startswith("case 'Activity':")
+    assert block.rstrip().endswith(');')
+    assert 'default' not in block
+
+
+def test_stylesheet_bodies():
+    [body] = stylesheet_bodies(SCREEN)
+    assert SCREEN[body.open:body.close + 1] == '{\n  container: { flex: 1 },\n}'
+
+
+def test_errors_are_reported_with_their_offsets():
+    text = '<View>\n  <Text>a</View>\n'
+    assert [message for _, message in scan(text).errors][0] == '<Text> closed by </View>'
+    assert scan('const a = { b: [1, 2 };\n').errors
+
+
+def test_rescan_matches_a_full_scan():
+    text = SCREEN.replace('<Text>Home</Text>', '<Text style={styles.title}>Home {tab}</Text>')
+    index = rescan(scan(SCREEN), text)
+    full = scan.__wrapped__(text)
+    assert (index.pairs, index.elements, index.masked, index.errors) == (full.pairs, full.elements, full.masked, full.errors)
+
+
+def test_bytes_and_text_scan_alike():
+    index, binary = scan(SCREEN), scan(SCREEN.encode())
+    assert (index.pairs, index.elements, index.masked) == (binary.pairs, binary.elements, binary.masked)
@@ -0,0 +1,89 @@
+# codemod.schedule: waves, the reasons rules depend on each other, and order
+# conflicts.
+
+from codemod.engine import RULES, Rule, get_rules
+from codemod.schedule import ALL, Access, overlaps, schedule, table_access
+
+
+def _rule(name, reads=(), writes=(), needs=(), produces=()):
+    return Rule(name, lambda buf: [], access=Access(set(reads), set(writes), list(needs), list(produces)))
+
+
+def _waves(result):
+    return [[rule.name for rule in wave] for wave in result.waves]
+
+
+def test_independent_rules_share_a_wave():
+    result = schedule([_rule('a', {'case:Home'}, {'case:Home'}), _rule('b', {'style:title'}, {'style:title'})])
+    assert _waves(result) == [['a', 'b']]
+    assert result.edges == [] and result.conflicts == []
+
+
+def test_a_rule_reading_what_an_earlier_one_writes_waits_for_it():
+    result = schedule([
+        _rule('insert', {'case:Activity'}, {'case:Activity', 'style:activityDate'}),
+        _rule('scroll', {'style:activityDate'}, {'element:ScrollView'}),
+        _rule('other', {'style:title'}, {'style:title'}),
+    ])
+    assert _waves(result) == [['insert', 'other'], ['scroll']]
+    assert result.edges == [('scroll', 'insert', 'reads style:activityDate')]
+
+
+def test_families_and_literal_text_create_dependencies():
+    result = schedule([
+        _rule('template', writes={'case:Home'}, produces=['<ScrollView style={styles.list}>']),
+        _rule('anchor', needs=['style={styles.list}'], writes={'element:FlatList'}),
+        _rule('planner', {'jsx'}, {'jsx'}),
+    ])
+    assert _waves(result) == [['template'], ['anchor'], ['planner']]
+    assert ('anchor', 'template', "looks for 'style={styles.list}'") in result.edges
+    assert ('planner', 'template', 'reads case:Home') not in result.edges
+    assert any(name == 'planner' and other == 'template' for name, other, _ in result.edges)
+
+
+def test_a_rule_without_an_access_is_ordered_against_everything():
+    result = schedule([_rule('a', {'style:x'}, {'style:x'}), Rule('opaque', lambda buf: []), _rule('b', {'style:y'}, {'style:y'})])
+    assert _waves(result) == [['a'], ['opaque'], ['b']]
+
+
+def test_reading_the_output_of_a_later_rule_is_a_conflict():
+    result = schedule([_rule('early', {'style:late'}, {'element:View'}), _rule('late', writes={'style:late'})])
+    assert result.conflicts == [('early', 'late', 'reads style:late')]
+
+
+def test_table_access_from_edits():
+    access = table_access({
+        'name': 'r',
+        'edit': [{'case': 'Activity', 'contains': 'style={styles.old}', 'template': '<ScrollView>\n</ScrollView>'}],
+        'styles': {'block': 'list: {\n  flex: 1,\n},', 'after': 'container'},
+        'imports': {'react-native': ['ScrollView']},
+    })
+    assert access.reads == {'case:Activity', 'styles', 'style:container', 'imports'}
+    assert access.writes == {'case:Activity', 'element:ScrollView', 'style:list', 'import:react-native'}
+    assert access.needs == ['style={styles.old}']
+    assert table_access({'name': 'p', 'planner': 'x:y'}) == Access({ALL}, {ALL})
+
+
+def test_the_default_rules_schedule_without_conflicts():
+    result = schedule(get_rules(None))
+    assert result.conflicts == []
+    assert [rule.name for wave in result.waves for rule in wave] == [rule.name for rule in get_rules(None)]
+
+
+def test_the_list_rule_waits_for_the_extraction_it_converts():
+    # extract_duplicate_subtrees can leave a ScrollView around a .map()
+    extract, virtualize = get_rules(['extract_duplicate_subtrees', 'virtualize_scroll_lists'])
+    result = schedule([extract, virtualize])
+    assert result.conflicts == []
+    assert result.edges == [('virtualize_scroll_lists', 'extract_duplicate_subtrees', 'reads element:ScrollView')]
+    assert schedule([RULES['virtualize_scroll_lists'], RULES['extract_duplicate_subtrees']]).conflicts == [
+        ('virtualize_scroll_lists', 'extract_duplicate_subtrees', 'reads element:ScrollView')]
+
+
+def test_overlaps():
+    assert overlaps((0, 5, ''), (4, 8, ''))
+    assert not overlaps((0, 5, ''), (5, 8, ''))
+    # Two insertions at one offset, and an insertion inside a replacement
+    assert overlaps((3, 3, 'a'), (3, 3, 'b'))
+    assert overlaps((0, 5, ''), (2, 2, 'x'))
+    assert not overlaps((5, 5, 'x'), (0, 5, ''))
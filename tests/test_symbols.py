@@ -0,0 +1,39 @@
+# codemod.symbols: pruning unused named imports.
+
+from codemod.engine import apply_edits
+from codemod.symbols import prune_edits
+
+SCREEN = """import { View, Text } from 'react-native';
+import { Eye, EyeOff } from 'lucide-react-native';
+import { formatDate } from '@/utils/format';
+import { useTheme, ThemeName } from "../contexts/theme";
+
+export default function Screen() {
+  const { colors } = useTheme();
+  return <View><Eye color={colors.text} /></View>;
+}
+"""
+
+
+def _pruned(text):
+    return apply_edits(text, prune_edits(text))
+
+
+def test_unused_names_are_removed():
+    pruned = _pruned(SCREEN)
+    assert "import { Eye } from 'lucide-react-native';" in pruned
+    assert 'import { useTheme } from "../contexts/theme";' in pruned
+    # react-native is not a pruned module
+    assert "import { View, Text } from 'react-native';" in pruned
+
+
+def test_an_app_module_with_no_names_left_is_still_imported():
+    pruned = _pruned(SCREEN)
+    assert "import '@/utils/format';\n" in pruned
+    assert 'formatDate' not in pruned
+    assert _pruned(pruned) == pruned
+
+
+def test_an_icon_import_with_no_names_left_goes():
+    text = "import { Eye } from 'lucide-react-native';\nimport { View } from 'react-native';\n\nexport const A = () => <View />;\n"
+    assert _pruned(text) == "import { View } from 'react-native';\n\nexport const A = () => <View />;\n"
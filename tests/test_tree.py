@@ -0,0 +1,46 @@
+# codemod.tree: a tree run writes every file or none.
+
+import re
+
+import pytest
+
+from codemod.engine import RULES, Rule
+from codemod.tree import run_tree
+
+
+def _rename_view(buf):
+    # <View> -> <Box>; a file with BOOM in it breaks the rule
+    if 'BOOM' in buf:
+        raise RuntimeError('rule failed')
+    return [(m.start(), m.end(), 'Box') for m in re.finditer('View', buf)]
+
+
+@pytest.fixture
+def rename_rule(monkeypatch):
+    monkeypatch.setitem(RULES, 'rename_view', Rule('rename_view', _rename_view))
+    return ['rename_view']
+
+
+def _files(tmp_path):
+    return sorted(path.name for path in tmp_path.rglob('*') if path.is_file() and '.codemod-cache' not in path.parts)
+
+
+def test_commits_every_file(tmp_path, rename_rule):
+    (tmp_path / 'app').mkdir()
+    (tmp_path / 'app' / 'a.tsx').write_text('<View></View>\n')
+    (tmp_path / 'app' / 'b.tsx').write_text('<View>b</View>\n')
+    report = run_tree(['app/*.tsx'], rename_rule, workers=1, root=str(tmp_path))
+    assert sorted(report.changed) == [str(tmp_path / 'app' / 'a.tsx'), str(tmp_path / 'app' / 'b.tsx')]
+    assert (tmp_path / 'app' / 'a.tsx').read_text() == '<Box></Box>\n'
+    assert _files(tmp_path) == ['a.tsx', 'b.tsx']
+
+
+def test_a_failing_file_leaves_no_staged_files(tmp_path, rename_rule):
+    (tmp_path / 'app').mkdir()
+    # Largest first: a.tsx is staged before b.tsx fails
+    (tmp_path / 'app' / 'a.tsx').write_text('<View>a longer file</View>\n')
+    (tmp_path / 'app' / 'b.tsx').write_text('<View>BOOM</View>\n')
+    with pytest.raises(RuntimeError):
+        run_tree(['app/*.tsx'], rename_rule, workers=1, root=str(tmp_path))
+    assert _files(tmp_path) == ['a.tsx', 'b.tsx']
+    assert (tmp_path / 'app' / 'a.tsx').read_text() == '<View>a longer file</View>\n'
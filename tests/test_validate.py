@@ -0,0 +1,53 @@
+# codemod.validate: rewrites are rejected for the errors they add, not for
+# the ones the file already had.
+
+from codemod.engine import apply_edits
+from codemod.validate import check
+
+SCREEN = '''export default function Screen({ items }) {
+  return (
+    <View style={styles.list}>
+      <Text>Recent</Text>
+    </View>
+  );
+}
+'''
+
+
+def _check(text, edits, name='rule'):
+    return check(text, apply_edits(text, edits), [(name, edits)])
+
+
+def _before(text, anchor, insert):
+    pos = text.index(anchor)
+    return [(pos, pos, insert)]
+
+
+def test_accepts_jsx():
+    index, rejected = _check(SCREEN, _before(SCREEN, '<Text>', '<Text>New</Text>\n      '))
+    assert rejected == {} and index is not None
+
+
+def test_rejects_a_tag_closed_by_the_wrong_name():
+    pos = SCREEN.index('</View>')
+    _, rejected = _check(SCREEN, [(pos, pos + len('</View>'), '</ScrollView>')])
+    assert list(rejected) == ['rule']
+
+
+def test_rejects_declarations_in_jsx_text():
+    insert = 'const rows = items.filter(item => item.open);\n      '
+    _, rejected = _check(SCREEN, _before(SCREEN, '<Text>', insert), name='declare_rows')
+    line, message = rejected['declare_rows']
+    assert line == 4 and 'code in JSX text' in message
+
+
+def test_accepts_the_same_declaration_before_the_return():
+    insert = 'const rows = items.filter(item => item.open);\n  '
+    _, rejected = _check(SCREEN, _before(SCREEN, 'return (', insert))
+    assert rejected == {}
+
+
+def test_accepts_plain_text():
+    insert = 'Open items, then closed ones\n      '
+    _, rejected = _check(SCREEN, _before(SCREEN, '<Text>', insert))
+    assert rejected == {}
@@ -0,0 +1,78 @@
+# codemod.watch: a save is rewritten once, and the tool's own write does not
+# trigger the rules again.
+
+import re
+import threading
+
+import pytest
+
+import codemod.watch
+from codemod.engine import RULES, Rule, get_rules
+from codemod.journal import transactions
+from codemod.watch import WatchedFile, apply_watched, watch
+
+
+_SEEN = []
+
+
+def _box(buf):
+    # <View> -> <Box>, remembering every text it planned on
+    _SEEN.append(buf)
+    return [(m.start(), m.end(), 'Box') for m in re.finditer('View', buf)]
+
+
+@pytest.fixture
+def box_rule(monkeypatch):
+    _SEEN.clear()
+    monkeypatch.setitem(RULES, 'watch_box', Rule('watch_box', _box))
+    return _SEEN
+
+
+def test_a_save_is_rewritten_and_the_rewrite_is_not(tmp_path, monkeypatch, box_rule):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'screen.tsx'
+    path.write_text('<Box>a</Box>\n')
+    watched = WatchedFile(str(path))
+    watched.load()
+    rules = get_rules(['watch_box'])
+
+    path.write_text('<View>b</View>\n')
+    report = apply_watched(watched, rules)
+    assert report.changed and report.transaction
+    assert path.read_text() == '<Box>b</Box>\n'
+    assert box_rule == ['<View>b</View>\n']
+
+    # The write above is what the watcher sees next
+    report = apply_watched(watched, rules)
+    assert report.cached and not report.changed
+    assert box_rule == ['<View>b</View>\n']
+    assert len(transactions(str(tmp_path))) == 1
+
+
+def test_polling_picks_up_a_save_once(tmp_path, monkeypatch, box_rule):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / 'screen.tsx'
+    path.write_text('<Box>a</Box>\n')
+    # The save below must come after the watcher took its first stats
+    watching = threading.Event()
+    make_watcher = codemod.watch.make_watcher
+
+    def started(paths, poll=False):
+        watcher = make_watcher(paths, poll)
+        watching.set()
+        return watcher
+
+    monkeypatch.setattr(codemod.watch, 'make_watcher', started)
+    reports = []
+    thread = threading.Thread(target=watch, args=([str(path)], ['watch_box']), kwargs={'poll': True, 'timeout': 1.5, 'on_report': reports.append})
+    thread.start()
+    assert watching.wait(5)
+    path.write_text('<View>saved</View>\n')
+    thread.join(10)
+    assert not thread.is_alive()
+
+    assert path.read_text() == '<Box>saved</Box>\n'
+    # The first pass, the save, and the tool's own write seen as cached
+    assert [(report.changed, report.cached) for report in reports] == [(False, False), (True, False), (False, True)]
+    assert box_rule == ['<Box>a</Box>\n', '<View>saved</View>\n']
+    assert [journal['state'] for journal in transactions(str(tmp_path))] == ['committed']